@@ -0,0 +1,102 @@
+"""
+Gunicorn configuration for the pretalx container, used instead of runserver.
+
+Workers and threads are sized from the CPUs available to the container and
+can be overridden with GUNICORN_* environment variables. The app is loaded
+once in the master, so pretalx, its plugins and the OIDC discovery are
+imported and run once; each forked worker then warms its OIDC caches.
+
+Send SIGHUP to the master (docker compose kill -s HUP pretalx) to re-read
+the [oidc] section of pretalx.cfg and replace all workers gracefully. To
+reload it without replacing workers, run manage.py oidc_reload instead.
+Workers are forked from the preloaded app, so code changes and the rest of
+pretalx.cfg still need a container restart.
+"""
+
+import math
+import os
+import threading
+
+
+def cpu_count():
+    """Return the CPUs available to this container, honouring cgroup limits."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+wsgi_app = "pretalx.wsgi:application"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Threads serve requests waiting for the database or the OIDC provider
+worker_class = "gthread"
+workers = int(os.environ.get("GUNICORN_WORKERS", cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+preload_app = True
+
+# Token exchanges with a slow provider can take a while
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = 5
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+
+# /tmp may be on a slow overlay filesystem, heartbeats go to memory
+worker_tmp_dir = "/dev/shm"
+accesslog = "-"
+errorlog = "-"
+
+# Seconds a new worker waits for the OIDC caches before serving requests
+warmup_timeout = float(os.environ.get("GUNICORN_WARMUP_TIMEOUT", 5))
+
+
+def pre_fork(server, worker):
+    # Database connections opened while loading the app must not be shared
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        connection.close()
+        # psycopg pools are per process, workers open their own
+        if hasattr(connection, "close_pool"):
+            connection.close_pool()
+
+
+def post_fork(server, worker):
+    from pretalx_oidc.config import warm_caches
+    from pretalx_oidc.health import start_monitor
+    from pretalx_oidc.reload import start_listener
+
+    # Catch up on oidc_reload runs since the master loaded the settings
+    start_listener()
+    # Readiness is checked from the start, not from the first request on
+    start_monitor()
+
+    # Don't let a provider that is slow or down hold up the worker
+    thread = threading.Thread(target=warm_caches, daemon=True)
+    thread.start()
+    thread.join(warmup_timeout)
+
+
+def on_reload(server):
+    from pretalx_oidc.config import reload_oidc_settings
+    from pretalx_oidc.reload import mark_loaded
+
+    # Runs in the master on SIGHUP, before the new workers are forked from it
+    reload_oidc_settings()
+    mark_loaded()
+
+
+def worker_exit(server, worker):
+    from pretalx_oidc.audit import login_events
+
+    # Write buffered login events before the worker is gone
+    login_events.flush()
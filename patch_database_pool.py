@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Patch Django settings to configure database connection reuse from pretalx.cfg.
+Supports persistent connections, health checks and psycopg 3 connection pools.
+
+"""
+
+settings_path = "/pretalx/src/pretalx/settings.py"
+
+# Read the settings file
+with open(settings_path, 'r') as f:
+    content = f.read()
+
+pool_config = '''
+# Database connections - persistent connections or a psycopg 3 connection pool
+# Configured in the [database] section; applies to every database, e.g. replicas
+for _db in DATABASES.values():
+    if _db['ENGINE'] == 'django.db.backends.sqlite3':
+        continue
+    if config.has_option('database', 'conn_max_age'):
+        _db['CONN_MAX_AGE'] = config.getint('database', 'conn_max_age')
+    if config.has_option('database', 'conn_health_checks'):
+        _db['CONN_HEALTH_CHECKS'] = config.getboolean('database', 'conn_health_checks')
+    if (
+        _db['ENGINE'] == 'django.db.backends.postgresql'
+        and config.getboolean('database', 'pool', fallback=False)
+    ):
+        _pool = {
+            key: (int if key.endswith('_size') else float)(
+                config.get('database', 'pool_' + key)
+            )
+            for key in ('min_size', 'max_size', 'timeout', 'max_idle', 'max_lifetime')
+            if config.has_option('database', 'pool_' + key)
+        }
+        if _db.get('CONN_HEALTH_CHECKS'):
+            try:
+                from psycopg_pool import ConnectionPool
+                # Check connections when they are taken from the pool
+                _pool['check'] = ConnectionPool.check_connection
+            except (ImportError, AttributeError):
+                pass
+        _db['OPTIONS'] = {**_db.get('OPTIONS', {}), 'pool': _pool or True}
+        # Connections are returned to the pool at the end of every request,
+        # Django refuses pools combined with persistent connections
+        _db['CONN_MAX_AGE'] = 0
+        _db['CONN_HEALTH_CHECKS'] = False
+if config.has_option('database', 'conn_max_age') or config.has_option('database', 'pool'):
+    print("[Settings] Configured database connection reuse")
+'''
+
+if "config.getboolean('database', 'pool'" not in content:
+    marker = 'DEFAULT_AUTO_FIELD = '
+    if marker in content:
+        # Insert after the DEFAULT_AUTO_FIELD line, right below DATABASES
+        start = content.index(marker)
+        end = content.index('\n', start) + 1
+        content = content[:end] + pool_config + content[end:]
+        print("✓ Added database connection settings after DATABASES")
+    else:
+        content += "\n" + pool_config
+        print("✓ Added database connection settings at end of file")
+else:
+    print("✓ Database connection settings already configured")
+
+# Write the patched settings
+with open(settings_path, 'w') as f:
+    f.write(content)
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Patch Django settings to add an optional read replica from pretalx.cfg.
+The OIDC plugin's router sends its login lookups to the replica.
+
+"""
+
+settings_path = "/pretalx/src/pretalx/settings.py"
+
+# Read the settings file
+with open(settings_path, 'r') as f:
+    content = f.read()
+
+replica_config = '''
+# Database replica - used by the OIDC plugin for login lookups
+# Configured in the [database_replica] section; missing keys use [database]
+if config.has_section('database_replica'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        **{
+            key.upper(): config.get('database_replica', key)
+            for key in ('name', 'user', 'password', 'host', 'port')
+            if config.has_option('database_replica', key)
+        },
+        # Tests run against the primary's test database
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['pretalx_oidc.routers.ReplicaRouter']
+    print("[Settings] Added database replica for OIDC login lookups")
+'''
+
+if "DATABASES['replica']" not in content:
+    marker = 'DEFAULT_AUTO_FIELD = '
+    if marker in content:
+        # Insert after the DEFAULT_AUTO_FIELD line, right below DATABASES
+        start = content.index(marker)
+        end = content.index('\n', start) + 1
+        content = content[:end] + replica_config + content[end:]
+        print("✓ Added database replica configuration after DATABASES")
+    else:
+        content += "\n" + replica_config
+        print("✓ Added database replica configuration at end of file")
+else:
+    print("✓ Database replica already configured")
+
+# Write the patched settings
+with open(settings_path, 'w') as f:
+    f.write(content)
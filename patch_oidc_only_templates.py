@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Generate OIDC-only variants of the pretalx templates with password forms.
+
+The variants leave out the password login, registration and reset links, and
+the password change sections of the speaker profile and organizer settings.
+They are written to a separate template directory, and settings.py is patched
+to put that directory in front of pretalx's own templates once, at startup,
+when hide_password_form is set and an OIDC backend is configured. The
+original templates are not modified.
+
+"""
+import os
+import sys
+
+src_path = '/pretalx/src'
+pretalx_path = os.path.join(src_path, 'pretalx')
+variants_path = os.path.join(src_path, 'oidc_only_templates')
+settings_path = os.path.join(pretalx_path, 'settings.py')
+
+MARKER = '{# OIDC-only variant, generated by patch_oidc_only_templates.py #}\n'
+
+
+def cut(content, start, end, replacement=''):
+    """Replace everything from start up to and including end."""
+    begin = content.index(start)
+    finish = content.index(end, begin) + len(end)
+    return content[:begin] + replacement + content[finish:]
+
+
+def auth_variant(content):
+    # Only the OIDC button, which is rendered by the auth_html signal
+    return cut(
+        content,
+        '{% if not hide_login %}',
+        '{% endif %}\n{% if no_form %}',
+        '{% html_signal "pretalx.common.signals.auth_html" sender=request.event '
+        'request=request next_url=success_url %}\n{% if no_form %}',
+    )
+
+
+def profile_variant(content):
+    # The "Your Account" section: email and password change
+    return cut(content, '    <h2>{% translate "Your Account" %}</h2>', '    </form>\n')
+
+
+def orga_user_variant(content):
+    # The "Login settings" fieldset: email and password change
+    return cut(
+        content,
+        '    <fieldset class="m-2 password-input-form">',
+        '    </fieldset>\n',
+    )
+
+
+TEMPLATES = {
+    'common/templates/common/auth.html': auth_variant,
+    'cfp/templates/cfp/event/user_profile.html': profile_variant,
+    'orga/templates/orga/user.html': orga_user_variant,
+}
+
+settings_config = '''
+# OIDC-only template variants without password forms, chosen once at startup
+# See patch_oidc_only_templates.py and hide_password_form in pretalx.cfg.example
+OIDC_ONLY_TEMPLATES = config.getboolean(
+    'oidc', 'hide_password_form', fallback=False
+) and any('oidc' in backend.lower() for backend in AUTHENTICATION_BACKENDS)
+if OIDC_ONLY_TEMPLATES:
+    # After DATA_DIR/templates, so site specific overrides still win
+    TEMPLATES[0]['DIRS'].insert(1, BASE_DIR / 'oidc_only_templates')
+    print("[Settings] Using OIDC-only templates without password forms")
+'''
+
+
+def generate_variants():
+    for path, make_variant in TEMPLATES.items():
+        with open(os.path.join(pretalx_path, path), 'r') as f:
+            content = f.read()
+        try:
+            variant = make_variant(content)
+        except ValueError:
+            print(f"✗ Could not find the password section of {path}")
+            return False
+
+        # Loaded under the same name as the original, without the app directory
+        name = path.split('/templates/', 1)[1]
+        target = os.path.join(variants_path, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w') as f:
+            f.write(MARKER + variant)
+        print(f"✓ Generated OIDC-only variant of {name}")
+    return True
+
+
+def patch_settings():
+    with open(settings_path, 'r') as f:
+        content = f.read()
+
+    if 'OIDC_ONLY_TEMPLATES' in content:
+        print("✓ OIDC-only templates already configured")
+        return True
+
+    marker = 'STATICFILES_FINDERS = '
+    if marker not in content:
+        print("✗ Could not find TEMPLATES in settings.py")
+        return False
+    content = content.replace(marker, settings_config.lstrip('\n') + '\n' + marker, 1)
+    with open(settings_path, 'w') as f:
+        f.write(content)
+    print("✓ Added OIDC-only template selection after TEMPLATES")
+    return True
+
+
+def main():
+    """Main function."""
+    success = generate_variants() and patch_settings()
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
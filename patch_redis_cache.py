@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Patch Django settings to tune the Redis cache and session storage from
+pretalx.cfg: session engine, TTLs, key prefixes and the session serializer.
+
+"""
+
+settings_path = "/pretalx/src/pretalx/settings.py"
+
+# Read the settings file
+with open(settings_path, 'r') as f:
+    content = f.read()
+
+redis_config = '''
+# Redis cache and sessions - engine, TTLs and key prefixes
+# Configured in the [redis] section, see pretalx.cfg.example
+if HAS_REDIS:
+    if config.has_option('redis', 'cache_timeout'):
+        CACHES['default']['TIMEOUT'] = config.getint('redis', 'cache_timeout')
+    if config.has_option('redis', 'key_prefix'):
+        CACHES['default']['KEY_PREFIX'] = config.get('redis', 'key_prefix')
+    # cache: sessions only live in Redis; cached_db: written to the database
+    # too, but read from Redis; db: database only
+    if config.has_option('redis', 'session_engine'):
+        SESSION_ENGINE = 'django.contrib.sessions.backends.' + config.get(
+            'redis', 'session_engine'
+        )
+    if SESSION_ENGINE != 'django.contrib.sessions.backends.db':
+        CACHES.setdefault('redis_sessions', {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config.get('redis', 'location'),
+            'TIMEOUT': 3600 * 24 * 30,
+        })
+        if config.has_option('redis', 'session_key_prefix'):
+            CACHES['redis_sessions']['KEY_PREFIX'] = config.get(
+                'redis', 'session_key_prefix'
+            )
+        SESSION_CACHE_ALIAS = 'redis_sessions'
+    print(f"[Settings] Using {SESSION_ENGINE.rsplit('.', 1)[-1]} sessions with Redis")
+if config.has_option('redis', 'session_ttl'):
+    SESSION_COOKIE_AGE = config.getint('redis', 'session_ttl')
+if config.get('redis', 'session_serializer', fallback='json') == 'msgpack':
+    SESSION_SERIALIZER = 'pretalx_oidc.serializers.MsgPackSerializer'
+'''
+
+if "config.has_option('redis', 'session_engine')" not in content:
+    marker = 'MESSAGE_STORAGE = '
+    if marker in content:
+        # Insert after pretalx's cache settings, which pick the session engine
+        content = content.replace(marker, redis_config.lstrip('\n') + '\n' + marker, 1)
+        print("✓ Added Redis cache and session settings after CACHE SETTINGS")
+    else:
+        content += "\n" + redis_config
+        print("✓ Added Redis cache and session settings at end of file")
+else:
+    print("✓ Redis cache and session settings already configured")
+
+# Write the patched settings
+with open(settings_path, 'w') as f:
+    f.write(content)
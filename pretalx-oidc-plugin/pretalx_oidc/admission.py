@@ -0,0 +1,352 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Admission control for OIDC logins.
+
+New login flows are paced by a token bucket, and the number of token
+exchanges running at the same time is capped. Users who are turned away get a
+small wait page that retries on its own. State lives in Redis when pretalx's
+cache is Redis-backed, so all workers share one limit; otherwise every process
+enforces the limits on its own.
+"""
+
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.crypto import get_random_string
+from django.utils.html import escape
+from django.utils.translation import gettext as _
+from mozilla_django_oidc.utils import import_from_settings
+
+logger = logging.getLogger(__name__)
+
+TICKET_PARAM = "oidc_ticket"
+
+# Atomically refill the bucket and take one token.
+# KEYS[1] bucket hash; ARGV: now, rate, burst
+TAKE_TOKEN_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local taken = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    taken = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return taken
+"""
+
+# Atomically claim a concurrency slot, expiring slots of crashed workers.
+# KEYS[1] in-flight zset; ARGV: now, limit, slot timeout, slot id
+ACQUIRE_SLOT_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[3]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 1
+"""
+
+# Atomically drop tickets not seen for a while, then count the waiting users
+# and find the position of a ticket, 0 if it isn't waiting.
+# KEYS[1] last-seen zset, KEYS[2] arrival zset; ARGV: now, window, ticket
+WAITING_SCRIPT = """
+local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+for _, ticket in ipairs(stale) do
+    redis.call('ZREM', KEYS[1], ticket)
+    redis.call('ZREM', KEYS[2], ticket)
+end
+local rank = redis.call('ZRANK', KEYS[2], ARGV[3])
+return {redis.call('ZCARD', KEYS[2]), rank and rank + 1 or 0}
+"""
+
+
+class LocalAdmission:
+    """Per-process admission state, used when no Redis cache is configured."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = None
+        self._updated = time.monotonic()
+        self._in_flight = {}  # slot id -> started
+        self._waiting = {}  # ticket -> (arrived, last seen)
+
+    def take_token(self, rate, burst):
+        with self._lock:
+            now = time.monotonic()
+            tokens = burst if self._tokens is None else self._tokens
+            tokens = min(burst, tokens + (now - self._updated) * rate)
+            self._updated = now
+            taken = tokens >= 1
+            self._tokens = tokens - 1 if taken else tokens
+            return taken
+
+    def acquire_slot(self, slot, limit, timeout):
+        with self._lock:
+            now = time.monotonic()
+            self._in_flight = {
+                key: started
+                for key, started in self._in_flight.items()
+                if now - started < timeout
+            }
+            if len(self._in_flight) >= limit:
+                return False
+            self._in_flight[slot] = now
+            return True
+
+    def release_slot(self, slot):
+        with self._lock:
+            self._in_flight.pop(slot, None)
+
+    def enqueue(self, ticket):
+        with self._lock:
+            now = time.monotonic()
+            arrived, _ = self._waiting.get(ticket, (now, now))
+            self._waiting[ticket] = (arrived, now)
+
+    def dequeue(self, ticket):
+        with self._lock:
+            self._waiting.pop(ticket, None)
+
+    def _prune_waiting(self, window):
+        now = time.monotonic()
+        self._waiting = {
+            key: times
+            for key, times in self._waiting.items()
+            if now - times[1] < window
+        }
+
+    def stats(self, window):
+        with self._lock:
+            self._prune_waiting(window)
+            return len(self._waiting), len(self._in_flight)
+
+    def position(self, ticket, window):
+        with self._lock:
+            self._prune_waiting(window)
+            if ticket not in self._waiting:
+                return 0
+            arrived = self._waiting[ticket][0]
+            return 1 + sum(1 for other, _ in self._waiting.values() if other < arrived)
+
+
+class RedisAdmission:
+    """Admission state shared by all workers through Redis."""
+
+    prefix = "pretalx_oidc:admission"
+
+    def __init__(self, client):
+        self.client = client
+        self._take_token = client.register_script(TAKE_TOKEN_SCRIPT)
+        self._acquire_slot = client.register_script(ACQUIRE_SLOT_SCRIPT)
+        self._waiting = client.register_script(WAITING_SCRIPT)
+
+    def take_token(self, rate, burst):
+        return bool(
+            self._take_token(
+                keys=[f"{self.prefix}:bucket"], args=[time.time(), rate, burst]
+            )
+        )
+
+    def acquire_slot(self, slot, limit, timeout):
+        return bool(
+            self._acquire_slot(
+                keys=[f"{self.prefix}:in_flight"],
+                args=[time.time(), limit, timeout, slot],
+            )
+        )
+
+    def release_slot(self, slot):
+        self.client.zrem(f"{self.prefix}:in_flight", slot)
+
+    def enqueue(self, ticket):
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.zadd(f"{self.prefix}:waiting", {ticket: now})
+        pipe.zadd(f"{self.prefix}:arrived", {ticket: now}, nx=True)
+        pipe.execute()
+
+    def dequeue(self, ticket):
+        pipe = self.client.pipeline()
+        pipe.zrem(f"{self.prefix}:waiting", ticket)
+        pipe.zrem(f"{self.prefix}:arrived", ticket)
+        pipe.execute()
+
+    def _waiting_position(self, ticket, window):
+        return self._waiting(
+            keys=[f"{self.prefix}:waiting", f"{self.prefix}:arrived"],
+            args=[time.time(), window, ticket],
+        )
+
+    def stats(self, window):
+        waiting, _ = self._waiting_position("", window)
+        return waiting, self.client.zcard(f"{self.prefix}:in_flight")
+
+    def position(self, ticket, window):
+        return self._waiting_position(ticket, window)[1]
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_redis_client():
+    """Return the raw Redis client behind Django's default cache, if any."""
+    client = getattr(cache, "_cache", None)
+    if client is not None and hasattr(client, "get_client"):
+        return client.get_client(write=True)
+    return None
+
+
+def get_state():
+    global _state
+    if _state is None:
+        with _state_lock:
+            if _state is None:
+                client = get_redis_client()
+                _state = RedisAdmission(client) if client else LocalAdmission()
+                logger.info(
+                    f"[OIDC] Login admission control using {type(_state).__name__}"
+                )
+    return _state
+
+
+def is_enabled():
+    return bool(
+        import_from_settings("OIDC_LOGIN_RATE", 0)
+        or import_from_settings("OIDC_LOGIN_MAX_CONCURRENCY", 0)
+    )
+
+
+def _call(method, *args, default):
+    """Call the admission backend, admitting users if it is unavailable."""
+    try:
+        return getattr(get_state(), method)(*args)
+    except Exception as e:
+        logger.error(f"[OIDC] Login admission control unavailable: {e}")
+        return default
+
+
+def admit_login():
+    """Take a token from the bucket to start a new login flow."""
+    rate = import_from_settings("OIDC_LOGIN_RATE", 0)
+    if not rate:
+        return True
+    burst = import_from_settings("OIDC_LOGIN_BURST", 0) or max(1, rate)
+    return _call("take_token", rate, burst, default=True)
+
+
+def acquire_exchange_slot(slot):
+    """Claim one of the limited slots for a token exchange."""
+    limit = import_from_settings("OIDC_LOGIN_MAX_CONCURRENCY", 0)
+    if not limit:
+        return True
+    timeout = import_from_settings("OIDC_LOGIN_SLOT_TIMEOUT", 60)
+    return _call("acquire_slot", slot, limit, timeout, default=True)
+
+
+def release_exchange_slot(slot):
+    if import_from_settings("OIDC_LOGIN_MAX_CONCURRENCY", 0):
+        _call("release_slot", slot, default=None)
+
+
+def leave_queue(request):
+    ticket = request.GET.get(TICKET_PARAM)
+    if ticket:
+        _call("dequeue", ticket, default=None)
+
+
+def queue_stats():
+    """
+    Return the number of waiting users and running token exchanges.
+
+    With the configured limits, for administrators only.
+    """
+    window = 3 * import_from_settings("OIDC_LOGIN_RETRY_SECONDS", 3)
+    waiting, in_flight = _call("stats", window, default=(0, 0))
+    return {
+        "enabled": is_enabled(),
+        "queue_depth": waiting,
+        "in_flight": in_flight,
+        "max_concurrency": import_from_settings("OIDC_LOGIN_MAX_CONCURRENCY", 0),
+        "rate": import_from_settings("OIDC_LOGIN_RATE", 0),
+    }
+
+
+def queue_position(ticket):
+    """
+    Return the position of the user waiting with ``ticket``, for anyone.
+
+    ``position`` is None if the ticket isn't waiting; ``retry_after`` is the
+    base delay of the wait page's retries.
+    """
+    base = import_from_settings("OIDC_LOGIN_RETRY_SECONDS", 3)
+    position = _call("position", ticket, 3 * base, default=0) if ticket else 0
+    return {"enabled": is_enabled(), "position": position or None, "retry_after": base}
+
+
+WAIT_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta http-equiv="refresh" content="{delay};url={url}">
+<meta name="robots" content="noindex">
+<title>{title}</title>
+</head>
+<body style="font-family: sans-serif; text-align: center; margin-top: 20vh">
+<h1>{title}</h1>
+<p>{message}</p>
+<p><a href="{url}">{retry}</a></p>
+</body>
+</html>
+"""
+
+
+def wait_response(request):
+    """
+    Return a page that retries the current URL after a short, jittered delay.
+
+    The retry URL carries a ticket so that waiting users can be counted.
+    """
+    ticket = request.GET.get(TICKET_PARAM) or get_random_string(16)
+    _call("enqueue", ticket, default=None)
+
+    params = request.GET.copy()
+    params[TICKET_PARAM] = ticket
+    url = f"{request.path}?{urlencode(list(params.lists()), doseq=True)}"
+
+    base = import_from_settings("OIDC_LOGIN_RETRY_SECONDS", 3)
+    delay = base + random.randint(0, base)
+
+    response = HttpResponse(
+        WAIT_PAGE.format(
+            delay=delay,
+            url=escape(url),
+            title=escape(_("Please wait a moment")),
+            message=escape(
+                _(
+                    "Many people are signing in right now. "
+                    "You will be logged in automatically in a few seconds."
+                )
+            ),
+            retry=escape(_("Try again now")),
+        ),
+        status=503,
+    )
+    response["Retry-After"] = str(delay)
+    response["Cache-Control"] = "no-store"
+    return response
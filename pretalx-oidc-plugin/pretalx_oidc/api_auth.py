@@ -0,0 +1,257 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+REST API authentication with access tokens issued by the OIDC provider.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+import requests
+from django.core.exceptions import SuspiciousOperation
+from mozilla_django_oidc.utils import import_from_settings
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from .config import current_settings
+from .jwks import jwks_cache
+from .models import OIDCUserProfile
+from .providers import DEFAULT_PROVIDER, http_session
+
+logger = logging.getLogger(__name__)
+
+# How long to trust an introspection result that carries no "exp"
+INTROSPECTION_DEFAULT_TTL = 60
+
+# Header "typ" of access tokens following RFC 9068
+ACCESS_TOKEN_TYPES = frozenset({"at+jwt", "application/at+jwt"})
+
+# Claims only ID tokens carry, for providers that don't mark the token type
+ID_TOKEN_CLAIMS = ("nonce", "at_hash", "c_hash")
+
+
+class TokenValidationCache:
+    """
+    Bounded LRU cache of validated token claims, keyed by token hash.
+
+    Entries expire together with the token (optionally capped by
+    ``OIDC_API_TOKEN_CACHE_TTL``),
+    so a token is verified against the JWKS or the introspection endpoint only
+    once per process instead of on every API call.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # token hash -> (expires_at, claims)
+
+    @staticmethod
+    def key(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token):
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, token, claims, expires_at):
+        max_ttl = import_from_settings("OIDC_API_TOKEN_CACHE_TTL", 0)
+        if max_ttl:
+            expires_at = min(expires_at, time.time() + max_ttl)
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            maxsize = import_from_settings("OIDC_API_TOKEN_CACHE_SIZE", self.maxsize)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenValidationCache()
+
+
+def _is_jwt(token):
+    if token.count(".") != 2:
+        return False
+    try:
+        jwt.get_unverified_header(token)
+    except jwt.DecodeError:
+        return False
+    return True
+
+
+def _audience(snapshot):
+    """
+    Return the ``aud`` API tokens must carry: ``api_audience``, or our client ID.
+
+    Without an audience check the API would accept tokens the provider issued
+    to any other client.
+    """
+    audience = snapshot.get("OIDC_API_AUDIENCE", None) or snapshot.get(
+        "OIDC_RP_CLIENT_ID", None
+    )
+    if not audience:
+        raise exceptions.AuthenticationFailed("No audience configured for tokens.")
+    return audience
+
+
+def _is_id_token(header, claims):
+    """Whether a signed token is an ID token rather than an access token."""
+    if str(header.get("typ", "")).lower() in ACCESS_TOKEN_TYPES:
+        return False
+    # Cognito's token_use and Keycloak's typ claim
+    kind = str(claims.get("token_use") or claims.get("typ") or "").lower()
+    if kind:
+        return kind in ("id", "id_token")
+    return any(claim in claims for claim in ID_TOKEN_CLAIMS)
+
+
+def _verify_jwt(token):
+    """Verify a JWT access token locally against the cached JWKS."""
+    # Endpoints and issuer from the snapshot, which knows all deployments
+    snapshot = current_settings()
+    header = jwt.get_unverified_header(token)
+    algorithm = snapshot.get("OIDC_RP_SIGN_ALGO", "RS256")
+    if header.get("alg") != algorithm:
+        raise exceptions.AuthenticationFailed("Unexpected token algorithm.")
+
+    key = snapshot.call(
+        "OIDC_OP_JWKS_ENDPOINT",
+        lambda url: jwks_cache.get_signing_key(
+            token, url, verify_kid=snapshot.get("OIDC_VERIFY_KID", True)
+        ),
+        failover=True,
+    )
+
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=_audience(snapshot),
+        issuer=snapshot.get("OIDC_OP_ISSUER", None),
+        options={"require": ["exp", "sub", "aud"]},
+    )
+    # ID tokens of our own logins carry our client ID as audience as well
+    if _is_id_token(header, claims):
+        raise jwt.InvalidTokenError("ID tokens are not access tokens")
+    return claims
+
+
+def _introspect(token):
+    """Validate an opaque access token with the RFC 7662 introspection endpoint."""
+    snapshot = current_settings()
+    if not snapshot.get("OIDC_OP_INTROSPECTION_ENDPOINT", None):
+        raise exceptions.AuthenticationFailed("Invalid token.")
+
+    response = snapshot.call(
+        "OIDC_OP_INTROSPECTION_ENDPOINT",
+        lambda url: http_session().post(
+            url,
+            data={"token": token, "token_type_hint": "access_token"},
+            auth=(
+                snapshot.get("OIDC_RP_CLIENT_ID"),
+                snapshot.get("OIDC_RP_CLIENT_SECRET"),
+            ),
+            verify=snapshot.get("OIDC_VERIFY_SSL", True),
+            timeout=snapshot.get("OIDC_TIMEOUT", None),
+            proxies=snapshot.get("OIDC_PROXY", None),
+        ),
+        # Looking up a token changes nothing at the provider
+        failover=True,
+    )
+    response.raise_for_status()
+    claims = response.json()
+
+    if not claims.get("active") or not claims.get("sub"):
+        raise exceptions.AuthenticationFailed("Token inactive or expired.")
+
+    token_audience = claims.get("aud", [])
+    if isinstance(token_audience, str):
+        token_audience = [token_audience]
+    if _audience(snapshot) not in token_audience:
+        raise exceptions.AuthenticationFailed("Invalid token audience.")
+    if str(claims.get("token_use", "access")).lower() != "access":
+        raise exceptions.AuthenticationFailed("Not an access token.")
+
+    claims.setdefault("exp", time.time() + INTROSPECTION_DEFAULT_TTL)
+    return claims
+
+
+def validate_access_token(token):
+    """Return the claims of a valid access token, using the validation cache."""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    try:
+        claims = _verify_jwt(token) if _is_jwt(token) else _introspect(token)
+    except (jwt.InvalidTokenError, SuspiciousOperation) as e:
+        logger.info(f"[OIDC API] Rejected access token: {e}")
+        raise exceptions.AuthenticationFailed("Invalid token.")
+    except requests.RequestException as e:
+        logger.error(f"[OIDC API] Could not validate access token: {e}")
+        raise exceptions.AuthenticationFailed("Could not validate token.")
+
+    token_cache.set(token, claims, claims["exp"])
+    return claims
+
+
+class OIDCBearerAuthentication(BaseAuthentication):
+    """
+    Authenticate API requests with an ``Authorization: Bearer <token>`` header.
+
+    The token's ``sub`` is mapped to a pretalx user through the
+    ``OIDCUserProfile`` of the [oidc] provider. No API token object is
+    returned, so pretalx applies the user's own permissions.
+    """
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        # Always installed, see config.install_request_hooks
+        if not current_settings().get("OIDC_API_BEARER_AUTH", False):
+            return None
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid bearer token header.")
+
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid bearer token header.")
+
+        claims = validate_access_token(token)
+        return self.get_user(claims), None
+
+    def get_user(self, claims):
+        try:
+            profile = OIDCUserProfile.objects.select_related("user").get(
+                provider=DEFAULT_PROVIDER, oidc_id=claims["sub"]
+            )
+        except OIDCUserProfile.DoesNotExist:
+            raise exceptions.AuthenticationFailed("No user for this token.")
+
+        if not profile.user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        return profile.user
+
+    def authenticate_header(self, request):
+        return f'{self.keyword} realm="api"'
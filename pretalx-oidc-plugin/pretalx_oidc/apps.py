@@ -25,6 +25,7 @@ class PretalxOIDCPlugin(AppConfig):
             print("[OIDC APPS.PY] ready() is being called!")
             print("=" * 80)
             from .config import configure_oidc_settings
+            from .sessions import index_session  # noqa: F401
             from .signals import add_oidc_login_button  # noqa: F401
 
             print("[OIDC APPS.PY] Imported signals!")
@@ -32,6 +33,17 @@ class PretalxOIDCPlugin(AppConfig):
             # Configure OIDC settings from pretalx.cfg
             configure_oidc_settings()
 
+            # Reload them when oidc_reload is run
+            from django.core.signals import request_started
+
+            from .health import start_monitor
+            from .reload import mark_loaded, start_listener
+
+            mark_loaded()
+            request_started.connect(start_listener)
+            # Background checks behind /oidc/readyz
+            request_started.connect(start_monitor)
+
             print("[OIDC APPS.PY] Done with ready()!")
         except Exception as e:
             print(f"[OIDC] ERROR in ready(): {e}")
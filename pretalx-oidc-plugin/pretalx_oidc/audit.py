@@ -0,0 +1,178 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Audit trail of OIDC logins.
+
+By default logins are recorded in the plugin's own ``OIDCLoginEvent`` table
+rather than in pretalx's shared activity log. Events are buffered per process
+and written with one ``bulk_create`` when the batch is full or the flush
+interval has passed, so a login storm doesn't turn into an insert per login.
+
+Events older than ``login_audit_keep_days`` are rolled up into daily counts
+from pretalx's periodic task, at most once per ``ROLLUP_INTERVAL`` across all
+workers, or by hand with the ``oidc_rollup_logins`` management command.
+"""
+
+import atexit
+import datetime as dt
+import logging
+import os
+import threading
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, F, Max
+from django.db.models.functions import TruncDate
+from django.utils.timezone import now
+from mozilla_django_oidc.utils import import_from_settings
+
+logger = logging.getLogger(__name__)
+
+AUDIT_PLUGIN = "plugin"
+AUDIT_ACTIVITY_LOG = "activity_log"
+AUDIT_NONE = "none"
+
+
+class LoginEventBuffer:
+    """Collects login events in memory and writes them in batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._timer = None
+
+    def add(self, event):
+        batch_size = import_from_settings("OIDC_LOGIN_AUDIT_BATCH_SIZE", 50)
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(
+                    import_from_settings("OIDC_LOGIN_AUDIT_FLUSH_SECONDS", 10),
+                    self._flush_in_background,
+                )
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered events; returns the number of events written."""
+        from .models import OIDCLoginEvent
+
+        with self._lock:
+            events, self._events = self._events, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not events:
+            return 0
+
+        try:
+            OIDCLoginEvent.objects.bulk_create(events)
+        except DatabaseError as e:
+            logger.error(f"[OIDC] Could not write {len(events)} login events: {e}")
+            return 0
+        return len(events)
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread has its own database connection
+            connection.close()
+
+
+login_events = LoginEventBuffer()
+atexit.register(login_events.flush)
+
+
+def record_login(user, provider):
+    """Record a successful OIDC login in the configured audit trail."""
+    mode = import_from_settings("OIDC_LOGIN_AUDIT", AUDIT_PLUGIN)
+    if mode == AUDIT_PLUGIN:
+        from .models import OIDCLoginEvent
+
+        login_events.add(
+            OIDCLoginEvent(user_id=user.pk, timestamp=now(), provider=provider)
+        )
+    elif mode == AUDIT_ACTIVITY_LOG:
+        user.log_action("pretalx.user.oidc.login", data={"provider": provider})
+
+
+# Seconds between automatic roll-ups; the cache key doubles as their lock
+ROLLUP_INTERVAL = 3600
+ROLLUP_CACHE_KEY = "pretalx_oidc_rollup_logins"
+
+
+def roll_up_events(cutoff):
+    """Fold login events before ``cutoff`` into daily counts; returns their number."""
+    from .models import OIDCLoginDailyCount, OIDCLoginEvent
+
+    events = OIDCLoginEvent.objects.filter(timestamp__lt=cutoff)
+    last_id = events.aggregate(last_id=Max("id"))["last_id"]
+    if last_id is None:
+        return 0
+    # Events buffered by running workers may still arrive below the cutoff
+    events = events.filter(id__lte=last_id)
+
+    with transaction.atomic():
+        daily = (
+            events.annotate(date=TruncDate("timestamp"))
+            .values("user_id", "date", "provider")
+            .annotate(logins=Count("id"))
+            .order_by()
+        )
+        for row in daily.iterator():
+            updated = OIDCLoginDailyCount.objects.filter(
+                user_id=row["user_id"], date=row["date"], provider=row["provider"]
+            ).update(count=F("count") + row["logins"])
+            if not updated:
+                OIDCLoginDailyCount.objects.create(
+                    user_id=row["user_id"],
+                    date=row["date"],
+                    provider=row["provider"],
+                    count=row["logins"],
+                )
+        deleted, _ = events.delete()
+    return deleted
+
+
+def prune_counts(oldest):
+    """Delete daily counts before the date ``oldest``; returns their number."""
+    from .models import OIDCLoginDailyCount
+
+    pruned, _ = OIDCLoginDailyCount.objects.filter(date__lt=oldest).delete()
+    return pruned
+
+
+def roll_up_logins():
+    """
+    Roll up and prune login events, called from pretalx's periodic task.
+
+    ``cache.add`` succeeds for one worker per ``ROLLUP_INTERVAL``, so with a
+    cache shared by all workers, like pretalx's Redis cache, only one of them
+    runs it, however often and wherever the periodic task runs.
+    """
+    if import_from_settings("OIDC_LOGIN_AUDIT", AUDIT_PLUGIN) != AUDIT_PLUGIN:
+        return
+    if not cache.add(ROLLUP_CACHE_KEY, os.getpid(), timeout=ROLLUP_INTERVAL):
+        return
+
+    today = now().replace(hour=0, minute=0, second=0, microsecond=0)
+    keep_days = import_from_settings("OIDC_LOGIN_AUDIT_KEEP_DAYS", 7)
+    retention_days = import_from_settings("OIDC_LOGIN_AUDIT_RETENTION_DAYS", 365)
+    try:
+        rolled_up = roll_up_events(today - dt.timedelta(days=keep_days))
+        pruned = 0
+        if retention_days:
+            pruned = prune_counts((today - dt.timedelta(days=retention_days)).date())
+    except Exception:
+        # Try again on the next periodic task instead of after the interval
+        cache.delete(ROLLUP_CACHE_KEY)
+        raise
+    if rolled_up or pruned:
+        logger.info(
+            f"[OIDC] Rolled up {rolled_up} login events, pruned {pruned} daily counts"
+        )
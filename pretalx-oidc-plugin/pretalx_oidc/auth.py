@@ -2,40 +2,139 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import logging
+import operator
+from functools import reduce
 
-from django.conf import settings
+import jwt
+import requests
+from django.core.exceptions import SuspiciousOperation
+from django.db.models import Q
 from django.urls import reverse
 from mozilla_django_oidc.auth import OIDCAuthenticationBackend
 from mozilla_django_oidc.utils import absolutify
 from pretalx.person.models import User
-
-from .models import OIDCUserProfile
+from requests.auth import HTTPBasicAuth
+
+from .audit import record_login
+from .authlog import annotate, login_record, redact
+from .config import SnapshotSetting, current_provider, current_settings
+from .jwks import jwks_cache
+from .models import OIDCTeamGrant, OIDCUserProfile
+from .providers import (
+    DEFAULT_PROVIDER,
+    PROVIDER_SESSION_KEY,
+    http_session,
+    provider_name,
+    registry,
+)
+from .routers import has_replica, is_pinned, pin_to_primary, replica_reads
+from .sessions import end_user_sessions, remember_sid
+from .state import get_callback_url
 
 logger = logging.getLogger(__name__)
 
-logger.warning("[OIDC Auth] auth.py module loaded - PretalxOIDCBackend class defined")
-
 
 class PretalxOIDCBackend(OIDCAuthenticationBackend):
-    """Custom OIDC authentication backend for pretalx."""
+    """
+    Custom OIDC authentication backend for pretalx.
+
+    Django creates a backend for every authenticate() call, so nothing is read
+    when it is created: the settings mozilla-django-oidc copies onto the
+    instance are properties of the current snapshot, and the request is passed
+    along instead of being stored. One instance can serve concurrent requests.
+
+    The snapshot is the one of the provider in use (see providers.py), and
+    OIDC profiles are looked up and created for that provider only.
+    """
+
+    UserModel = User
+
+    OIDC_OP_TOKEN_ENDPOINT = SnapshotSetting()
+    OIDC_OP_USER_ENDPOINT = SnapshotSetting()
+    OIDC_OP_JWKS_ENDPOINT = SnapshotSetting(None)
+    OIDC_RP_CLIENT_ID = SnapshotSetting()
+    OIDC_RP_CLIENT_SECRET = SnapshotSetting()
+    OIDC_RP_SIGN_ALGO = SnapshotSetting("HS256")
+    OIDC_RP_IDP_SIGN_KEY = SnapshotSetting(None)
 
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        logger.warning("[OIDC Auth] PretalxOIDCBackend instance created")
+        # Skip mozilla-django-oidc's __init__, which reads the settings
+        pass
 
-    def _is_admin_user(self, claims):
-        """Check if user should have admin privileges based on claims."""
-        from pretalx.common.settings.config import build_config
+    @staticmethod
+    def get_settings(attr, *args):
+        """Read settings from the current snapshot, which oidc_reload swaps."""
+        return current_settings().get(attr, *args)
 
-        config, _ = build_config()
+    def get_token(self, payload):
+        """
+        Exchange a code or refresh token over the provider's pooled connections.
 
-        # Get admin users from config (comma-separated list)
-        admin_users_str = config.get("oidc", "admin_users", fallback="")
-        if not admin_users_str:
-            return False, False  # is_admin, is_superuser
+        Without failover: the provider may have redeemed the code or rotated
+        the refresh token before the request failed.
+        """
+        auth = None
+        if self.get_settings("OIDC_TOKEN_USE_BASIC_AUTH", False):
+            auth = HTTPBasicAuth(payload["client_id"], payload.pop("client_secret"))
+
+        response = current_settings().call(
+            "OIDC_OP_TOKEN_ENDPOINT",
+            lambda url: http_session().post(
+                url,
+                data=payload,
+                auth=auth,
+                verify=self.get_settings("OIDC_VERIFY_SSL", True),
+                timeout=self.get_settings("OIDC_TIMEOUT", None),
+                proxies=self.get_settings("OIDC_PROXY", None),
+            ),
+        )
+        self.raise_token_response_error(response)
+        return response.json()
+
+    def get_userinfo(self, access_token, id_token, payload):
+        """Fetch the user's claims over the provider's pooled connections."""
+        response = current_settings().call(
+            "OIDC_OP_USER_ENDPOINT",
+            lambda url: http_session().get(
+                url,
+                headers={"Authorization": f"Bearer {access_token}"},
+                verify=self.get_settings("OIDC_VERIFY_SSL", True),
+                timeout=self.get_settings("OIDC_TIMEOUT", None),
+                proxies=self.get_settings("OIDC_PROXY", None),
+            ),
+            failover=True,
+        )
+        response.raise_for_status()
+
+        content_type = response.headers.get("content-type", "").lower()
+        if content_type.startswith("application/jwt"):
+            # Claims signed like an ID token
+            return self.verify_token(response.text)
+        return response.json()
+
+    def verify_claims(self, claims):
+        """Require an email claim if the email scope was requested."""
+        # Without mozilla-django-oidc's warning about custom scopes on every login
+        scopes = self.get_settings("OIDC_RP_SCOPES", "openid email")
+        if "email" in scopes.split():
+            return "email" in claims
+        return True
+
+    def retrieve_matching_jwk(self, token):
+        """Get the signing key from the cached JWKS instead of fetching it per login."""
+        return current_settings().call(
+            "OIDC_OP_JWKS_ENDPOINT",
+            lambda url: jwks_cache.get_signing_key(
+                token, url, verify_kid=self.get_settings("OIDC_VERIFY_KID", True)
+            ),
+            failover=True,
+        )
 
-        # Parse comma-separated list and strip whitespace
-        admin_identifiers = [x.strip() for x in admin_users_str.split(",") if x.strip()]
+    def _is_admin_user(self, claims):
+        """Check if user should have admin privileges based on claims."""
+        admin_identifiers = current_settings().admin_users
+        if not admin_identifiers:
+            return False, False  # is_admin, is_superuser
 
         # Check if user's sub or email matches any admin identifier
         oidc_sub = claims.get("sub", "")
@@ -44,28 +143,16 @@ class PretalxOIDCBackend(OIDCAuthenticationBackend):
         is_admin = oidc_sub in admin_identifiers or email in admin_identifiers
 
         if is_admin:
-            logger.warning(
-                f"[OIDC Auth] User matches admin identifier: sub={oidc_sub}, email={email}"
-            )
+            logger.debug("[OIDC Auth] User matches admin identifier: sub=%s", oidc_sub)
 
         return is_admin, False  # Regular admin, not superuser
 
     def _is_superuser(self, claims):
         """Check if user should have superuser privileges based on claims."""
-        from pretalx.common.settings.config import build_config
-
-        config, _ = build_config()
-
-        # Get superuser users from config (comma-separated list)
-        superuser_str = config.get("oidc", "superuser", fallback="")
-        if not superuser_str:
+        superuser_identifiers = current_settings().superusers
+        if not superuser_identifiers:
             return False
 
-        # Parse comma-separated list and strip whitespace
-        superuser_identifiers = [
-            x.strip() for x in superuser_str.split(",") if x.strip()
-        ]
-
         # Check if user's sub or email matches any superuser identifier
         oidc_sub = claims.get("sub", "")
         email = claims.get("email", "")
@@ -75,8 +162,8 @@ class PretalxOIDCBackend(OIDCAuthenticationBackend):
         )
 
         if is_superuser:
-            logger.warning(
-                f"[OIDC Auth] User matches superuser identifier: sub={oidc_sub}, email={email}"
+            logger.debug(
+                "[OIDC Auth] User matches superuser identifier: sub=%s", oidc_sub
             )
 
         return is_superuser
@@ -90,8 +177,10 @@ class PretalxOIDCBackend(OIDCAuthenticationBackend):
         if is_superuser:
             is_admin = True
 
+        annotate(admin=is_admin, superuser=is_superuser)
         return is_admin, is_superuser
 
+    @replica_reads()
     def _sync_user_privileges_and_teams(
         self, user, should_be_admin, should_be_superuser
     ):
@@ -99,38 +188,110 @@ class PretalxOIDCBackend(OIDCAuthenticationBackend):
         Synchronize user privileges and team memberships with current config.
         This method ensures that:
         1. User Django flags (is_staff, is_superuser) are correctly set
-        2. User is added to/removed from admin teams as needed
+        2. User is added to/removed from the admin teams of the provider's
+           organisers as needed
+        3. Sessions of a demoted user are ended, so they can't keep using
+           the privileges they lost
         """
-        logger.info(
-            f"[OIDC Auth] Syncing privileges for {user.email}: admin={should_be_admin}, superuser={should_be_superuser}"
+        logger.debug(
+            "[OIDC Auth] Syncing privileges for user %s: admin=%s, superuser=%s",
+            user.pk,
+            should_be_admin,
+            should_be_superuser,
+        )
+
+        # Django flags are instance-wide, so only the [oidc] provider sets them
+        demoted = False
+        if current_provider() is None:
+            demoted = self._sync_user_flags(user, should_be_admin, should_be_superuser)
+
+        # Admins join the admin teams of the provider's organisers. Only
+        # memberships this provider added are removed again, so memberships
+        # granted in pretalx or by other providers stay.
+        provider = provider_name()
+        teams = self._admin_teams() if should_be_admin else []
+        for team in teams:
+            if not team.members.filter(pk=user.pk).exists():
+                team.members.add(user)
+                OIDCTeamGrant.objects.get_or_create(
+                    user=user, team=team, defaults={"provider": provider}
+                )
+                logger.warning(
+                    "[OIDC Auth] Added user %s to admin team: %s",
+                    user.pk,
+                    team.name,
+                )
+
+        revoked = (
+            OIDCTeamGrant.objects.filter(user=user, provider=provider)
+            .exclude(team__in=teams)
+            .select_related("team")
+        )
+        for grant in revoked:
+            logger.warning(
+                "[OIDC Auth] Removing user %s from admin team: %s",
+                user.pk,
+                grant.team.name,
+            )
+            grant.team.members.remove(user)
+            grant.delete()
+            demoted = True
+
+        if demoted:
+            # The session of this login is indexed after it, so only the
+            # existing sessions end
+            end_user_sessions(user)
+
+        logger.debug(
+            "[OIDC Auth] User %s sync complete: staff=%s, superuser=%s, "
+            "admin_teams=%s",
+            user.pk,
+            user.is_staff,
+            user.is_superuser,
+            len(teams),
         )
 
-        # Update Django user flags
+    def _sync_user_flags(self, user, should_be_admin, should_be_superuser):
+        """Set is_staff and is_superuser; return whether the user lost one."""
         user_updated = False
+        demoted = (user.is_staff and not should_be_admin) or (
+            user.is_superuser and not should_be_superuser
+        )
         if user.is_staff != should_be_admin:
             logger.warning(
-                f"[OIDC Auth] Updating is_staff: {user.is_staff} → {should_be_admin}"
+                "[OIDC Auth] Updating is_staff of user %s: %s → %s",
+                user.pk,
+                user.is_staff,
+                should_be_admin,
             )
             user.is_staff = should_be_admin
             user_updated = True
 
         if user.is_superuser != should_be_superuser:
             logger.warning(
-                f"[OIDC Auth] Updating is_superuser: {user.is_superuser} → {should_be_superuser}"
+                "[OIDC Auth] Updating is_superuser of user %s: %s → %s",
+                user.pk,
+                user.is_superuser,
+                should_be_superuser,
             )
             user.is_superuser = should_be_superuser
             user_updated = True
 
         if user_updated:
             user.save(update_fields=["is_staff", "is_superuser"])
+        return demoted
 
-        # Handle team memberships for admin users
-        from pretalx.event.models import Organiser, Team
+    def _admin_teams(self):
+        """
+        Return the admin teams of the provider's organisers, creating them.
 
-        if should_be_admin:
-            # User should be admin - ensure organiser and admin teams exist
+        For [oidc] that is the default organiser, created if needed; for a
+        tenant provider the existing organisers of its ``organisers`` option.
+        """
+        from pretalx.event.models import Organiser, Team
 
-            # Get or create default organiser
+        provider = current_provider()
+        if provider is None:
             organiser, created = Organiser.objects.get_or_create(
                 slug="default-org",
                 defaults={
@@ -138,11 +299,20 @@ class PretalxOIDCBackend(OIDCAuthenticationBackend):
                 },
             )
             if created:
-                logger.warning(
-                    f"[OIDC Auth] Created default organiser: {organiser.name}"
-                )
+                logger.info("[OIDC Auth] Created default organiser: %s", organiser.name)
+            organisers = [organiser]
+        else:
+            config = registry.get_config(provider.name)
+            slugs = config.organisers if config is not None else ()
+            if not slugs:
+                return []
+            # Slugs are matched without case, like the organiser routes
+            organisers = Organiser.objects.filter(
+                reduce(operator.or_, (Q(slug__iexact=slug) for slug in slugs))
+            )
 
-            # Get or create admin team for this organiser
+        teams = []
+        for organiser in organisers:
             admin_team, team_created = Team.objects.get_or_create(
                 organiser=organiser,
                 name="Admin Team",
@@ -155,46 +325,18 @@ class PretalxOIDCBackend(OIDCAuthenticationBackend):
                 },
             )
             if team_created:
-                logger.warning(f"[OIDC Auth] Created admin team: {admin_team.name}")
-
-            # Add user to admin team if not already a member
-            if not admin_team.members.filter(pk=user.pk).exists():
-                admin_team.members.add(user)
-                logger.warning(
-                    f"[OIDC Auth] Added {user.email} to admin team: {admin_team.name}"
+                logger.info(
+                    "[OIDC Auth] Created admin team of %s: %s",
+                    organiser.slug,
+                    admin_team.name,
                 )
-
-        else:
-            # User should NOT be admin - remove from ALL admin teams
-            admin_teams = Team.objects.filter(
-                can_create_events=True,
-                can_change_teams=True,
-                can_change_organiser_settings=True,
-            )
-            current_admin_teams = admin_teams.filter(members=user)
-            for team in current_admin_teams:
-                logger.warning(
-                    f"[OIDC Auth] Removing {user.email} from admin team: {team.name}"
-                )
-                team.members.remove(user)
-
-        # Log final state
-        admin_teams = Team.objects.filter(
-            can_create_events=True,
-            can_change_teams=True,
-            can_change_organiser_settings=True,
-        )
-        final_admin_teams = admin_teams.filter(members=user).count()
-        logger.info(
-            (
-                f"[OIDC Auth] User {user.email} sync complete: staff={user.is_staff}, "
-                f"superuser={user.is_superuser}, admin_teams={final_admin_teams}"
-            )
-        )
+            teams.append(admin_team)
+        return teams
 
     def create_user(self, claims):
         """Create a new user from OIDC claims."""
-        logger.warning(f"[OIDC Auth] create_user() called with claims: {claims}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[OIDC Auth] create_user() claims: %s", redact(claims))
 
         email = claims.get("email")
         if not email:
@@ -213,41 +355,34 @@ class PretalxOIDCBackend(OIDCAuthenticationBackend):
         # Sync privileges and team memberships
         self._sync_user_privileges_and_teams(user, is_admin, is_superuser)
 
-        logger.warning(
-            (
-                f"[OIDC Auth] Created user: {user.email} "
-                f"(id={user.pk}, admin={is_admin}, superuser={is_superuser})"
-            )
-        )
+        annotate(created=True, user_id=user.pk)
 
         # Store OIDC ID
         try:
             OIDCUserProfile.objects.create(
                 user=user,
                 oidc_id=claims.get("sub"),
-                provider=getattr(settings, "OIDC_PROVIDER_NAME", "oidc"),
-            )
-            logger.warning(
-                f"[OIDC Auth] Created OIDC profile for user {user.email} with sub={claims.get('sub')}"
+                provider=provider_name(),
+                email=user.email,
             )
         except Exception as e:
             logger.error(
-                f"[OIDC Auth] Failed to create OIDC profile for user {user.email}: {e}"
+                "[OIDC Auth] Failed to create OIDC profile for user %s: %s", user.pk, e
             )
             # Check if profile already exists and update it
             try:
                 existing_profile = user.oidc_profile
                 existing_profile.oidc_id = claims.get("sub")
-                existing_profile.provider = getattr(
-                    settings, "OIDC_PROVIDER_NAME", "oidc"
-                )
+                existing_profile.provider = provider_name()
+                existing_profile.email = user.email
                 existing_profile.save()
-                logger.warning(
-                    f"[OIDC Auth] Updated existing OIDC profile for user {user.email}"
+                logger.info(
+                    "[OIDC Auth] Updated existing OIDC profile for user %s", user.pk
                 )
             except OIDCUserProfile.DoesNotExist:
                 logger.error(
-                    f"[OIDC Auth] Could not create or update OIDC profile for user {user.email}"
+                    "[OIDC Auth] Could not create or update OIDC profile for user %s",
+                    user.pk,
                 )
                 # This is a critical error - user was created but profile couldn't be linked
                 raise
@@ -256,14 +391,15 @@ class PretalxOIDCBackend(OIDCAuthenticationBackend):
 
     def update_user(self, user, claims):
         """Update existing user from OIDC claims."""
-        logger.info(f"[OIDC Auth] Updating user {user.email} from claims: {claims}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "[OIDC Auth] Updating user %s from claims: %s", user.pk, redact(claims)
+            )
 
         # Update name if provided
         name = claims.get("name", "") or claims.get("preferred_username", "")
         if name and name != user.name:
-            logger.info(
-                f"[OIDC Auth] Updating user name from '{user.name}' to '{name}'"
-            )
+            logger.debug("[OIDC Auth] Updating name of user %s", user.pk)
             user.name = name
             user.save(update_fields=["name"])
 
@@ -272,106 +408,150 @@ class PretalxOIDCBackend(OIDCAuthenticationBackend):
         is_admin, is_superuser = self._get_user_privileges(claims)
         self._sync_user_privileges_and_teams(user, is_admin, is_superuser)
 
-        logger.warning(
-            f"[OIDC Auth] Updated user {user.email}: admin={is_admin}, superuser={is_superuser}"
-        )
-
+        annotate(user_id=user.pk)
         return user
 
+    @staticmethod
+    def _check_email_link(user, email, provider):
+        """
+        Refuse to link an account to a tenant provider that just asserts its email.
+
+        The [oidc] provider links existing accounts by email. A tenant provider
+        only links addresses of its own ``email_domains``, and never accounts
+        of privileged users or of users who can log in with a password, which
+        it could otherwise take over.
+        """
+        if provider == DEFAULT_PROVIDER:
+            return
+        config = registry.get_config(provider)
+        domain = email.rsplit("@", 1)[-1].strip().lower()
+        if config is None or domain not in config.email_domains:
+            raise SuspiciousOperation(
+                f"Provider {provider} can't link user {user.pk}: "
+                f"{domain} is not one of its email domains"
+            )
+        if user.is_staff or user.is_superuser or user.is_administrator:
+            raise SuspiciousOperation(
+                f"Provider {provider} can't link privileged user {user.pk}"
+            )
+        if user.has_usable_password():
+            raise SuspiciousOperation(
+                f"Provider {provider} can't link user {user.pk}, who has a password"
+            )
+
+    @replica_reads()
     def filter_users_by_claims(self, claims):
         """Return users matching the OIDC claims."""
         oidc_id = claims.get("sub")
-        logger.info(
-            f"[OIDC Auth] Filtering users by claims. sub={oidc_id}, email={claims.get('email')}"
-        )
+        logger.debug("[OIDC Auth] Filtering users by claims. sub=%s", oidc_id)
 
         if not oidc_id:
             logger.error("[OIDC Auth] No 'sub' claim found")
             return User.objects.none()
 
-        # Try to find user by OIDC ID
+        # Try to find user by OIDC ID; subs are only unique per provider
+        provider = provider_name()
         try:
             profile = OIDCUserProfile.objects.select_related("user").get(
-                oidc_id=oidc_id
+                provider=provider, oidc_id=oidc_id
             )
-            logger.info(
-                f"[OIDC Auth] Found existing user by OIDC ID: {profile.user.email}"
+            logger.debug(
+                "[OIDC Auth] Found existing user %s by OIDC ID", profile.user.pk
             )
             return User.objects.filter(pk=profile.user.pk)
         except OIDCUserProfile.DoesNotExist:
-            logger.info(f"[OIDC Auth] No existing OIDC profile found for sub={oidc_id}")
+            logger.debug(
+                "[OIDC Auth] No existing OIDC profile found for sub=%s", oidc_id
+            )
 
             # Try to find by email and link the account
             email = claims.get("email")
-            if email:
-                users = User.objects.filter(email__iexact=email)
-                if users.exists():
-                    # Link existing account to OIDC
-                    user = users.first()
+            user = User.objects.filter(email__iexact=email).first() if email else None
+            if user is not None:
+                logger.info("[OIDC Auth] Linking existing user %s to OIDC", user.pk)
+                annotate(linked=True)
+
+                # Check if user already has an OIDC profile
+                try:
+                    existing_profile = user.oidc_profile
+                    if existing_profile.provider != provider:
+                        # Another organiser's provider must not take over
+                        # the account by asserting the same email
+                        raise SuspiciousOperation(
+                            f"User {user.pk} belongs to provider "
+                            f"{existing_profile.provider}, not {provider}"
+                        )
+                    # Update existing profile with new OIDC ID
+                    logger.info(
+                        "[OIDC Auth] Updating existing OIDC profile for user %s: "
+                        "%s → %s",
+                        user.pk,
+                        existing_profile.oidc_id,
+                        oidc_id,
+                    )
+                    existing_profile.oidc_id = oidc_id
+                    existing_profile.email = user.email
+                    existing_profile.save()
+                except OIDCUserProfile.DoesNotExist:
+                    self._check_email_link(user, email, provider)
+                    # Create new profile for user
                     logger.info(
-                        f"[OIDC Auth] Linking existing user {user.email} to OIDC"
+                        "[OIDC Auth] Creating new OIDC profile for user %s", user.pk
                     )
+                    OIDCUserProfile.objects.create(
+                        user=user,
+                        oidc_id=oidc_id,
+                        provider=provider,
+                        email=user.email,
+                    )
+                return User.objects.filter(pk=user.pk)
 
-                    # Check if user already has an OIDC profile
-                    try:
-                        existing_profile = user.oidc_profile
-                        # Update existing profile with new OIDC ID
-                        logger.info(
-                            (
-                                f"[OIDC Auth] Updating existing OIDC profile for "
-                                f"{user.email}: {existing_profile.oidc_id} → {oidc_id}"
-                            )
-                        )
-                        existing_profile.oidc_id = oidc_id
-                        existing_profile.provider = getattr(
-                            settings, "OIDC_PROVIDER_NAME", "oidc"
-                        )
-                        existing_profile.save()
-                    except OIDCUserProfile.DoesNotExist:
-                        # Create new profile for user
-                        logger.info(
-                            f"[OIDC Auth] Creating new OIDC profile for {user.email}"
-                        )
-                        OIDCUserProfile.objects.create(
-                            user=user,
-                            oidc_id=oidc_id,
-                            provider=getattr(settings, "OIDC_PROVIDER_NAME", "oidc"),
-                        )
-                    return User.objects.filter(pk=user.pk)
+            if has_replica() and not is_pinned():
+                # The replica may lag behind the primary; confirm the miss
+                # there before a new user gets created
+                pin_to_primary()
+                return self.filter_users_by_claims(claims)
 
-            logger.info("[OIDC Auth] No existing user found, will create new user")
+            logger.debug("[OIDC Auth] No existing user found, will create new user")
             return User.objects.none()
 
     def authenticate(self, request, **kwargs):
         """Override to handle pretalx-specific authentication and HTTPS redirect URI enforcement."""
-        logger.info(f"[OIDC Auth] authenticate() called with kwargs: {kwargs.keys()}")
-
-        # First, store the original request
-        self.request = request
-        if not self.request:
+        if not request:
             return None
 
-        state = self.request.GET.get("state")
-        code = self.request.GET.get("code")
+        state = request.GET.get("state")
+        code = request.GET.get("code")
         nonce = kwargs.pop("nonce", None)
         code_verifier = kwargs.pop("code_verifier", None)
 
         if not code or not state:
             return None
 
-        # Get the reverse URL for callback
-        reverse_url = self.get_settings(
-            "OIDC_AUTHENTICATION_CALLBACK_URL", "oidc_authentication_callback"
-        )
+        with login_record(provider=provider_name()):
+            return self._authenticate_code(request, code, nonce, code_verifier)
+
+    def _authenticate_code(self, request, code, nonce, code_verifier):
+        """Exchange the authorization code and log in the user it belongs to."""
+        if self.get_settings("OIDC_STATELESS_STATE", False):
+            # Must match the precomputed URI sent when the login started
+            redirect_uri = get_callback_url()
+        else:
+            # Get the reverse URL for callback
+            reverse_url = self.get_settings(
+                "OIDC_AUTHENTICATION_CALLBACK_URL", "oidc_authentication_callback"
+            )
 
-        # Generate redirect URI
-        redirect_uri = absolutify(self.request, reverse(reverse_url))
+            # Generate redirect URI
+            redirect_uri = absolutify(request, reverse(reverse_url))
 
-        # Check if HTTPS redirect enforcement is enabled and fix the redirect URI
-        force_https = getattr(settings, "OIDC_FORCE_HTTPS_REDIRECT", False)
-        if force_https and redirect_uri.startswith("http://"):
-            redirect_uri = redirect_uri.replace("http://", "https://", 1)
-            logger.info("[OIDC Auth] Enforced HTTPS redirect URI for token exchange")
+            # Check if HTTPS redirect enforcement is enabled and fix the redirect URI
+            force_https = self.get_settings("OIDC_FORCE_HTTPS_REDIRECT", False)
+            if force_https and redirect_uri.startswith("http://"):
+                redirect_uri = redirect_uri.replace("http://", "https://", 1)
+                logger.debug(
+                    "[OIDC Auth] Enforced HTTPS redirect URI for token exchange"
+                )
 
         # Build token payload with corrected redirect URI
         token_payload = {
@@ -395,37 +575,110 @@ class PretalxOIDCBackend(OIDCAuthenticationBackend):
         payload = self.verify_token(id_token, nonce=nonce)
 
         if payload:
-            self.store_tokens(access_token, id_token)
+            self.store_tokens(
+                request.session,
+                access_token,
+                id_token,
+                token_info.get("refresh_token"),
+            )
+            remember_sid(request.session, payload)
+            if current_provider() is not None:
+                # For token renewal and logout of this session
+                request.session[PROVIDER_SESSION_KEY] = provider_name()
+            else:
+                request.session.pop(PROVIDER_SESSION_KEY, None)
             try:
                 user = self.get_or_create_user(access_token, id_token, payload)
 
                 if user:
-                    logger.warning(
-                        f"[OIDC Auth] Authentication successful for user: {user.email}"
-                    )
-                    logger.warning(f"[OIDC Auth]   - user.pk = {user.pk}")
-                    logger.warning(f"[OIDC Auth]   - user.is_active = {user.is_active}")
-                    logger.warning(
-                        f"[OIDC Auth]   - user.is_authenticated = {user.is_authenticated}"
-                    )
-                    if request:
-                        # Log the authentication
-                        user.log_action(
-                            "pretalx.user.oidc.login",
-                            data={
-                                "provider": getattr(
-                                    settings, "OIDC_PROVIDER_NAME", "oidc"
-                                )
-                            },
-                        )
+                    annotate(outcome="success", user_id=user.pk, active=user.is_active)
+                    # Log the authentication
+                    record_login(user, provider_name())
                 else:
-                    logger.warning(
-                        "[OIDC Auth] Authentication failed - no user returned"
-                    )
+                    annotate(outcome="no_user")
 
                 return user
             except Exception as exc:
-                logger.warning("failed to get or create user: %s", exc)
+                annotate(outcome="error", error=type(exc).__name__)
+                logger.warning("[OIDC Auth] Failed to get or create user: %s", exc)
                 return None
 
+        annotate(outcome="invalid_token")
         return None
+
+    def store_tokens(self, session, access_token, id_token, refresh_token=None):
+        """Store OIDC tokens, including the refresh token used for silent renewal."""
+        if self.get_settings("OIDC_STORE_ACCESS_TOKEN", False):
+            session["oidc_access_token"] = access_token
+
+        if self.get_settings("OIDC_STORE_ID_TOKEN", False):
+            session["oidc_id_token"] = id_token
+
+        if refresh_token and self.get_settings("OIDC_STORE_REFRESH_TOKEN", False):
+            session["oidc_refresh_token"] = refresh_token
+
+    def renew_tokens(self, user, refresh_token):
+        """
+        Exchange a refresh token for new tokens at the token endpoint.
+
+        Returns the token response, or None if the provider rejected the grant
+        or couldn't be reached, or if the ID token couldn't be verified or
+        does not belong to the given user.
+        """
+        token_payload = {
+            "client_id": self.OIDC_RP_CLIENT_ID,
+            "client_secret": self.OIDC_RP_CLIENT_SECRET,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "scope": self.get_settings("OIDC_RP_SCOPES", "openid email"),
+        }
+
+        try:
+            token_info = self.get_token(token_payload)
+        except requests.RequestException as e:
+            logger.warning(
+                "[OIDC Auth] Token refresh failed for user %s: %s", user.pk, e
+            )
+            return None
+
+        id_token = token_info.get("id_token")
+        if id_token:
+            try:
+                self._verify_renewed_id_token(user, id_token)
+            # Malformed tokens, and failures to fetch the signing keys, end
+            # the refresh like a rejected grant instead of failing the request
+            except (
+                SuspiciousOperation,
+                jwt.PyJWTError,
+                requests.RequestException,
+            ) as e:
+                logger.warning(
+                    "[OIDC Auth] Rejected renewed ID token for user %s: %s", user.pk, e
+                )
+                return None
+
+        return token_info
+
+    def _verify_renewed_id_token(self, user, id_token):
+        """
+        Verify the signature of a renewed ID token and that it is for the same user.
+
+        Renewed ID tokens carry no nonce of their own, so instead of the nonce
+        check done by verify_token() we require the subject to be unchanged.
+        """
+        if self.OIDC_RP_SIGN_ALGO.startswith(("RS", "ES")):
+            key = self.OIDC_RP_IDP_SIGN_KEY or self.retrieve_matching_jwk(id_token)
+        else:
+            key = self.OIDC_RP_CLIENT_SECRET
+
+        payload = self.get_payload_data(id_token, key)
+
+        try:
+            oidc_id = user.oidc_profile.oidc_id
+        except OIDCUserProfile.DoesNotExist:
+            raise SuspiciousOperation("User has no OIDC profile")
+
+        if payload.get("sub") != oidc_id:
+            raise SuspiciousOperation("Renewed ID token subject does not match")
+        if user.oidc_profile.provider != provider_name():
+            raise SuspiciousOperation("Renewed ID token is from another provider")
@@ -0,0 +1,161 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Logging of OIDC logins.
+
+Every login is summarized in a single record on the ``pretalx_oidc.login``
+logger, built from the fields collected while the backend runs. Personal data
+is redacted and the message is only formatted when a handler emits it. With
+structured logging enabled the record is rendered as JSON and all plugin
+records are handed to a ``QueueListener`` thread, so slow log files or
+consoles never hold up a request.
+"""
+
+import atexit
+import contextlib
+import contextvars
+import hashlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+logger = logging.getLogger("pretalx_oidc.login")
+
+# Claims that identify a person and are never logged in clear text
+REDACTED_FIELDS = frozenset(
+    {
+        "email",
+        "name",
+        "given_name",
+        "family_name",
+        "middle_name",
+        "nickname",
+        "preferred_username",
+        "phone_number",
+        "address",
+        "birthdate",
+        "picture",
+    }
+)
+
+_current = contextvars.ContextVar("pretalx_oidc_login", default=None)
+_structured = False
+_listener = None
+_handlers = []
+
+
+def redact_value(value):
+    """Replace a value by a short digest, so records can still be correlated."""
+    if value in (None, ""):
+        return value
+    digest = hashlib.sha256(str(value).encode()).hexdigest()[:10]
+    return f"redacted:{digest}"
+
+
+def redact(claims):
+    """Return a copy of ``claims`` with personal data redacted."""
+    return {
+        key: redact_value(value) if key in REDACTED_FIELDS else value
+        for key, value in claims.items()
+    }
+
+
+class LoginFields(dict):
+    """Fields of one login, rendered only when a handler formats the record."""
+
+    def __str__(self):
+        fields = redact(self)
+        if _structured:
+            return json.dumps(fields, default=str, sort_keys=True)
+        return " ".join(f"{key}={value}" for key, value in fields.items())
+
+
+@contextlib.contextmanager
+def login_record(**fields):
+    """
+    Collect fields for one login and log them as one record at the end.
+
+    The outcome defaults to ``error`` if the block raises, otherwise to
+    ``failed`` unless set with ``annotate(outcome=...)``.
+    """
+    record = LoginFields(fields)
+    token = _current.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except Exception:
+        record.setdefault("outcome", "error")
+        raise
+    finally:
+        _current.reset(token)
+        record.setdefault("outcome", "failed")
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        level = logging.INFO if record["outcome"] == "success" else logging.WARNING
+        if logger.isEnabledFor(level):
+            logger.log(level, "[OIDC Auth] login %s", record, extra={"oidc": record})
+
+
+def annotate(**fields):
+    """Add fields to the login being processed, if any."""
+    record = _current.get()
+    if record is not None:
+        record.update(fields)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records unformatted, so messages are built in the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+def is_structured():
+    return _structured
+
+
+def start_structured_logging():
+    """
+    Render login records as JSON and emit plugin records from a background thread.
+
+    The handlers that plugin records would otherwise reach through the root
+    logger are moved behind a ``QueueListener``; the request thread only puts
+    records on an in-memory queue.
+    """
+    global _structured, _handlers
+    _structured = True
+    if _listener is not None:
+        return
+
+    plugin_logger = logging.getLogger("pretalx_oidc")
+    _handlers = list(plugin_logger.handlers) + list(logging.getLogger().handlers)
+    if not _handlers:
+        return
+
+    plugin_logger.propagate = False
+    _start_listener()
+    atexit.register(stop_structured_logging)
+    # Threads don't survive a fork, so workers forked from a preloaded app
+    # need a listener of their own
+    os.register_at_fork(after_in_child=_start_listener)
+
+
+def _start_listener():
+    global _listener
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(
+        log_queue, *_handlers, respect_handler_level=True
+    )
+    logging.getLogger("pretalx_oidc").handlers = [DeferredQueueHandler(log_queue)]
+    _listener.start()
+
+
+def stop_structured_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
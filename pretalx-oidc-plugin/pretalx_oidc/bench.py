@@ -0,0 +1,396 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Micro-benchmarks of the plugin's hot paths, run with ``manage.py oidc_bench``.
+
+A target is a context manager registered with ``@target(name)`` that sets up
+its fixtures and yields a dict of named variants; each variant is a callable
+that performs one operation and is timed on its own.
+"""
+
+import contextlib
+import functools
+import importlib.util
+import logging
+import logging.handlers
+import os
+import queue
+import statistics
+import tempfile
+import time
+from typing import Callable, NamedTuple, Optional
+
+from django.db import connections
+from django.test import RequestFactory, override_settings
+from django.test.utils import (
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from . import authlog
+from .stubidp import StubIdP, stub_settings
+
+TARGETS = {}
+
+# Recorded with ``oidc_bench --save``; oidc_bench compares with it by default
+BASELINE = os.path.join(os.path.dirname(__file__), "bench_baseline.json")
+
+CLAIMS = {
+    "sub": "248289761001",
+    "email": "jane.doe@example.org",
+    "name": "Jane Doe",
+    "given_name": "Jane",
+    "family_name": "Doe",
+    "preferred_username": "jdoe",
+    "email_verified": True,
+}
+
+
+class Target(NamedTuple):
+    setup: Callable
+    db: bool
+    max_iterations: Optional[int]
+
+
+def target(name, db=False, max_iterations=None):
+    """
+    Register a benchmark target.
+
+    Targets with ``db`` run against a test database. ``max_iterations`` caps
+    the timed calls of slow targets, e.g. those doing network requests.
+    """
+
+    def register(func):
+        TARGETS[name] = Target(contextlib.contextmanager(func), db, max_iterations)
+        return func
+
+    return register
+
+
+def percentiles(samples):
+    """Return p50/p95/p99 of ``samples``, which must be sorted."""
+    return {
+        f"p{q}": samples[min(len(samples) - 1, len(samples) * q // 100)]
+        for q in (50, 95, 99)
+    }
+
+
+def measure(func, iterations, warmup=None):
+    """Time ``iterations`` calls of ``func``; returns statistics in microseconds."""
+    for _ in range(warmup if warmup is not None else min(100, iterations)):
+        func()
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter_ns()
+        func()
+        samples.append((time.perf_counter_ns() - started) / 1000)
+
+    samples.sort()
+    stats = {"iterations": iterations, "mean_us": statistics.fmean(samples)}
+    for name, value in percentiles(samples).items():
+        stats[f"{name}_us"] = value
+    return stats
+
+
+@contextlib.contextmanager
+def test_database(keepdb=False):
+    """
+    Run the block against freshly created test databases.
+
+    Aliases with a ``TEST: {"MIRROR": ...}`` setting, like the read replica,
+    are pointed at the test database they mirror.
+    """
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        # Test databases can't be dropped while connections are open
+        connections.close_all()
+        teardown_databases(old_config, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def run(names=None, iterations=1000):
+    """Run the given targets (all by default); returns {target: {variant: stats}}."""
+    names = list(names or TARGETS)
+    results = {}
+    with contextlib.ExitStack() as stack:
+        if any(TARGETS[name].db for name in names):
+            stack.enter_context(test_database())
+        for name in names:
+            setup, _, max_iterations = TARGETS[name]
+            count = min(iterations, max_iterations or iterations)
+            with setup() as variants:
+                results[name] = {
+                    variant: measure(func, count) for variant, func in variants.items()
+                }
+    return results
+
+
+def compare(baseline, results, threshold, metric="p50_us"):
+    """
+    Compare ``results`` with a ``baseline`` of the same shape.
+
+    Returns (target, variant, old, new, change, regressed) tuples, where
+    ``change`` is relative and ``regressed`` is true when it exceeds
+    ``threshold``. Variants missing from the baseline are skipped.
+    """
+    rows = []
+    for name, variants in results.items():
+        for variant, stats in variants.items():
+            old = baseline.get(name, {}).get(variant, {}).get(metric)
+            if not old:
+                continue
+            new = stats[metric]
+            change = (new - old) / old
+            rows.append((name, variant, old, new, change, change > threshold))
+    return rows
+
+
+@contextlib.contextmanager
+def _plugin_handlers(*handlers):
+    """Temporarily route plugin records to ``handlers`` only."""
+    plugin_logger = logging.getLogger("pretalx_oidc")
+    saved = plugin_logger.handlers, plugin_logger.propagate, plugin_logger.level
+    plugin_logger.handlers = list(handlers)
+    plugin_logger.propagate = False
+    plugin_logger.setLevel(logging.INFO)
+    try:
+        yield
+    finally:
+        plugin_logger.handlers, plugin_logger.propagate, _ = saved
+        plugin_logger.setLevel(saved[2])
+
+
+@target("login_logging")
+def login_logging():
+    """
+    Logging overhead of one login on the request thread.
+
+    ``legacy`` repeats the eager per-step warnings the backend used to emit;
+    the other variants emit the single login record, written to the file
+    directly or through the queue listener.
+    """
+    legacy_logger = logging.getLogger("pretalx_oidc.bench")
+    fd, path = tempfile.mkstemp(prefix="oidc_bench_", suffix=".log")
+    os.close(fd)
+    file_handler = logging.FileHandler(path)
+    file_handler.setFormatter(
+        logging.Formatter("%(levelname)s %(asctime)s %(name)s %(module)s %(message)s")
+    )
+
+    def legacy():
+        claims = dict(CLAIMS)
+        email, user_pk = claims["email"], 1
+        legacy_logger.warning("[OIDC Auth] PretalxOIDCBackend instance created")
+        legacy_logger.info(f"[OIDC Auth] Updating user {email} from claims: {claims}")
+        legacy_logger.warning(f"[OIDC Auth] Updated user {email}: admin=False")
+        legacy_logger.warning(f"[OIDC Auth] Authentication successful for: {email}")
+        legacy_logger.warning(f"[OIDC Auth]   - user.pk = {user_pk}")
+        legacy_logger.warning(f"[OIDC Auth]   - user.is_active = {True}")
+        legacy_logger.warning(f"[OIDC Auth]   - user.is_authenticated = {True}")
+
+    def record():
+        with authlog.login_record(provider="OIDC"):
+            authlog.annotate(admin=False, superuser=False)
+            authlog.annotate(outcome="success", user_id=1, email=CLAIMS["email"])
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    structured = authlog._structured
+    authlog._structured = True
+    try:
+        with _plugin_handlers(file_handler):
+            variants = {"legacy": legacy, "record_sync": record}
+            # Variants run one after another; this one routes to the queue
+            queued = authlog.DeferredQueueHandler(log_queue)
+
+            def record_queued():
+                logging.getLogger("pretalx_oidc").handlers = [queued]
+                record()
+
+            variants["record_queued"] = record_queued
+            listener.start()
+            yield variants
+    finally:
+        listener.stop()
+        authlog._structured = structured
+        file_handler.close()
+        os.unlink(path)
+
+
+@target("backend", db=True)
+def backend():
+    """
+    Creating the authentication backend, user lookup and privilege sync.
+
+    Django creates the backend for every authenticate() call and calls it for
+    password logins too; ``construct_mozilla`` is mozilla-django-oidc's own
+    backend for comparison.
+    """
+    from mozilla_django_oidc.auth import OIDCAuthenticationBackend
+    from pretalx.person.models import User
+
+    from .auth import PretalxOIDCBackend
+    from .models import OIDCUserProfile
+
+    with StubIdP() as idp, stub_settings(idp):
+        oidc_backend = PretalxOIDCBackend()
+        password_login = RequestFactory().post("/orga/login/")
+        admin = User.objects.create_user(email="admin@bench.invalid", name="Admin")
+        member = User.objects.create_user(email="member@bench.invalid", name="User")
+        OIDCUserProfile.objects.create(user=member, oidc_id=CLAIMS["sub"])
+        unknown = {**CLAIMS, "sub": "unknown", "email": "unknown@bench.invalid"}
+
+        yield {
+            "construct": PretalxOIDCBackend,
+            "construct_mozilla": OIDCAuthenticationBackend,
+            "authenticate_password": lambda: oidc_backend.authenticate(
+                password_login, username="user@bench.invalid", password="secret"
+            ),
+            "get_user_privileges": lambda: oidc_backend._get_user_privileges(CLAIMS),
+            "filter_users_by_sub": lambda: list(
+                oidc_backend.filter_users_by_claims(CLAIMS)
+            ),
+            "filter_users_unknown": lambda: list(
+                oidc_backend.filter_users_by_claims(unknown)
+            ),
+            "sync_admin": lambda: oidc_backend._sync_user_privileges_and_teams(
+                admin, True, False
+            ),
+            "sync_member": lambda: oidc_backend._sync_user_privileges_and_teams(
+                member, False, False
+            ),
+        }
+
+
+@target("templates")
+def templates():
+    """The context processor and signal receivers that run on page renders."""
+    from . import signals
+    from .context_processors import oidc_auth_context
+
+    request = RequestFactory().get("/orga/login/")
+    yield {
+        "oidc_auth_context": lambda: oidc_auth_context(request),
+        "add_oidc_login_button": lambda: signals.add_oidc_login_button(
+            None, request, next_url="/orga/"
+        ),
+        "add_cfp_css": lambda: signals.add_cfp_css(None, request),
+        "add_orga_css": lambda: signals.add_orga_css(None, request),
+        "add_profile_css": lambda: signals.add_profile_css(None, request),
+    }
+
+
+@target("configure_settings", max_iterations=20)
+def configure_settings():
+    """
+    Reading pretalx.cfg into settings at startup.
+
+    Includes the discovery request when ``op_discovery_endpoint`` is set.
+    """
+    from .config import configure_oidc_settings
+
+    yield {"configure_oidc_settings": configure_oidc_settings}
+
+
+@target("db_connection", db=True)
+def db_connection():
+    """
+    Database connection handling of one request.
+
+    Each call runs a query between the ``request_started`` and
+    ``request_finished`` signals, which is where Django opens and closes
+    connections. ``per_request`` connects for every request, like
+    ``CONN_MAX_AGE = 0``; ``persistent`` reuses the connection, with and without
+    health checks; ``pooled`` borrows it from a psycopg pool and only runs on
+    PostgreSQL with psycopg_pool installed. SQLite's in-memory test database is
+    never closed, so the variants only differ on a real database server.
+    """
+    from django.core.signals import request_finished, request_started
+    from django.db import connection
+
+    saved = dict(connection.settings_dict)
+    active = {}
+
+    def configure(max_age, health_checks, pool):
+        connection.close()
+        if hasattr(connection, "close_pool"):
+            connection.close_pool()
+        options = {
+            key: value for key, value in saved["OPTIONS"].items() if key != "pool"
+        }
+        if pool:
+            options["pool"] = True
+        connection.settings_dict.update(
+            CONN_MAX_AGE=max_age, CONN_HEALTH_CHECKS=health_checks, OPTIONS=options
+        )
+
+    def request(max_age=0, health_checks=False, pool=False):
+        config = (max_age, health_checks, pool)
+
+        def func():
+            # Variants run one after another, the first call switches over
+            if active.get("config") != config:
+                configure(*config)
+                active["config"] = config
+            request_started.send(sender=None, environ={})
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            request_finished.send(sender=None)
+
+        return func
+
+    variants = {
+        "per_request": request(),
+        "persistent": request(max_age=600),
+        "persistent_health_checks": request(max_age=600, health_checks=True),
+    }
+    if connection.vendor == "postgresql" and importlib.util.find_spec("psycopg_pool"):
+        variants["pooled"] = request(pool=True)
+
+    try:
+        yield variants
+    finally:
+        configure(saved["CONN_MAX_AGE"], saved["CONN_HEALTH_CHECKS"], False)
+        connection.settings_dict["OPTIONS"] = saved["OPTIONS"]
+
+
+@target("sessions")
+def sessions():
+    """
+    Encoding and decoding the session of a logged in OIDC user, as every
+    request does, with Django's JSON serializer and, when msgpack is
+    installed, the MessagePack one.
+    """
+    from django.contrib.sessions.backends.base import SessionBase
+
+    from . import serializers
+
+    data = {
+        "_auth_user_id": "4242",
+        "_auth_user_backend": "pretalx_oidc.auth.PretalxOIDCBackend",
+        "_auth_user_hash": "5f4dcc3b5aa765d61d8327deb882cf99" * 2,
+        "oidc_id_token_expiration": time.time() + 900,
+        "oidc_refresh_token": "eyJhbGciOiJIUzI1NiJ9." + "x" * 400,
+        "oidc_login_next": "/orga/event/democon/",
+        "_language": "en",
+    }
+    paths = {"json": "django.contrib.sessions.serializers.JSONSerializer"}
+    if serializers.msgpack is not None:
+        paths["msgpack"] = "pretalx_oidc.serializers.MsgPackSerializer"
+
+    variants = {}
+    for name, path in paths.items():
+        with override_settings(SESSION_SERIALIZER=path):
+            session = SessionBase()
+        variants[f"encode_{name}"] = functools.partial(session.encode, data)
+        variants[f"decode_{name}"] = functools.partial(
+            session.decode, session.encode(data)
+        )
+    yield variants
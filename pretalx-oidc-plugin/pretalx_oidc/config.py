@@ -7,13 +7,26 @@ Supports auto-discovery and manual endpoint configuration
 Version: 2.0 with backend verification
 """
 
+import contextlib
+import contextvars
 import logging
+import threading
+import time
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional
 
 import requests
 from django.conf import settings
+from mozilla_django_oidc.utils import import_from_settings
+
+from .endpoints import SETTING_KEYS, EndpointPool, shared_session
 
 logger = logging.getLogger(__name__)
 
+SESSION_REFRESH_MIDDLEWARE = "pretalx_oidc.middleware.OIDCSessionRefreshMiddleware"
+API_AUTHENTICATION_CLASS = "pretalx_oidc.api_auth.OIDCBearerAuthentication"
+
 
 def discover_oidc_endpoints(discovery_url):
     """
@@ -36,7 +49,7 @@ def discover_oidc_endpoints(discovery_url):
 
     try:
         logger.info(f"[OIDC] Fetching discovery document from: {discovery_url}")
-        response = requests.get(discovery_url, timeout=10)
+        response = shared_session.get(discovery_url, timeout=10)
         response.raise_for_status()
 
         discovery_doc = response.json()
@@ -51,6 +64,11 @@ def discover_oidc_endpoints(discovery_url):
 
         # Validate that we got all required endpoints
         missing = [k for k, v in endpoints.items() if not v and k != "issuer"]
+
+        # Optional, only used to validate opaque API access tokens
+        endpoints["introspection_endpoint"] = discovery_doc.get(
+            "introspection_endpoint"
+        )
         if missing:
             logger.error(
                 f"[OIDC] Discovery document missing required endpoints: {missing}"
@@ -117,21 +135,135 @@ def get_oidc_config(key, default=None):
     return getattr(settings, setting_name, default)
 
 
-# This will be called from the AppConfig.ready() method
-def configure_oidc_settings():  # noqa: C901
+class OIDCSettings(NamedTuple):
     """
-    Configure django-oidc settings from pretalx.cfg.
-    Supports both auto-discovery and manual endpoint configuration.
+    Immutable snapshot of the [oidc] section of pretalx.cfg.
+
+    ``values`` holds the Django settings derived from it. Readers take the
+    snapshot once with current_settings(); a reload builds a new one and swaps
+    the reference, so the hot path needs no locks and never sees a mix of old
+    and new values.
     """
-    from django.conf import settings as django_settings
-    from pretalx.common.settings.config import build_config
 
-    config, _ = build_config()
+    values: Mapping[str, Any] = MappingProxyType({})
+    admin_users: frozenset = frozenset()
+    superusers: frozenset = frozenset()
+    hide_password_form: bool = False
+    # With several discovery URLs, see endpoints.py
+    endpoints: Optional[EndpointPool] = None
+
+    def get(self, name, *default):
+        """Return a setting, like mozilla-django-oidc's ``get_settings``."""
+        if self.endpoints is not None:
+            if name in SETTING_KEYS:
+                url = self.endpoints.select(name)
+                if url:
+                    return url
+            elif name == "OIDC_OP_ISSUER":
+                return self.endpoints.issuer
+        try:
+            return self.values[name]
+        except KeyError:
+            # Not derived from pretalx.cfg, e.g. OIDC_VERIFY_SSL
+            return import_from_settings(name, *default)
+
+    def call(self, setting, send, failover=False):
+        """
+        Return ``send(url)`` for the URL of the endpoint ``setting``.
+
+        With several discovery URLs and ``failover``, failed requests are
+        retried at the other deployments of the provider.
+        """
+        if self.endpoints is None:
+            return send(self.get(setting))
+        return self.endpoints.call(setting, send, failover=failover)
+
+
+_current = OIDCSettings()
+_reload_lock = threading.Lock()
+
+# The tenant provider of the login being handled, see providers.py
+_provider = contextvars.ContextVar("pretalx_oidc_provider", default=None)
+
+
+def current_settings():
+    """Return the settings of the current provider, by default those of [oidc]."""
+    provider = _provider.get()
+    if provider is not None:
+        return provider.settings
+    return _current
+
+
+def current_provider():
+    """Return the tenant provider in use, or None for the [oidc] provider."""
+    return _provider.get()
+
+
+@contextlib.contextmanager
+def use_provider(provider):
+    """Read the settings of ``provider`` in this block; None means [oidc]."""
+    token = _provider.set(provider)
+    try:
+        yield
+    finally:
+        _provider.reset(token)
+
+
+class SnapshotSetting:
+    """
+    Attribute read from the current settings, for mozilla-django-oidc classes.
+
+    Assignments, like the ones in mozilla-django-oidc's ``__init__``, are
+    ignored, so the value always follows the provider in use and reloads.
+    """
+
+    def __init__(self, *default, setting=None):
+        self.default = default
+        self.setting = setting
 
+    def __set_name__(self, owner, name):
+        self.setting = self.setting or name
+
+    def __get__(self, instance, owner=None):
+        return current_settings().get(self.setting, *self.default)
+
+    def __set__(self, instance, value):
+        pass
+
+
+@contextlib.contextmanager
+def override_oidc_settings(**values):
+    """Use ``values`` instead of the settings from pretalx.cfg, e.g. in load tests."""
+    global _current
+    previous = _current
+    _current = previous._replace(
+        values=MappingProxyType({**previous.values, **values}),
+        # Overridden endpoints win over the discovered ones
+        endpoints=None if values.keys() & SETTING_KEYS.keys() else previous.endpoints,
+    )
+    try:
+        yield
+    finally:
+        _current = previous
+
+
+def _identifiers(value):
+    """Parse a comma-separated list of subs and emails."""
+    return frozenset(x.strip() for x in value.split(",") if x.strip())
+
+
+def build_oidc_settings(config):  # noqa: C901
+    """
+    Build an OIDCSettings snapshot from pretalx.cfg.
+    Supports both auto-discovery and manual endpoint configuration.
+
+    Returns None if the [oidc] section or the client credentials are missing.
+    Nothing is changed until the snapshot is applied.
+    """
     # Check if OIDC section exists in config
     if not config.has_section("oidc"):
         logger.info("[OIDC] No [oidc] section found in pretalx.cfg")
-        return
+        return None
 
     logger.info("[OIDC] Configuring OIDC settings from pretalx.cfg")
 
@@ -141,37 +273,51 @@ def configure_oidc_settings():  # noqa: C901
 
     if not rp_client_id or not rp_client_secret:
         logger.warning("[OIDC] Missing rp_client_id or rp_client_secret in config")
-        return
+        return None
 
-    setattr(django_settings, "OIDC_RP_CLIENT_ID", rp_client_id)
-    setattr(django_settings, "OIDC_RP_CLIENT_SECRET", rp_client_secret)
+    values = {
+        "OIDC_RP_CLIENT_ID": rp_client_id,
+        "OIDC_RP_CLIENT_SECRET": rp_client_secret,
+    }
 
     # Check for discovery URL first (preferred method)
     discovery_url = config.get("oidc", "op_discovery_endpoint", fallback=None)
 
+    endpoint_pool = None
     if discovery_url:
         # Use auto-discovery
         logger.info(f"[OIDC] Using auto-discovery from: {discovery_url}")
 
-        endpoints = discover_oidc_endpoints(discovery_url)
+        # Equivalent deployments of the provider, in order of preference
+        discovery_urls = [x.strip() for x in discovery_url.split(",") if x.strip()]
+        if len(discovery_urls) > 1:
+            endpoint_pool = EndpointPool(discovery_urls, discover_oidc_endpoints)
+            endpoints = endpoint_pool.primary
+            if endpoints is None:
+                endpoint_pool = None
+        else:
+            endpoints = discover_oidc_endpoints(discovery_url)
 
         if endpoints:
-            setattr(
-                django_settings,
-                "OIDC_OP_AUTHORIZATION_ENDPOINT",
-                endpoints["authorization_endpoint"],
-            )
-            setattr(
-                django_settings, "OIDC_OP_TOKEN_ENDPOINT", endpoints["token_endpoint"]
-            )
-            setattr(
-                django_settings, "OIDC_OP_USER_ENDPOINT", endpoints["userinfo_endpoint"]
-            )
-            setattr(django_settings, "OIDC_OP_JWKS_ENDPOINT", endpoints["jwks_uri"])
+            values["OIDC_OP_AUTHORIZATION_ENDPOINT"] = endpoints[
+                "authorization_endpoint"
+            ]
+            values["OIDC_OP_TOKEN_ENDPOINT"] = endpoints["token_endpoint"]
+            values["OIDC_OP_USER_ENDPOINT"] = endpoints["userinfo_endpoint"]
+            values["OIDC_OP_JWKS_ENDPOINT"] = endpoints["jwks_uri"]
+
+            if endpoint_pool is None:
+                values["OIDC_OP_DISCOVERY_ENDPOINT"] = discovery_url
 
             # Store issuer for validation if needed
-            if endpoints.get("issuer"):
-                setattr(django_settings, "OIDC_OP_ISSUER", endpoints["issuer"])
+            if endpoint_pool is not None and endpoint_pool.issuer:
+                values["OIDC_OP_ISSUER"] = endpoint_pool.issuer
+            elif endpoints.get("issuer"):
+                values["OIDC_OP_ISSUER"] = endpoints["issuer"]
+            if endpoints.get("introspection_endpoint"):
+                values["OIDC_OP_INTROSPECTION_ENDPOINT"] = endpoints[
+                    "introspection_endpoint"
+                ]
         else:
             logger.error(
                 "[OIDC] Discovery failed, falling back to manual configuration if available"
@@ -190,99 +336,285 @@ def configure_oidc_settings():  # noqa: C901
             "op_jwks_endpoint": "OIDC_OP_JWKS_ENDPOINT",
         }
 
+        introspection_endpoint = config.get(
+            "oidc", "op_introspection_endpoint", fallback=""
+        )
+        if introspection_endpoint:
+            values["OIDC_OP_INTROSPECTION_ENDPOINT"] = introspection_endpoint
+
         for config_key, setting_name in oidc_config_mapping.items():
             value = config.get("oidc", config_key, fallback="")
             if value:
-                setattr(django_settings, setting_name, value)
+                values[setting_name] = value
             else:
                 logger.warning(f"[OIDC] Missing {config_key} in config")
 
     # Additional OIDC settings with defaults
-    setattr(
-        django_settings,
-        "OIDC_RP_SIGN_ALGO",
-        config.get("oidc", "rp_sign_algo", fallback="RS256"),
-    )
-    setattr(
-        django_settings,
-        "OIDC_RP_SCOPES",
-        config.get("oidc", "rp_scopes", fallback="openid email profile"),
+    values["OIDC_RP_SIGN_ALGO"] = config.get("oidc", "rp_sign_algo", fallback="RS256")
+    values["OIDC_RP_SCOPES"] = config.get(
+        "oidc", "rp_scopes", fallback="openid email profile"
     )
+    # Checked here rather than every time the backend is created
+    if (
+        values["OIDC_RP_SIGN_ALGO"].startswith(("RS", "ES"))
+        and not values.get("OIDC_OP_JWKS_ENDPOINT")
+        and not getattr(settings, "OIDC_RP_IDP_SIGN_KEY", None)
+    ):
+        logger.error(
+            f"[OIDC] {values['OIDC_RP_SIGN_ALGO']} requires op_jwks_endpoint, "
+            "ID tokens can't be verified"
+        )
 
     # Session/Auth settings
-    setattr(
-        django_settings,
-        "OIDC_STORE_ACCESS_TOKEN",
-        config.getboolean("oidc", "store_access_token", fallback=True),
+    values["OIDC_STORE_ACCESS_TOKEN"] = config.getboolean(
+        "oidc", "store_access_token", fallback=True
     )
-    setattr(
-        django_settings,
-        "OIDC_STORE_ID_TOKEN",
-        config.getboolean("oidc", "store_id_token", fallback=True),
+    values["OIDC_STORE_ID_TOKEN"] = config.getboolean(
+        "oidc", "store_id_token", fallback=True
     )
-    setattr(
-        django_settings,
-        "OIDC_RENEW_ID_TOKEN_EXPIRY_SECONDS",
-        config.getint("oidc", "renew_id_token_expiry_seconds", fallback=3600),
+    values["OIDC_STORE_REFRESH_TOKEN"] = config.getboolean(
+        "oidc", "store_refresh_token", fallback=True
+    )
+    renew_expiry = config.getint("oidc", "renew_id_token_expiry_seconds", fallback=3600)
+    values["OIDC_RENEW_ID_TOKEN_EXPIRY_SECONDS"] = renew_expiry
+    values["OIDC_RENEW_ID_TOKEN_JITTER_SECONDS"] = config.getint(
+        "oidc", "renew_id_token_jitter_seconds", fallback=renew_expiry // 10
     )
 
-    # User creation settings - CRITICAL for auto-creating users
-    setattr(
-        django_settings,
-        "OIDC_CREATE_USER",
-        config.getboolean("oidc", "create_user", fallback=True),
+    # Silent token renewal - must run after AuthenticationMiddleware
+    values["OIDC_SESSION_REFRESH"] = config.getboolean(
+        "oidc", "session_refresh", fallback=False
+    )
+
+    values["OIDC_JWKS_CACHE_TTL"] = config.getint(
+        "oidc", "jwks_cache_ttl", fallback=3600
+    )
+
+    # REST API bearer token authentication
+    values["OIDC_API_AUDIENCE"] = (
+        config.get("oidc", "api_audience", fallback="") or None
     )
-    setattr(
-        django_settings,
-        "OIDC_USE_NONCE",
-        config.getboolean("oidc", "use_nonce", fallback=True),
+    values["OIDC_API_TOKEN_CACHE_SIZE"] = config.getint(
+        "oidc", "api_token_cache_size", fallback=1024
     )
+    values["OIDC_API_TOKEN_CACHE_TTL"] = config.getint(
+        "oidc", "api_token_cache_ttl", fallback=0
+    )
+    values["OIDC_API_BEARER_AUTH"] = config.getboolean(
+        "oidc", "api_bearer_auth", fallback=False
+    )
+
+    # Login admission control (0 disables the respective limit)
+    values["OIDC_LOGIN_RATE"] = config.getfloat("oidc", "login_rate", fallback=0)
+    values["OIDC_LOGIN_BURST"] = config.getint("oidc", "login_burst", fallback=0)
+    values["OIDC_LOGIN_MAX_CONCURRENCY"] = config.getint(
+        "oidc", "login_max_concurrency", fallback=0
+    )
+    values["OIDC_LOGIN_RETRY_SECONDS"] = config.getint(
+        "oidc", "login_retry_seconds", fallback=3
+    )
+
+    # Carry state/nonce/PKCE verifier in an encrypted cookie instead of the session
+    values["OIDC_STATELESS_STATE"] = config.getboolean(
+        "oidc", "stateless_state", fallback=False
+    )
+    values["OIDC_STATE_MAX_AGE"] = config.getint("oidc", "state_max_age", fallback=600)
+
+    # How long duplicate callbacks wait for the first one to finish
+    values["OIDC_CALLBACK_WAIT_SECONDS"] = config.getint(
+        "oidc", "callback_wait_seconds", fallback=15
+    )
+
+    # Where successful logins are recorded: plugin, activity_log or none
+    values["OIDC_LOGIN_AUDIT"] = config.get("oidc", "login_audit", fallback="plugin")
+    values["OIDC_LOGIN_AUDIT_BATCH_SIZE"] = config.getint(
+        "oidc", "login_audit_batch_size", fallback=50
+    )
+    values["OIDC_LOGIN_AUDIT_FLUSH_SECONDS"] = config.getint(
+        "oidc", "login_audit_flush_seconds", fallback=10
+    )
+    values["OIDC_LOGIN_AUDIT_KEEP_DAYS"] = config.getint(
+        "oidc", "login_audit_keep_days", fallback=7
+    )
+    values["OIDC_LOGIN_AUDIT_RETENTION_DAYS"] = config.getint(
+        "oidc", "login_audit_retention_days", fallback=365
+    )
+
+    # One JSON record per login, written from a background thread
+    values["OIDC_STRUCTURED_LOGGING"] = config.getboolean(
+        "oidc", "structured_logging", fallback=False
+    )
+
+    # User creation settings - CRITICAL for auto-creating users
+    values["OIDC_CREATE_USER"] = config.getboolean("oidc", "create_user", fallback=True)
+    values["OIDC_USE_NONCE"] = config.getboolean("oidc", "use_nonce", fallback=True)
 
     # Callback URL configuration
-    setattr(
-        django_settings,
-        "LOGIN_REDIRECT_URL",
-        config.get("oidc", "login_redirect_url", fallback="/orga/"),
+    values["LOGIN_REDIRECT_URL"] = config.get(
+        "oidc", "login_redirect_url", fallback="/orga/"
     )
-    setattr(
-        django_settings,
-        "LOGOUT_REDIRECT_URL",
-        config.get("oidc", "logout_redirect_url", fallback="/"),
+    values["LOGOUT_REDIRECT_URL"] = config.get(
+        "oidc", "logout_redirect_url", fallback="/"
     )
 
     # Tell mozilla-django-oidc the namespaced URL names for our plugin
-    setattr(
-        django_settings,
-        "OIDC_AUTHENTICATION_CALLBACK_URL",
-        "plugins:pretalx_oidc:oidc_authentication_callback",
+    values["OIDC_AUTHENTICATION_CALLBACK_URL"] = (
+        "plugins:pretalx_oidc:oidc_authentication_callback"
     )
-    setattr(
-        django_settings,
-        "OIDC_AUTHENTICATION_REQUEST_URL",
-        "plugins:pretalx_oidc:oidc_authentication_init",
+    values["OIDC_AUTHENTICATION_REQUEST_URL"] = (
+        "plugins:pretalx_oidc:oidc_authentication_init"
     )
 
     # CRITICAL: Tell mozilla-django-oidc which authentication backend class to use
     # Without this, it won't know to use our custom backend!
-    setattr(
-        django_settings,
-        "OIDC_AUTHENTICATION_BACKEND",
-        "pretalx_oidc.auth.PretalxOIDCBackend",
-    )
+    values["OIDC_AUTHENTICATION_BACKEND"] = "pretalx_oidc.auth.PretalxOIDCBackend"
 
     # Optional: Provider name for logging/display
-    setattr(
-        django_settings,
-        "OIDC_PROVIDER_NAME",
-        config.get("oidc", "provider_name", fallback="OIDC"),
-    )
+    values["OIDC_PROVIDER_NAME"] = config.get("oidc", "provider_name", fallback="OIDC")
 
     # HTTPS redirect enforcement
-    setattr(
-        django_settings,
-        "OIDC_FORCE_HTTPS_REDIRECT",
-        config.getboolean("oidc", "force_https_redirect", fallback=False),
+    values["OIDC_FORCE_HTTPS_REDIRECT"] = config.getboolean(
+        "oidc", "force_https_redirect", fallback=False
+    )
+
+    # Seconds between the background checks behind /oidc/readyz
+    values["OIDC_HEALTH_PROBE_SECONDS"] = config.getint(
+        "oidc", "health_probe_seconds", fallback=30
+    )
+
+    # Tenant providers of [oidc:<name>] sections are dropped after this long
+    # without a login
+    values["OIDC_PROVIDER_IDLE_SECONDS"] = config.getint(
+        "oidc", "provider_idle_seconds", fallback=3600
+    )
+
+    return OIDCSettings(
+        values=MappingProxyType(values),
+        # Matched against the sub and email claims on every login
+        admin_users=_identifiers(config.get("oidc", "admin_users", fallback="")),
+        superusers=_identifiers(config.get("oidc", "superuser", fallback="")),
+        hide_password_form=config.getboolean(
+            "oidc", "hide_password_form", fallback=False
+        ),
+        endpoints=endpoint_pool,
+    )
+
+
+def apply_oidc_settings(snapshot):
+    """
+    Make ``snapshot`` the current OIDC settings of this process.
+
+    The values are also copied to django.conf.settings for code that reads
+    them from there, like mozilla-django-oidc's middleware and views.
+    """
+    global _current
+    previous, _current = _current, snapshot
+
+    for name, value in snapshot.values.items():
+        setattr(settings, name, value)
+    # Endpoints the provider no longer announces
+    for name in previous.values.keys() - snapshot.values.keys():
+        if name.startswith("OIDC_"):
+            delattr(settings, name)
+
+    if snapshot.get("OIDC_STRUCTURED_LOGGING"):
+        from .authlog import start_structured_logging
+
+        start_structured_logging()
+
+    # The precomputed callback URL depends on the settings above
+    from .state import get_callback_url
+
+    get_callback_url.cache_clear()
+
+    # At startup settings.py picks the templates; afterwards only reloads can
+    # change hide_password_form
+    if previous.values and previous.hide_password_form != snapshot.hide_password_form:
+        _select_oidc_only_templates(snapshot.hide_password_form)
+
+
+def install_request_hooks():
+    """
+    Add the session refresh middleware and the API's bearer authentication.
+
+    Each process builds its middleware chain and DRF reads its authentication
+    classes once, so settings changed later, by oidc_reload, could neither add
+    nor remove them. Both are added at startup whatever the configuration and
+    check ``session_refresh`` and ``api_bearer_auth`` on every request.
+    """
+    middleware = list(getattr(settings, "MIDDLEWARE", []))
+    if SESSION_REFRESH_MIDDLEWARE not in middleware:
+        auth_middleware = "django.contrib.auth.middleware.AuthenticationMiddleware"
+        if auth_middleware in middleware:
+            middleware.insert(
+                middleware.index(auth_middleware) + 1, SESSION_REFRESH_MIDDLEWARE
+            )
+        else:
+            middleware.append(SESSION_REFRESH_MIDDLEWARE)
+        setattr(settings, "MIDDLEWARE", middleware)
+
+    rest_framework = getattr(settings, "REST_FRAMEWORK", {})
+    auth_classes = tuple(rest_framework.get("DEFAULT_AUTHENTICATION_CLASSES", ()))
+    if API_AUTHENTICATION_CLASS not in auth_classes:
+        rest_framework["DEFAULT_AUTHENTICATION_CLASSES"] = auth_classes + (
+            API_AUTHENTICATION_CLASS,
+        )
+        setattr(settings, "REST_FRAMEWORK", rest_framework)
+
+        from rest_framework.settings import api_settings
+
+        api_settings.reload()
+
+
+def _select_oidc_only_templates(enabled):
+    """Switch the OIDC-only template variants of patch_oidc_only_templates.py."""
+    from django.template import engines
+
+    directory = Path(settings.BASE_DIR) / "oidc_only_templates"
+    has_oidc = any(
+        "oidc" in backend.lower() for backend in settings.AUTHENTICATION_BACKENDS
     )
+    enabled = enabled and has_oidc and directory.is_dir()
+    if enabled == getattr(settings, "OIDC_ONLY_TEMPLATES", False):
+        return
+
+    for backend in engines.all():
+        engine = getattr(backend, "engine", None)
+        if engine is None:
+            continue
+        dirs = [path for path in engine.dirs if Path(path) != directory]
+        if enabled:
+            # After DATA_DIR/templates, like settings.py
+            dirs.insert(min(1, len(dirs)), directory)
+        engine.dirs = dirs
+        for loader in engine.template_loaders:
+            if hasattr(loader, "reset"):
+                loader.reset()
+    setattr(settings, "OIDC_ONLY_TEMPLATES", enabled)
+    logger.info(f"[OIDC] {'Using' if enabled else 'Stopped using'} OIDC-only templates")
+
+
+# This will be called from the AppConfig.ready() method
+def configure_oidc_settings():
+    """
+    Configure django-oidc settings from pretalx.cfg.
+    Supports both auto-discovery and manual endpoint configuration.
+    """
+    from django.conf import settings as django_settings
+    from pretalx.common.settings.config import build_config
+
+    from .providers import registry
+
+    config, _ = build_config()
+    # Only reads the sections, tenants are set up on their first login
+    registry.configure(config)
+    # Also without a usable [oidc] section, so reloads can still enable them
+    install_request_hooks()
+
+    snapshot = build_oidc_settings(config)
+    if snapshot is None:
+        return
+    apply_oidc_settings(snapshot)
 
     logger.info("[OIDC] Configuration complete:")
     logger.info(f"  - Client ID: {django_settings.OIDC_RP_CLIENT_ID}")
@@ -297,6 +629,8 @@ def configure_oidc_settings():  # noqa: C901
         f"  - Auth Backend Class: {django_settings.OIDC_AUTHENTICATION_BACKEND}"
     )
     logger.info(f"  - Create User: {django_settings.OIDC_CREATE_USER}")
+    logger.info(f"  - Session Refresh: {snapshot.get('OIDC_SESSION_REFRESH', False)}")
+    logger.info(f"  - API Bearer Auth: {snapshot.get('OIDC_API_BEARER_AUTH', False)}")
 
     # Log the authentication backends to verify our backend is included
     auth_backends = getattr(django_settings, "AUTHENTICATION_BACKENDS", [])
@@ -310,3 +644,60 @@ def configure_oidc_settings():  # noqa: C901
         )
     if hasattr(django_settings, "OIDC_OP_TOKEN_ENDPOINT"):
         logger.info(f"  - Token: {django_settings.OIDC_OP_TOKEN_ENDPOINT}")
+
+
+def reload_oidc_settings():
+    """
+    Re-read pretalx.cfg and swap in the new OIDC settings.
+
+    Keeps the current settings if the new configuration is incomplete, e.g.
+    because the discovery failed. Returns True if the settings were swapped.
+    """
+    from pretalx.common.settings.config import build_config
+
+    from .providers import registry
+
+    started = time.perf_counter()
+    with _reload_lock:
+        config, _ = build_config()
+        snapshot = build_oidc_settings(config)
+        if snapshot is None or not snapshot.values.get("OIDC_OP_TOKEN_ENDPOINT"):
+            logger.error(
+                "[OIDC] Reloaded configuration is incomplete, keeping the current one"
+            )
+            return False
+        apply_oidc_settings(snapshot)
+        registry.configure(config)
+    logger.info(
+        f"[OIDC] Reloaded settings in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+    return True
+
+
+def warm_caches():
+    """
+    Fetch what the first login of a process would otherwise have to fetch.
+
+    Repeats the discovery if it failed while the app was loaded and loads the
+    provider's signing keys into the JWKS cache. Meant for app servers that
+    fork workers from a preloaded app; on errors the caches fill on first use.
+    """
+    from .jwks import jwks_cache
+
+    started = time.perf_counter()
+    try:
+        if getattr(settings, "OIDC_RP_CLIENT_ID", None) and not getattr(
+            settings, "OIDC_OP_TOKEN_ENDPOINT", None
+        ):
+            configure_oidc_settings()
+        jwks_endpoint = getattr(settings, "OIDC_OP_JWKS_ENDPOINT", None)
+        sign_algo = getattr(settings, "OIDC_RP_SIGN_ALGO", "RS256")
+        # HS* tokens are signed with the client secret, there are no keys
+        if jwks_endpoint and not sign_algo.startswith("HS"):
+            jwks_cache.get_keys(jwks_endpoint)
+    except Exception as e:
+        logger.warning(f"[OIDC] Could not warm caches: {e}")
+        return
+    logger.info(
+        f"[OIDC] Warmed caches in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
@@ -6,6 +6,8 @@ Context processor to provide OIDC authentication status to templates.
 """
 from django.conf import settings
 
+from .config import current_settings
+
 
 def oidc_auth_context(request):
     """
@@ -21,14 +23,8 @@ def oidc_auth_context(request):
             - has_password_auth: True if ModelBackend is enabled
             - has_oidc_auth: True if any OIDC backend is configured
     """
-    # Get the config object from Django settings
-    # The config object is set in settings.py from build_config()
-    from pretalx.common.settings.config import build_config
-
-    config, _ = build_config()
-
     # Check if hide_password_form is explicitly set to True in config
-    hide_password = config.getboolean("oidc", "hide_password_form", fallback=False)
+    hide_password = current_settings().hide_password_form
 
     auth_backends = getattr(settings, "AUTHENTICATION_BACKENDS", [])
     has_oidc = any("oidc" in backend.lower() for backend in auth_backends)
@@ -0,0 +1,311 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Failover between equivalent provider deployments.
+
+``op_discovery_endpoint`` may list several discovery URLs of the same
+provider, e.g. one per region, in order of preference. Every request to the
+provider through a session of ``pooled_session()`` updates the health of its
+origin: a moving average of the latency and of the error rate, and a circuit
+breaker that takes the origin out of rotation after consecutive failures.
+
+Settings of an endpoint pool name the URL of the healthiest deployment. The
+first URL in the list is used unless it is notably slower or failing, so
+traffic returns to it on its own once it recovers. Origins without a recent
+request count as unknown and get the next one, which is how recovered and
+previously slow deployments are noticed.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Settings derived from a discovery document, by discovery key
+SETTING_KEYS = {
+    "OIDC_OP_AUTHORIZATION_ENDPOINT": "authorization_endpoint",
+    "OIDC_OP_TOKEN_ENDPOINT": "token_endpoint",
+    "OIDC_OP_USER_ENDPOINT": "userinfo_endpoint",
+    "OIDC_OP_JWKS_ENDPOINT": "jwks_uri",
+    "OIDC_OP_INTROSPECTION_ENDPOINT": "introspection_endpoint",
+}
+
+# Weight of a new sample in the moving averages
+EWMA_ALPHA = 0.2
+
+# Consecutive failures that open the circuit, and for how long
+FAILURE_THRESHOLD = 3
+OPEN_SECONDS = 30
+
+# Seconds without a request after which an origin's averages are stale
+STALE_SECONDS = 60
+
+# A later URL is only preferred if the earlier one's score is this much worse,
+# and by more than this many seconds
+PREFERENCE = 1.5
+PREFERENCE_SLACK = 0.05
+
+# How much a 100% error rate inflates the latency score
+ERROR_PENALTY = 4
+
+# Seconds between attempts to discover URLs whose discovery failed
+REDISCOVER_SECONDS = 60
+
+
+class EndpointHealth:
+    """Latency, error rate and circuit breaker of one origin."""
+
+    def __init__(self, origin):
+        self.origin = origin
+        self._lock = threading.Lock()
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+        self.last_sample = 0.0
+
+    def _average(self, current, sample, now):
+        # Stale averages start over, so a recovered origin is used right away
+        if current is None or now - self.last_sample > STALE_SECONDS:
+            return sample
+        return current + EWMA_ALPHA * (sample - current)
+
+    def record_success(self, elapsed):
+        with self._lock:
+            now = time.monotonic()
+            if self.failures >= FAILURE_THRESHOLD:
+                logger.warning(f"[OIDC] {self.origin} is available again")
+                # Fail back right away instead of waiting for the average
+                self.error_rate = 0.0
+            self.latency = self._average(self.latency, elapsed, now)
+            self.error_rate = self._average(self.error_rate, 0.0, now)
+            self.failures = 0
+            self.last_sample = now
+
+    def record_failure(self, reason):
+        with self._lock:
+            now = time.monotonic()
+            self.error_rate = self._average(self.error_rate, 1.0, now)
+            self.failures += 1
+            self.last_sample = now
+            if self.failures >= FAILURE_THRESHOLD:
+                if self.open_until <= now:
+                    logger.error(
+                        f"[OIDC] Taking {self.origin} out of rotation for "
+                        f"{OPEN_SECONDS} s after {self.failures} failures: {reason}"
+                    )
+                self.open_until = now + OPEN_SECONDS
+
+    def available(self, now):
+        return self.open_until <= now
+
+    def score(self, now):
+        """Expected seconds per request; 0 if unknown, so it gets tried."""
+        if self.latency is None or now - self.last_sample > STALE_SECONDS:
+            return 0.0
+        return self.latency * (1 + ERROR_PENALTY * self.error_rate)
+
+    def as_dict(self, now):
+        return {
+            "origin": self.origin,
+            "latency_ms": (
+                round(self.latency * 1000, 1) if self.latency is not None else None
+            ),
+            "error_rate": round(self.error_rate, 3),
+            "available": self.available(now),
+        }
+
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def health_of(url):
+    """Return the health of the origin of ``url``, shared by all its endpoints."""
+    origin = _origin(url)
+    health = _health.get(origin)
+    if health is None:
+        with _health_lock:
+            health = _health.setdefault(origin, EndpointHealth(origin))
+    return health
+
+
+class HealthAdapter(HTTPAdapter):
+    """Transport adapter recording the outcome of every request."""
+
+    def send(self, request, **kwargs):
+        health = health_of(request.url)
+        started = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            health.record_failure(e.__class__.__name__)
+            raise
+        if response.status_code >= 500:
+            health.record_failure(f"HTTP {response.status_code}")
+        else:
+            health.record_success(time.perf_counter() - started)
+        return response
+
+
+def pooled_session():
+    """Return a requests session that records the health of the provider."""
+    session = requests.Session()
+    adapter = HealthAdapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# For the discovery and JWKS requests, which are not made per provider
+shared_session = pooled_session()
+
+
+def _failed_over(error):
+    """Whether another deployment may succeed where this request failed."""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return (
+        isinstance(error, requests.HTTPError)
+        and error.response is not None
+        and error.response.status_code >= 500
+    )
+
+
+class EndpointPool:
+    """
+    The discovered endpoints of equivalent deployments of one provider.
+
+    ``discover`` is called with a discovery URL and returns its endpoints as
+    a dict, or None. Deployments that can't be discovered are retried in the
+    background every ``REDISCOVER_SECONDS``.
+    """
+
+    def __init__(self, discovery_urls, discover):
+        self.discovery_urls = tuple(discovery_urls)
+        self._discover = discover
+        self._lock = threading.Lock()
+        self._last_discovery = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(self.discovery_urls)) as executor:
+            self._members = tuple(executor.map(discover, self.discovery_urls))
+
+    @property
+    def primary(self):
+        """The endpoints of the first deployment that could be discovered."""
+        return next((m for m in self._members if m), None)
+
+    @property
+    def issuer(self):
+        """The issuer, or a tuple of issuers if the deployments use different ones."""
+        issuers = tuple(
+            dict.fromkeys(m["issuer"] for m in self._members if m and m["issuer"])
+        )
+        if len(issuers) > 1:
+            return issuers
+        return issuers[0] if issuers else None
+
+    def urls(self, setting):
+        """Return the URLs of ``setting``, healthiest first."""
+        self._rediscover()
+        now = time.monotonic()
+        key = SETTING_KEYS[setting]
+        candidates = []
+        for index, member in enumerate(self._members):
+            url = member and member.get(key)
+            if url:
+                candidates.append((index, url, health_of(url)))
+
+        available = [c for c in candidates if c[2].available(now)]
+        if not available:
+            # Everything is failing, try the one that will close first
+            candidates.sort(key=lambda c: c[2].open_until)
+            return [url for _, url, _ in candidates]
+
+        scores = {url: health.score(now) for _, url, health in available}
+        limit = min(scores.values()) * PREFERENCE + PREFERENCE_SLACK
+
+        def order(candidate):
+            index, url, _ = candidate
+            score = scores[url]
+            return (0, index, 0) if score <= limit else (1, score, index)
+
+        available.sort(key=order)
+        unavailable = [c for c in candidates if not c[2].available(now)]
+        return [url for _, url, _ in available + unavailable]
+
+    def select(self, setting):
+        """Return the URL of ``setting`` at the healthiest deployment."""
+        urls = self.urls(setting)
+        return urls[0] if urls else None
+
+    def call(self, setting, send, failover=False):
+        """
+        Return ``send(url)`` for the healthiest URL of ``setting``.
+
+        With ``failover``, connection errors, timeouts and server errors,
+        returned or raised, are retried at the next deployment and the last
+        outcome is passed on. Only requests that are safe to repeat may fail
+        over: a failed code exchange may have redeemed the code already.
+        """
+        urls = self.urls(setting)
+        if not failover:
+            urls = urls[:1]
+        for attempt, url in enumerate(urls, start=1):
+            last = attempt == len(urls)
+            try:
+                result = send(url)
+            except requests.RequestException as e:
+                if last or not _failed_over(e):
+                    raise
+                logger.warning(f"[OIDC] {url} failed, trying the next: {e}")
+                continue
+            status = getattr(result, "status_code", 0)
+            if status >= 500 and not last:
+                logger.warning(f"[OIDC] {url} returned {status}, trying the next")
+                continue
+            return result
+        raise requests.ConnectionError(f"No URL known for {setting}")
+
+    def _rediscover(self):
+        if all(self._members):
+            return
+        now = time.monotonic()
+        if now - self._last_discovery < REDISCOVER_SECONDS:
+            return
+        with self._lock:
+            if now - self._last_discovery < REDISCOVER_SECONDS:
+                return
+            self._last_discovery = now
+        threading.Thread(
+            target=self._discover_missing, name="pretalx_oidc_discovery", daemon=True
+        ).start()
+
+    def _discover_missing(self):
+        members = list(self._members)
+        for index, url in enumerate(self.discovery_urls):
+            if not members[index]:
+                members[index] = self._discover(url)
+        self._members = tuple(members)
+
+    def stats(self):
+        """Return the health of every deployment, for status pages and logs."""
+        now = time.monotonic()
+        stats = []
+        for url, member in zip(self.discovery_urls, self._members):
+            entry = {"discovery_url": url, "discovered": bool(member)}
+            if member:
+                entry.update(health_of(member["token_endpoint"]).as_dict(now))
+            stats.append(entry)
+        return stats
@@ -0,0 +1,97 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Export of all OIDC-linked users, for audits.
+
+The rows are read with ``iterator()``, which uses a server-side cursor on
+PostgreSQL, and rendered line by line, so the ``oidc_export_users`` command
+and the export view need the same memory for ten users as for a million.
+Membership in an admin team is an ``EXISTS`` subquery of the same query
+instead of a query per user.
+"""
+
+import csv
+import io
+import json
+
+from django.db.models import Exists, OuterRef
+
+from .models import OIDCUserProfile
+
+# Column name and the value it is read from
+COLUMNS = (
+    ("code", "user__code"),
+    ("email", "user__email"),
+    ("name", "user__name"),
+    ("sub", "oidc_id"),
+    ("provider", "provider"),
+    ("is_active", "user__is_active"),
+    ("is_staff", "user__is_staff"),
+    ("is_administrator", "user__is_administrator"),
+    ("is_superuser", "user__is_superuser"),
+    ("admin_team", "admin_team"),
+    ("last_login", "user__last_login"),
+    ("linked", "created"),
+    ("updated", "updated"),
+)
+
+FORMATS = ("csv", "jsonl")
+
+CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def export_rows(provider=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield a tuple of the values of ``COLUMNS`` for every linked user."""
+    from pretalx.event.models import Team
+
+    # The teams auth.py adds administrators to and removes others from
+    admin_teams = Team.objects.filter(
+        members=OuterRef("user_id"),
+        can_create_events=True,
+        can_change_teams=True,
+        can_change_organiser_settings=True,
+    )
+    profiles = OIDCUserProfile.objects.annotate(admin_team=Exists(admin_teams))
+    if provider:
+        profiles = profiles.filter(provider=provider)
+    rows = profiles.order_by("pk").values_list(*(source for _, source in COLUMNS))
+    return rows.iterator(chunk_size=chunk_size)
+
+
+def _value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def render_csv(rows):
+    """Yield the header and then every row as a line of CSV."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    yield line(name for name, _ in COLUMNS)
+    for row in rows:
+        yield line(_value(value) for value in row)
+
+
+def render_jsonl(rows):
+    """Yield every row as a JSON object on its own line."""
+    names = [name for name, _ in COLUMNS]
+    for row in rows:
+        yield json.dumps(dict(zip(names, map(_value, row)))) + "\n"
+
+
+RENDERERS = {"csv": render_csv, "jsonl": render_jsonl}
+
+
+def export(format="csv", provider=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the export in ``format`` as chunks of text."""
+    return RENDERERS[format](export_rows(provider=provider, chunk_size=chunk_size))
@@ -0,0 +1,303 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Liveness and readiness of the OIDC login, for orchestrator probes.
+
+A background thread in every process wakes up every ``health_probe_seconds``.
+The thread that holds the host's prober lock in the Django cache checks the
+database and the provider, renders the response of ``/oidc/readyz`` once and
+shares it through the cache; the other workers of the host copy it from
+there. So a host sends one round of checks per interval however many workers
+it runs, and if the prober's worker exits, another takes over the lock. The
+view only returns the rendered bytes, so probes cost neither database queries
+nor requests to the provider, however often they come. ``/oidc/healthz`` just
+tells that the process serves requests.
+
+The public report only has the status of every check with its timings and
+ages; error messages and the provider's URLs are logged and shown to
+administrators only.
+
+The provider checks go through the pooled sessions of endpoints.py, so they
+also keep the latency and circuit breakers of idle deployments current in the
+prober's worker.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import connection
+
+from .config import current_settings
+from .endpoints import health_of, shared_session
+from .jwks import jwks_cache
+
+logger = logging.getLogger(__name__)
+
+WELL_KNOWN = "/.well-known/openid-configuration"
+
+# Probes older than this many intervals count as stalled
+STALE_INTERVALS = 3
+
+# Intervals after which the prober lock of a worker that stopped renewing it
+# expires, before the shared report goes stale
+PROBER_INTERVALS = 2
+
+# Fields of the checks that the public report keeps
+PUBLIC_FIELDS = frozenset(
+    {
+        "ok",
+        "ms",
+        "needed",
+        "age_seconds",
+        "deployments",
+        "latency_ms",
+        "error_rate",
+        "available",
+    }
+)
+
+
+class Report(NamedTuple):
+    """The rendered outcome of one check."""
+
+    ready: bool
+    body: bytes
+    details: bytes
+    checked_at: float
+
+
+_lock = threading.Lock()
+_monitor_pid = None
+_report = None
+
+
+def _discovery_urls(snapshot):
+    if snapshot.endpoints is not None:
+        urls = snapshot.endpoints.discovery_urls
+    else:
+        urls = filter(None, [snapshot.get("OIDC_OP_DISCOVERY_ENDPOINT", None)])
+    return [
+        url if url.endswith(WELL_KNOWN) else f"{url.rstrip('/')}{WELL_KNOWN}"
+        for url in urls
+    ]
+
+
+def _check_database():
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    finally:
+        # Don't keep a connection open for the monitor between checks
+        connection.close()
+    return {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def _check_provider(snapshot):
+    timeout = snapshot.get("OIDC_TIMEOUT", None) or 5
+    urls = _discovery_urls(snapshot)
+    if not urls:
+        # Endpoints configured by hand, check the signing keys' host instead
+        urls = list(filter(None, [snapshot.get("OIDC_OP_JWKS_ENDPOINT", None)]))
+
+    deployments = []
+    for url in urls:
+        started = time.perf_counter()
+        try:
+            response = shared_session.get(
+                url,
+                timeout=timeout,
+                verify=snapshot.get("OIDC_VERIFY_SSL", True),
+                proxies=snapshot.get("OIDC_PROXY", None),
+            )
+            response.raise_for_status()
+            entry = {"ok": True, "ms": round((time.perf_counter() - started) * 1000)}
+        except Exception as e:
+            entry = {"ok": False, "error": str(e)}
+        entry.update(health_of(url).as_dict(time.monotonic()))
+        deployments.append(entry)
+    return {"ok": any(d["ok"] for d in deployments), "deployments": deployments}
+
+
+def _check_signing_keys(snapshot):
+    algorithm = snapshot.get("OIDC_RP_SIGN_ALGO", "RS256")
+    url = snapshot.get("OIDC_OP_JWKS_ENDPOINT", None)
+    if algorithm.startswith("HS") or snapshot.get("OIDC_RP_IDP_SIGN_KEY", None):
+        return {"ok": True, "needed": False}
+    if not url:
+        return {"ok": False, "error": "No JWKS endpoint"}
+    try:
+        # Fetches only if the keys are missing or expired
+        jwks_cache.get_keys(url)
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    return {
+        "ok": True,
+        "age_seconds": round(time.monotonic() - jwks_cache.last_refresh(url)),
+    }
+
+
+def _public(value):
+    """Return a check's results without error messages and URLs."""
+    if isinstance(value, dict):
+        return {
+            key: _public(item) for key, item in value.items() if key in PUBLIC_FIELDS
+        }
+    if isinstance(value, list):
+        return [_public(item) for item in value]
+    return value
+
+
+def _errors(result):
+    errors = [result["error"]] if "error" in result else []
+    for deployment in result.get("deployments", ()):
+        if "error" in deployment:
+            errors.append(f"{deployment['origin']}: {deployment['error']}")
+    return "; ".join(errors)
+
+
+def check():
+    """Check the database and the [oidc] provider and render the report."""
+    global _report
+    snapshot = current_settings()
+    checks = {
+        "settings": {"ok": bool(snapshot.get("OIDC_OP_TOKEN_ENDPOINT", None))},
+        "database": _check_database(),
+    }
+    if checks["settings"]["ok"]:
+        checks["provider"] = _check_provider(snapshot)
+        checks["signing_keys"] = _check_signing_keys(snapshot)
+
+    ready = all(result["ok"] for result in checks.values())
+    checked_at = time.time()
+    body = {"status": "ready" if ready else "unavailable", "checked_at": checked_at}
+    previous, _report = _report, Report(
+        ready=ready,
+        body=json.dumps(
+            {
+                **body,
+                "checks": {name: _public(result) for name, result in checks.items()},
+            }
+        ).encode(),
+        details=json.dumps({**body, "checks": checks}).encode(),
+        checked_at=checked_at,
+    )
+    # Logged when readiness changes, not on every check
+    if not ready and (previous is None or previous.ready):
+        failed = ", ".join(
+            f"{name} ({_errors(result) or 'failed'})"
+            for name, result in checks.items()
+            if not result["ok"]
+        )
+        logger.warning(f"[OIDC] Not ready, failed checks: {failed}")
+    elif ready and previous is not None and not previous.ready:
+        logger.warning("[OIDC] Ready again")
+    return _report
+
+
+def probe_seconds():
+    return current_settings().get("OIDC_HEALTH_PROBE_SECONDS", 30)
+
+
+def readiness(detailed=False):
+    """
+    Return the status and body of the last readiness check.
+
+    ``detailed`` adds the error messages and URLs, for administrators.
+    """
+    report = _report
+    if report is None:
+        return 503, b'{"status": "starting"}'
+    if time.time() - report.checked_at > STALE_INTERVALS * probe_seconds():
+        return 503, b'{"status": "stalled"}'
+    return (200 if report.ready else 503), (report.details if detailed else report.body)
+
+
+def liveness(detailed=False):
+    """Return the status and body for liveness probes, which ignore the provider."""
+    return 200, b'{"status": "ok"}'
+
+
+def _cache_key(name):
+    # Per host, in case several hosts share the cache
+    return f"pretalx_oidc:health:{name}:{socket.gethostname()}"
+
+
+def _is_prober():
+    """Take or renew the host's prober lock; True if this process holds it."""
+    key = _cache_key("prober")
+    owner = os.getpid()
+    timeout = PROBER_INTERVALS * probe_seconds()
+    try:
+        if cache.add(key, owner, timeout=timeout):
+            return True
+        if cache.get(key) == owner:
+            cache.touch(key, timeout)
+            return True
+    except Exception as e:
+        # Better every worker checking than none
+        logger.debug(f"[OIDC] Cache unavailable for the health checks: {e}")
+        return True
+    return False
+
+
+def _share(report):
+    try:
+        cache.set(
+            _cache_key("report"), report, timeout=STALE_INTERVALS * probe_seconds()
+        )
+    except Exception as e:
+        logger.debug(f"[OIDC] Could not share the health report: {e}")
+
+
+def _follow():
+    """Copy the prober's report of this host."""
+    global _report
+    report = cache.get(_cache_key("report"))
+    if report is not None:
+        _report = report
+
+
+def _monitor():
+    while True:
+        try:
+            if _is_prober():
+                _share(check())
+            else:
+                _follow()
+        except Exception as e:
+            logger.exception(f"[OIDC] Health check failed: {e}")
+        time.sleep(probe_seconds())
+
+
+def start_monitor(**kwargs):
+    """
+    Start checking health in the background in this process.
+
+    Connected to ``request_started`` and called after gunicorn forks a worker,
+    like the reload listener.
+    """
+    global _monitor_pid
+    if _monitor_pid == os.getpid():
+        return
+    with _lock:
+        if _monitor_pid == os.getpid():
+            return
+        _monitor_pid = os.getpid()
+
+        from django.core.signals import request_started
+
+        request_started.disconnect(start_monitor)
+
+        threading.Thread(
+            target=_monitor, name="pretalx_oidc_health", daemon=True
+        ).start()
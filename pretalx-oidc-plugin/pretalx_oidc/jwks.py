@@ -0,0 +1,97 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Process-wide cache for the provider's JSON Web Key Set.
+"""
+
+import logging
+import threading
+import time
+
+import jwt
+from django.core.exceptions import SuspiciousOperation
+from django.utils.encoding import smart_str
+from mozilla_django_oidc.utils import import_from_settings
+
+from .endpoints import shared_session
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSCache:
+    """
+    Cache the JWKS document per URL and refetch it when it expires.
+
+    A token signed with an unknown ``kid`` triggers a refetch (key rotation),
+    but at most once per ``min_refresh_interval`` so that tokens with bogus
+    key ids can't be used to hammer the provider.
+    """
+
+    def __init__(self, min_refresh_interval=60):
+        self.min_refresh_interval = min_refresh_interval
+        self._lock = threading.Lock()
+        self._entries = {}  # url -> (fetched_at, keys)
+
+    def _fetch(self, url):
+        response = shared_session.get(
+            url,
+            verify=import_from_settings("OIDC_VERIFY_SSL", True),
+            timeout=import_from_settings("OIDC_TIMEOUT", None),
+            proxies=import_from_settings("OIDC_PROXY", None),
+        )
+        response.raise_for_status()
+        keys = response.json()["keys"]
+        logger.info(f"[OIDC] Fetched {len(keys)} signing keys from {url}")
+        return keys
+
+    def get_keys(self, url, force=False):
+        """Return the list of JWKs published at ``url``."""
+        ttl = import_from_settings("OIDC_JWKS_CACHE_TTL", 3600)
+        now = time.monotonic()
+        fetched_at, keys = self._entries.get(url, (0, None))
+
+        if keys is not None and now - fetched_at < ttl:
+            if not force or now - fetched_at < self.min_refresh_interval:
+                return keys
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            fetched_at, cached = self._entries.get(url, (0, None))
+            if cached is not None and cached is not keys:
+                return cached
+            keys = self._fetch(url)
+            self._entries[url] = (time.monotonic(), keys)
+            return keys
+
+    def get_signing_key(self, token, url, verify_kid=True):
+        """Return the ``jwt.PyJWK`` matching the header of ``token``."""
+        header = jwt.get_unverified_header(token)
+        kid = smart_str(header.get("kid", ""))
+        alg = smart_str(header.get("alg", ""))
+
+        for force in (False, True):
+            for jwk in self.get_keys(url, force=force):
+                if verify_kid and jwk.get("kid") != kid:
+                    continue
+                if "alg" in jwk and jwk["alg"] != alg:
+                    continue
+                return jwt.PyJWK(jwk)
+
+        raise SuspiciousOperation("Could not find a valid JWKS.")
+
+    def last_refresh(self, url):
+        """Return the monotonic time of the last successful fetch of ``url``."""
+        return self._entries.get(url, (None, None))[0]
+
+    def discard(self, url):
+        """Forget the keys of ``url``, e.g. of a provider that is no longer used."""
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+jwks_cache = JWKSCache()
@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+End-to-end login load test against the stub provider, run with
+``manage.py oidc_loadtest``.
+
+Each login is a full authorization code flow: the login view redirects to
+the stub provider, the provider redirects back with a code, and the callback
+view exchanges it and logs the user in. Flows run concurrently, each with its
+own test client and cookies, against a throw-away test database.
+"""
+
+import contextlib
+import queue
+import statistics
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .api_auth import token_cache
+from .audit import login_events
+from .bench import percentiles, test_database
+from .jwks import jwks_cache
+from .state import get_callback_url
+from .stubidp import StubIdP, stub_settings
+
+
+def login_flow(login_hint):
+    """
+    Run one authorization code flow; returns (outcome, seconds, queries).
+
+    The outcome is ``ok`` or a short reason why the user isn't logged in.
+    """
+    client = Client()
+    started = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        # Count the queries on every database, e.g. the read replica too
+        captured = [
+            stack.enter_context(CaptureQueriesContext(connections[alias]))
+            for alias in connections
+        ]
+        response = client.get(reverse(settings.OIDC_AUTHENTICATION_REQUEST_URL))
+        if response.status_code != 302:
+            return f"login_{response.status_code}", 0, 0
+
+        authorize = requests.get(
+            f"{response['Location']}&{urlencode({'login_hint': login_hint})}",
+            allow_redirects=False,
+            timeout=30,
+        )
+        if authorize.status_code != 302:
+            return f"authorize_{authorize.status_code}", 0, 0
+
+        callback = urlsplit(authorize.headers["Location"])
+        response = client.get(f"{callback.path}?{callback.query}")
+        logged_in = "_auth_user_id" in client.session
+
+    elapsed = time.perf_counter() - started
+    queries = sum(len(context) for context in captured)
+    if response.status_code == 503:
+        return "throttled", elapsed, queries
+    if not logged_in:
+        return "failed", elapsed, queries
+    return "ok", elapsed, queries
+
+
+def _worker(jobs, results):
+    try:
+        while True:
+            try:
+                login_hint = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results.append(login_flow(login_hint))
+            except Exception as e:
+                results.append((type(e).__name__, 0, 0))
+    finally:
+        # Each thread has its own connections, close them before the test
+        # databases are dropped
+        connections.close_all()
+
+
+def run_loadtest(
+    logins=100,
+    users=20,
+    concurrency=10,
+    latency=0.0,
+    error_rate=0.0,
+    rotate_every=0,
+    stateless=False,
+    keepdb=False,
+):
+    """
+    Drive ``logins`` flows for ``users`` distinct users, ``concurrency`` at a time.
+
+    Users log in repeatedly, so both the create and the update path of the
+    backend are exercised. Returns a dict with the measurements.
+    """
+    with test_database(keepdb), StubIdP(latency, error_rate, rotate_every) as idp:
+        with stub_settings(idp, stateless):
+            jwks_cache.clear()
+            token_cache.clear()
+            get_callback_url.cache_clear()
+            report = _drive(idp, logins, users, concurrency)
+            login_events.flush()
+        get_callback_url.cache_clear()
+    return report
+
+
+def _drive(idp, logins, users, concurrency):
+    jobs = queue.SimpleQueue()
+    for number in range(logins):
+        jobs.put(f"user{number % users}")
+
+    results = []  # list.append is atomic
+    threads = [
+        threading.Thread(target=_worker, args=(jobs, results))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - started
+
+    succeeded = [
+        (seconds, queries) for outcome, seconds, queries in results if outcome == "ok"
+    ]
+    latencies = sorted(seconds * 1000 for seconds, _ in succeeded)
+    queries = [queries for _, queries in succeeded]
+
+    report = {
+        "logins": logins,
+        "users": users,
+        "concurrency": concurrency,
+        "succeeded": len(succeeded),
+        "outcomes": dict(Counter(outcome for outcome, _, _ in results)),
+        "duration_s": duration,
+        "logins_per_s": len(succeeded) / duration if duration else 0,
+        "queries_per_login": statistics.fmean(queries) if queries else 0,
+        "max_queries_per_login": max(queries, default=0),
+        "provider": dict(idp.stats),
+    }
+    if latencies:
+        for name, value in percentiles(latencies).items():
+            report[f"{name}_ms"] = value
+    return report
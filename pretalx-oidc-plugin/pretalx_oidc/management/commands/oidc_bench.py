@@ -0,0 +1,123 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ... import bench
+
+
+class Command(BaseCommand):
+    help = (
+        "Run micro-benchmarks of the OIDC plugin's hot paths and fail on "
+        "regressions against a baseline, by default the one shipped with the "
+        "plugin, optionally saving a new one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "targets",
+            nargs="*",
+            help=f"Targets to run (default: all of {', '.join(bench.TARGETS)})",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=1000,
+            help="Timed calls per variant (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--save",
+            metavar="FILE",
+            help="Write the results to FILE as a baseline",
+        )
+        parser.add_argument(
+            "--compare",
+            metavar="FILE",
+            default=bench.BASELINE,
+            help="Compare with the baseline in FILE and fail on regressions "
+            "(default: the plugin's bench_baseline.json)",
+        )
+        parser.add_argument(
+            "--no-compare",
+            action="store_true",
+            help="Don't compare with a baseline",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed slowdown against the baseline (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--metric",
+            default="p50_us",
+            choices=["mean_us", "p50_us", "p95_us", "p99_us"],
+            help="Statistic to compare (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options["targets"]) - set(bench.TARGETS)
+        if unknown:
+            raise CommandError(f"Unknown targets: {', '.join(sorted(unknown))}")
+
+        baseline = None
+        if options["compare"] and not options["no_compare"]:
+            with open(options["compare"]) as f:
+                recorded = json.load(f)
+            baseline = recorded["results"]
+            recorded_on = (recorded.get("python"), recorded.get("machine"))
+            if recorded_on != (platform.python_version(), platform.machine()):
+                self.stderr.write(
+                    f"Baseline {options['compare']} was recorded with Python "
+                    f"{recorded_on[0]} on {recorded_on[1]}, timings may differ"
+                )
+
+        results = bench.run(options["targets"], options["iterations"])
+        for name, variants in results.items():
+            self.stdout.write(name)
+            for variant, stats in variants.items():
+                self.stdout.write(
+                    f"  {variant:<24} mean {stats['mean_us']:9.1f} µs  "
+                    f"p50 {stats['p50_us']:9.1f}  p95 {stats['p95_us']:9.1f}  "
+                    f"p99 {stats['p99_us']:9.1f}"
+                )
+
+        if options["save"]:
+            with open(options["save"], "w") as f:
+                json.dump(
+                    {
+                        "python": platform.python_version(),
+                        "machine": platform.machine(),
+                        "iterations": options["iterations"],
+                        "results": results,
+                    },
+                    f,
+                    indent=2,
+                )
+            self.stdout.write(f"Saved baseline to {options['save']}")
+
+        if baseline is not None:
+            self.check_regressions(baseline, results, options)
+
+    def check_regressions(self, baseline, results, options):
+        rows = bench.compare(
+            baseline, results, options["threshold"], metric=options["metric"]
+        )
+        self.stdout.write(f"Compared {options['metric']} with {options['compare']}")
+        regressions = []
+        for name, variant, old, new, change, regressed in rows:
+            path = f"{name}.{variant}"
+            line = f"  {path:<40} {old:9.1f} → {new:9.1f} µs  {change:+.0%}"
+            if regressed:
+                regressions.append(path)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} paths regressed by more than "
+                f"{options['threshold']:.0%}: {', '.join(regressions)}"
+            )
@@ -0,0 +1,47 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import datetime as dt
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from ...models import OIDCSession
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove index entries of OIDC sessions that expired, like Django's "
+        "clearsessions does for the sessions themselves."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Index entries deleted per query (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        # Sessions younger than this can't have expired yet; older ones may
+        # still live if they were saved again since
+        cutoff = now() - dt.timedelta(seconds=settings.SESSION_COOKIE_AGE)
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        candidates = OIDCSession.objects.filter(created__lt=cutoff).values_list(
+            "session_key", flat=True
+        )
+
+        expired = [
+            key
+            for key in candidates.iterator(chunk_size=options["batch_size"])
+            if not store.exists(key)
+        ]
+        batch_size = options["batch_size"]
+        for start in range(0, len(expired), batch_size):
+            OIDCSession.objects.filter(
+                session_key__in=expired[start : start + batch_size]
+            ).delete()
+        self.stdout.write(f"Removed {len(expired)} expired OIDC sessions")
@@ -0,0 +1,55 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+from django.core.management.base import BaseCommand
+
+from ...export import DEFAULT_CHUNK_SIZE, FORMATS, export
+
+
+class Command(BaseCommand):
+    help = (
+        "Export every OIDC-linked user with sub, provider, flags, admin team "
+        "membership and timestamps as CSV or JSON lines."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            default="csv",
+            help="Output format (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--output",
+            help="File to write to instead of standard output",
+        )
+        parser.add_argument(
+            "--provider",
+            help='Only users of this provider, "oidc" or the name of an '
+            "[oidc:<name>] section",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Rows fetched from the database at a time (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        chunks = export(
+            format=options["format"],
+            provider=options["provider"],
+            chunk_size=options["chunk_size"],
+        )
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        # Every chunk is a row, and so is the CSV header
+        rows = -1 if options["format"] == "csv" else 0
+        with open(options["output"], "w", newline="", encoding="utf-8") as output:
+            for chunk in chunks:
+                output.write(chunk)
+                rows += 1
+        self.stderr.write(f"Exported {rows} users to {options['output']}")
@@ -0,0 +1,83 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from ...loadtest import run_loadtest
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent OIDC logins against a local stub provider and a test "
+        "database, and report throughput, latency and queries per login."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=100)
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=0,
+            help="Delay of every provider response",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0,
+            help="Fraction of token requests the provider fails (0-1)",
+        )
+        parser.add_argument(
+            "--rotate-every",
+            type=int,
+            default=0,
+            help="Rotate the provider's signing key after this many tokens",
+        )
+        parser.add_argument(
+            "--stateless",
+            action="store_true",
+            help="Use the stateless login start",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the test database between runs",
+        )
+        parser.add_argument("--json", action="store_true", help="Print JSON")
+
+    def handle(self, *args, **options):
+        report = run_loadtest(
+            logins=options["logins"],
+            users=options["users"],
+            concurrency=options["concurrency"],
+            latency=options["latency_ms"] / 1000,
+            error_rate=options["error_rate"],
+            rotate_every=options["rotate_every"],
+            stateless=options["stateless"],
+            keepdb=options["keepdb"],
+        )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{report['succeeded']}/{report['logins']} logins succeeded "
+            f"in {report['duration_s']:.2f} s "
+            f"({report['users']} users, concurrency {report['concurrency']})"
+        )
+        self.stdout.write(f"  logins/s         {report['logins_per_s']:.1f}")
+        if report["succeeded"]:
+            self.stdout.write(
+                f"  latency          p50 {report['p50_ms']:.1f} ms  "
+                f"p95 {report['p95_ms']:.1f} ms  p99 {report['p99_ms']:.1f} ms"
+            )
+            self.stdout.write(
+                f"  queries/login    {report['queries_per_login']:.1f} "
+                f"(max {report['max_queries_per_login']})"
+            )
+        self.stdout.write(f"  outcomes         {report['outcomes']}")
+        self.stdout.write(f"  provider         {report['provider']}")
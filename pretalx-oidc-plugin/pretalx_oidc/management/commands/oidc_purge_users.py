@@ -0,0 +1,141 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import datetime as dt
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils.timezone import now
+from django_scopes import scopes_disabled
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete OIDC-only users who haven't logged in for a number of days and "
+        "have no submissions, answers or team memberships, in small batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Days without a login after which a user is stale "
+            "(default: %(default)s)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Users deleted per transaction (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.5,
+            help="Seconds to wait between batches (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the users that would be deleted",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = now() - dt.timedelta(days=options["days"])
+        with scopes_disabled():
+            stale = self.stale_users(cutoff)
+            if options["dry_run"]:
+                self.stdout.write(
+                    f"Would delete {stale.count()} OIDC users inactive since {cutoff}"
+                )
+                return
+            deleted = self.purge(stale, options["batch_size"], options["sleep"])
+        self.stdout.write(f"Deleted {deleted} OIDC users inactive since {cutoff}")
+
+    def stale_users(self, cutoff):
+        """
+        Users created by OIDC logins that can be removed without losing data.
+
+        The same conditions as ``User.shred()``, for users without a password
+        or privileges whose last login, or link if they never logged in, is
+        before ``cutoff``.
+        """
+        from pretalx.event.models import Team
+        from pretalx.submission.models import Answer, Submission
+
+        User = get_user_model()
+        return (
+            User.objects.filter(
+                oidc_profile__isnull=False,
+                password__startswith=UNUSABLE_PASSWORD_PREFIX,
+                is_staff=False,
+                is_administrator=False,
+                is_superuser=False,
+            )
+            .filter(
+                Q(last_login__lt=cutoff)
+                | Q(last_login__isnull=True, oidc_profile__created__lt=cutoff)
+            )
+            .exclude(
+                Exists(Submission.all_objects.filter(speakers=OuterRef("pk")))
+                | Exists(Team.members.through.objects.filter(user=OuterRef("pk")))
+                | Exists(Answer.objects.filter(person=OuterRef("pk")))
+            )
+        )
+
+    def purge(self, stale, batch_size, sleep):
+        from pretalx.common.models import ActivityLog
+        from pretalx.person.signals import delete_user
+
+        User = get_user_model()
+        user_type = ContentType.objects.get_for_model(User)
+        deleted = 0
+        last_pk = 0
+        while True:
+            # Keyset over the primary key, so every batch starts with an index
+            # lookup instead of skipping the users already looked at
+            batch = list(
+                stale.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch:
+                return deleted
+            last_pk = batch[-1]
+
+            with transaction.atomic():
+                # Checked again under lock: a user may have logged in or
+                # submitted since. Users locked by a login are left for the
+                # next run.
+                users = list(
+                    stale.filter(pk__in=batch).select_for_update(
+                        skip_locked=True, of=("self",)
+                    )
+                )
+                ids = [user.pk for user in users]
+                for user in users:
+                    delete_user.send(None, user=user, db_delete=True)
+                # Log entries protect their users from deletion, see shred()
+                ActivityLog.objects.filter(
+                    content_type=user_type, object_id__in=ids
+                ).delete()
+                ActivityLog.objects.filter(person_id__in=ids).update(person=None)
+                # One query per related table for the whole batch
+                User.objects.filter(pk__in=ids).delete()
+
+                def delete_files(users=users):
+                    for user in users:
+                        user._delete_files()
+
+                transaction.on_commit(delete_files)
+
+            deleted += len(ids)
+            self.stdout.write(f"Deleted {deleted} users")
+            if sleep:
+                time.sleep(sleep)
@@ -0,0 +1,36 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+from django.core.management.base import BaseCommand, CommandError
+from pretalx.common.settings.config import build_config
+
+from ...config import build_oidc_settings
+from ...reload import publish_reload
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-read the [oidc] section of pretalx.cfg in every running pretalx "
+        "process, without restarting them."
+    )
+
+    def handle(self, *args, **options):
+        # Processes keep their settings if the new ones are broken, so catch
+        # mistakes here where they can be reported
+        config, _ = build_config()
+        snapshot = build_oidc_settings(config)
+        if snapshot is None or not snapshot.values.get("OIDC_OP_TOKEN_ENDPOINT"):
+            raise CommandError(
+                "The [oidc] section of pretalx.cfg is incomplete or the discovery "
+                "failed, see the log above. Nothing was reloaded."
+            )
+
+        receivers = publish_reload()
+        if receivers is None:
+            raise CommandError(
+                "Reloading needs the Redis cache. Send SIGHUP to gunicorn instead: "
+                "docker compose kill -s HUP pretalx"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Sent reload to {receivers} pretalx processes")
+        )
@@ -0,0 +1,44 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import datetime as dt
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+from mozilla_django_oidc.utils import import_from_settings
+
+from ...audit import prune_counts, roll_up_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll up old OIDC login events into daily per-user counts and prune "
+        "counts past the retention period, as pretalx's periodic task does."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=import_from_settings("OIDC_LOGIN_AUDIT_KEEP_DAYS", 7),
+            help="Days of individual login events to keep (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=import_from_settings("OIDC_LOGIN_AUDIT_RETENTION_DAYS", 365),
+            help="Days of daily counts to keep, 0 keeps them forever "
+            "(default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        today = now().replace(hour=0, minute=0, second=0, microsecond=0)
+        cutoff = today - dt.timedelta(days=options["keep_days"])
+
+        rolled_up = roll_up_events(cutoff)
+        self.stdout.write(f"Rolled up {rolled_up} login events before {cutoff}")
+
+        if options["retention_days"]:
+            oldest = (today - dt.timedelta(days=options["retention_days"])).date()
+            pruned = prune_counts(oldest)
+            self.stdout.write(f"Pruned {pruned} daily counts before {oldest}")
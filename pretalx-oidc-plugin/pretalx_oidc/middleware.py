@@ -0,0 +1,191 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Session refresh middleware that renews ID tokens server-side.
+"""
+
+import logging
+import random
+import time
+from re import Pattern as re_Pattern
+
+from django.core.cache import cache
+from django.urls import reverse
+from mozilla_django_oidc.middleware import SessionRefresh
+
+from .config import SnapshotSetting, current_settings, use_provider
+from .providers import LOGIN_PROVIDER_SESSION_KEY, PROVIDER_SESSION_KEY, registry
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for how long a single refresh may hold the per-session lock.
+# After a successful refresh the lock stays for this long as a marker, until
+# the renewed tokens are surely saved to the session store.
+REFRESH_LOCK_TIMEOUT = 30
+
+
+def get_token_expiration(now=None):
+    """
+    Return the timestamp at which the current ID token should be renewed.
+
+    The configured expiry is shortened by a random jitter so that sessions
+    created at the same time (e.g. right after a CFP opens) do not all hit the
+    token endpoint in the same second.
+    """
+    # Of the provider in use, which may be an organiser's own
+    snapshot = current_settings()
+    interval = snapshot.get("OIDC_RENEW_ID_TOKEN_EXPIRY_SECONDS", 60 * 15)
+    jitter = snapshot.get("OIDC_RENEW_ID_TOKEN_JITTER_SECONDS", 0)
+    now = time.time() if now is None else now
+    return now + interval - random.uniform(0, min(jitter, interval))
+
+
+class OIDCSessionRefreshMiddleware(SessionRefresh):
+    """
+    Renew expired ID tokens with the refresh_token grant.
+
+    Only when no refresh token is stored, or the provider rejects it, do we
+    fall back to mozilla-django-oidc's silent re-authentication redirect.
+    Both go to the provider the session was logged in with.
+    """
+
+    OIDC_EXEMPT_URLS = SnapshotSetting([])
+    OIDC_OP_AUTHORIZATION_ENDPOINT = SnapshotSetting()
+    OIDC_RP_CLIENT_ID = SnapshotSetting()
+    OIDC_STATE_SIZE = SnapshotSetting(32)
+    OIDC_AUTHENTICATION_REQUEST_URL = SnapshotSetting("oidc_authentication_init")
+    OIDC_AUTHENTICATION_CALLBACK_URL = SnapshotSetting("oidc_authentication_callback")
+    OIDC_RP_SCOPES = SnapshotSetting("openid email")
+    OIDC_USE_NONCE = SnapshotSetting(True)
+    OIDC_NONCE_SIZE = SnapshotSetting(32)
+
+    def __init__(self, get_response):
+        # Skip SessionRefresh's __init__, which reads the settings: the
+        # middleware is installed even if session_refresh is off or the
+        # provider isn't configured (see config.install_request_hooks)
+        super(SessionRefresh, self).__init__(get_response)
+
+    _exempt = None
+
+    def _exempt_urls_and_patterns(self):
+        """
+        Return the exempt URL paths and patterns of the current settings.
+
+        The middleware lives as long as the process, so instead of caching
+        them for good like mozilla-django-oidc, they are cached for the
+        settings they were computed from and follow oidc_reload.
+        """
+        key = (
+            tuple(self.OIDC_EXEMPT_URLS),
+            self.OIDC_AUTHENTICATION_REQUEST_URL,
+            self.OIDC_AUTHENTICATION_CALLBACK_URL,
+        )
+        exempt = self._exempt
+        if exempt is None or exempt[0] != key:
+            exempt_urls, request_url, callback_url = key
+            urls = [url for url in exempt_urls if not isinstance(url, re_Pattern)]
+            urls.extend([request_url, callback_url])
+            exempt = self._exempt = (
+                key,
+                {url if url.startswith("/") else reverse(url) for url in urls},
+                {url for url in exempt_urls if isinstance(url, re_Pattern)},
+            )
+        return exempt[1], exempt[2]
+
+    @property
+    def exempt_urls(self):
+        """Exempt our namespaced login and callback URLs from refreshing."""
+        return self._exempt_urls_and_patterns()[0]
+
+    @property
+    def exempt_url_patterns(self):
+        return self._exempt_urls_and_patterns()[1]
+
+    def process_request(self, request):
+        if not current_settings().get("OIDC_SESSION_REFRESH", False):
+            return None
+        if not self.is_refreshable_url(request):
+            return None
+
+        if request.session.get("oidc_id_token_expiration", 0) > time.time():
+            return None
+
+        name = request.session.get(PROVIDER_SESSION_KEY)
+        provider = registry.get(name)
+        if name and provider is None:
+            # Not the [oidc] provider's business, try again on the next request
+            logger.warning(f"[OIDC] Provider {name} is not available for refresh")
+            return None
+
+        with use_provider(provider):
+            refresh_token = request.session.get("oidc_refresh_token")
+            if (
+                refresh_token
+                and self.renew_session(request, refresh_token) is not False
+            ):
+                return None
+
+            logger.info("[OIDC] Token refresh unavailable, redirecting to provider")
+            if name:
+                request.session[LOGIN_PROVIDER_SESSION_KEY] = name
+            return super().process_request(request)
+
+    def renew_session(self, request, refresh_token):
+        """
+        Renew the tokens stored in the session.
+
+        Returns True on success, False if the refresh failed and None if another
+        request for the same session is refreshing or just refreshed. In the
+        latter case the request is served with the current session instead of
+        sending the refresh token again, which providers that rotate refresh
+        tokens treat as reuse of a stolen token.
+        """
+        from .auth import PretalxOIDCBackend
+
+        lock_key = f"pretalx_oidc:refresh:{request.session.session_key}"
+        if not cache.add(lock_key, 1, timeout=REFRESH_LOCK_TIMEOUT):
+            logger.debug("[OIDC] Token refresh already in progress for this session")
+            return None
+
+        refreshed = False
+        try:
+            # The session was loaded before the lock was taken; another request
+            # may have renewed the tokens and saved them since
+            stored = request.session.__class__(request.session.session_key)
+            if stored.get("oidc_id_token_expiration", 0) > time.time():
+                for key in (
+                    "oidc_access_token",
+                    "oidc_id_token",
+                    "oidc_refresh_token",
+                    "oidc_id_token_expiration",
+                ):
+                    if key in stored:
+                        request.session[key] = stored[key]
+                refreshed = True
+                logger.debug("[OIDC] Tokens were renewed by another request")
+                return True
+
+            backend = PretalxOIDCBackend()
+            token_info = backend.renew_tokens(request.user, refresh_token)
+            if not token_info:
+                request.session.pop("oidc_refresh_token", None)
+                return False
+
+            backend.store_tokens(
+                request.session,
+                token_info.get("access_token"),
+                token_info.get("id_token") or request.session.get("oidc_id_token"),
+                token_info.get("refresh_token") or refresh_token,
+            )
+            request.session["oidc_id_token_expiration"] = get_token_expiration()
+            # Saved now rather than after the response, so requests starting
+            # meanwhile load the renewed tokens; the lock is kept until it
+            # expires for those that loaded the session before
+            request.session.save()
+            refreshed = True
+            logger.info(f"[OIDC] Renewed tokens for user {request.user.pk}")
+            return True
+        finally:
+            if not refreshed:
+                cache.delete(lock_key)
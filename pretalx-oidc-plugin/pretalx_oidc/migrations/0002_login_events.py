@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("pretalx_oidc", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OIDCLoginEvent",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("timestamp", models.DateTimeField(db_index=True)),
+                ("provider", models.CharField(max_length=100)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "OIDC Login Event",
+                "verbose_name_plural": "OIDC Login Events",
+            },
+        ),
+        migrations.CreateModel(
+            name="OIDCLoginDailyCount",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(db_index=True)),
+                ("provider", models.CharField(max_length=100)),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "OIDC Daily Login Count",
+                "verbose_name_plural": "OIDC Daily Login Counts",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "date", "provider"),
+                        name="pretalx_oidc_daily_count_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+from django.db import migrations, models
+
+
+def use_provider_names(apps, schema_editor):
+    # Profiles held the display name of the one provider there was; they all
+    # belong to the [oidc] provider
+    OIDCUserProfile = apps.get_model("pretalx_oidc", "OIDCUserProfile")
+    OIDCUserProfile.objects.exclude(provider="oidc").update(provider="oidc")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pretalx_oidc", "0003_sessions"),
+    ]
+
+    # Schema changes first: PostgreSQL can't alter a table with pending
+    # trigger events from the update
+    operations = [
+        migrations.AddConstraint(
+            model_name="oidcuserprofile",
+            constraint=models.UniqueConstraint(
+                fields=("provider", "oidc_id"),
+                name="pretalx_oidc_profile_provider_sub_unique",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="oidcuserprofile",
+            name="oidc_id",
+            field=models.CharField(
+                help_text="The unique identifier from the OIDC provider",
+                max_length=255,
+                verbose_name="OIDC ID",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="oidcuserprofile",
+            name="provider",
+            field=models.CharField(
+                default="oidc",
+                help_text='"oidc", or the name of an [oidc:<name>] section',
+                max_length=100,
+                verbose_name="OIDC Provider",
+            ),
+        ),
+        migrations.RunPython(use_provider_names, migrations.RunPython.noop),
+    ]
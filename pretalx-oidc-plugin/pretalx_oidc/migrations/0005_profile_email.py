@@ -0,0 +1,49 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_emails(apps, schema_editor):
+    # One statement for all profiles instead of a query per user
+    OIDCUserProfile = apps.get_model("pretalx_oidc", "OIDCUserProfile")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    OIDCUserProfile.objects.update(
+        email=Subquery(User.objects.filter(pk=OuterRef("user_id")).values("email")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("pretalx_oidc", "0004_profile_provider"),
+    ]
+
+    # Schema changes first: PostgreSQL can't alter a table with pending
+    # trigger events from the update
+    operations = [
+        migrations.AddField(
+            model_name="oidcuserprofile",
+            name="email",
+            field=models.EmailField(
+                blank=True,
+                db_index=True,
+                help_text="Copy of the user's email address, for listing and search",
+                max_length=254,
+                verbose_name="Email",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="oidcuserprofile",
+            name="oidc_id",
+            field=models.CharField(
+                db_index=True,
+                help_text="The unique identifier from the OIDC provider",
+                max_length=255,
+                verbose_name="OIDC ID",
+            ),
+        ),
+        migrations.RunPython(copy_emails, migrations.RunPython.noop),
+    ]
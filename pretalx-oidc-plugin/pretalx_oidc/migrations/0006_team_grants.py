@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_default_grants(apps, schema_editor):
+    # Until now the [oidc] provider added its admins to the admin team of the
+    # default organiser; record those memberships so demotions still remove them
+    Team = apps.get_model("event", "Team")
+    OIDCTeamGrant = apps.get_model("pretalx_oidc", "OIDCTeamGrant")
+    OIDCUserProfile = apps.get_model("pretalx_oidc", "OIDCUserProfile")
+    team = Team.objects.filter(organiser__slug="default-org", name="Admin Team").first()
+    if team is None:
+        return
+    members = team.members.filter(
+        pk__in=OIDCUserProfile.objects.filter(provider="oidc").values("user_id")
+    ).values_list("pk", flat=True)
+    OIDCTeamGrant.objects.bulk_create(
+        [OIDCTeamGrant(user_id=pk, team=team, provider="oidc") for pk in members],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("event", "0013_auto_20180407_0817"),
+        ("pretalx_oidc", "0005_profile_email"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OIDCTeamGrant",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("provider", models.CharField(max_length=100)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                (
+                    "team",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="event.team",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "OIDC Team Grant",
+                "verbose_name_plural": "OIDC Team Grants",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "team"),
+                        name="pretalx_oidc_team_grant_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(record_default_grants, migrations.RunPython.noop),
+    ]
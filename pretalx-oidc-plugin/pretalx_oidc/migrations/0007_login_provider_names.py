@@ -0,0 +1,37 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+from django.db import migrations
+from django.db.models import Exists, OuterRef, Subquery
+
+
+def use_provider_names(apps, schema_editor):
+    # Logins were recorded with the provider's display name. A user's logins
+    # all come from the provider of their one profile, which has the name.
+    OIDCUserProfile = apps.get_model("pretalx_oidc", "OIDCUserProfile")
+    OIDCLoginEvent = apps.get_model("pretalx_oidc", "OIDCLoginEvent")
+    OIDCLoginDailyCount = apps.get_model("pretalx_oidc", "OIDCLoginDailyCount")
+    profiles = OIDCUserProfile.objects.filter(user_id=OuterRef("user_id"))
+    profile_provider = Subquery(profiles.values("provider")[:1])
+
+    OIDCLoginEvent.objects.filter(Exists(profiles)).exclude(
+        provider=profile_provider
+    ).update(provider=profile_provider)
+
+    # Counts of a day that was also counted under the name stay as they are
+    counted = OIDCLoginDailyCount.objects.filter(
+        user_id=OuterRef("user_id"), date=OuterRef("date"), provider=profile_provider
+    )
+    OIDCLoginDailyCount.objects.filter(Exists(profiles)).exclude(
+        provider=profile_provider
+    ).exclude(Exists(counted)).update(provider=profile_provider)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pretalx_oidc", "0006_team_grants"),
+    ]
+
+    operations = [
+        migrations.RunPython(use_provider_names, migrations.RunPython.noop),
+    ]
@@ -15,14 +15,22 @@ class OIDCUserProfile(models.Model):
     )
     oidc_id = models.CharField(
         max_length=255,
-        unique=True,
+        # Own index for the prefix search of the profile list
+        db_index=True,
         verbose_name=_("OIDC ID"),
         help_text=_("The unique identifier from the OIDC provider"),
     )
+    email = models.EmailField(
+        blank=True,
+        db_index=True,
+        verbose_name=_("Email"),
+        help_text=_("Copy of the user's email address, for listing and search"),
+    )
     provider = models.CharField(
         max_length=100,
         default="oidc",
         verbose_name=_("OIDC Provider"),
+        help_text=_('"oidc", or the name of an [oidc:<name>] section'),
     )
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
@@ -30,6 +38,127 @@ class OIDCUserProfile(models.Model):
     class Meta:
         verbose_name = _("OIDC User Profile")
         verbose_name_plural = _("OIDC User Profiles")
+        constraints = [
+            # Also the index of the login lookup by provider and sub
+            models.UniqueConstraint(
+                fields=["provider", "oidc_id"],
+                name="pretalx_oidc_profile_provider_sub_unique",
+            )
+        ]
+
+    def __str__(self):
+        # The copied email, so that listing profiles doesn't load their users
+        return f"{self.email} - {self.provider}"
+
+
+class OIDCLoginEvent(models.Model):
+    """
+    One successful OIDC login, kept in a narrow append-only table.
+
+    Old events are rolled up into ``OIDCLoginDailyCount`` by the
+    ``oidc_rollup_logins`` management command.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(
+        "person.User",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    timestamp = models.DateTimeField(db_index=True)
+    provider = models.CharField(max_length=100)
+
+    class Meta:
+        verbose_name = _("OIDC Login Event")
+        verbose_name_plural = _("OIDC Login Events")
+
+    def __str__(self):
+        return f"{self.user_id} - {self.provider} - {self.timestamp}"
+
+
+class OIDCLoginDailyCount(models.Model):
+    """Number of OIDC logins of one user on one day."""
+
+    user = models.ForeignKey(
+        "person.User",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    date = models.DateField(db_index=True)
+    provider = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("OIDC Daily Login Count")
+        verbose_name_plural = _("OIDC Daily Login Counts")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "date", "provider"],
+                name="pretalx_oidc_daily_count_unique",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.provider} - {self.date}: {self.count}"
+
+
+class OIDCSession(models.Model):
+    """
+    A session started with an OIDC login.
+
+    Maps the provider's session id (``sid``) and the user to the Django
+    session key, so back-channel logouts and privilege demotions can end
+    exactly the affected sessions.
+    """
+
+    session_key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(
+        "person.User",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    sid = models.CharField(max_length=255, blank=True, db_index=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("OIDC Session")
+        verbose_name_plural = _("OIDC Sessions")
+
+    def __str__(self):
+        return f"{self.user_id} - {self.sid}"
+
+
+class OIDCTeamGrant(models.Model):
+    """
+    A team membership added by an OIDC login.
+
+    Logins of users who are no longer admins only remove the memberships
+    recorded here, and only those of the provider that added them, so
+    memberships granted in pretalx or by another organiser's provider stay.
+    """
+
+    user = models.ForeignKey(
+        "person.User",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    team = models.ForeignKey(
+        "event.Team",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    provider = models.CharField(max_length=100)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("OIDC Team Grant")
+        verbose_name_plural = _("OIDC Team Grants")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "team"],
+                name="pretalx_oidc_team_grant_unique",
+            )
+        ]
 
     def __str__(self):
-        return f"{self.user.email} - {self.provider}"
+        return f"{self.user_id} - {self.provider} - {self.team_id}"
@@ -0,0 +1,312 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Registry of the OIDC providers of organisers that bring their own.
+
+``[oidc]`` configures the default provider. Every ``[oidc:<name>]`` section
+adds a tenant provider, used for logins on one of its ``hosts``, for events of
+one of its ``organisers`` (slugs) or for users of one of its
+``email_domains``::
+
+    [oidc:acme]
+    op_discovery_endpoint = https://login.acme.org
+    rp_client_id = pretalx
+    rp_client_secret = ...
+    provider_name = ACME
+    hosts = cfp.acme.org
+    organisers = acme
+    email_domains = acme.org
+
+Options that don't describe the provider itself, like ``login_rate``, are
+taken from ``[oidc]``. Reading the sections contacts no provider: a tenant's
+discovery, signing keys and HTTP connection pool are set up on its first login
+and dropped again after ``provider_idle_seconds`` without one.
+"""
+
+import configparser
+import logging
+import threading
+import time
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+from .config import build_oidc_settings, current_provider, current_settings
+from .endpoints import pooled_session
+from .jwks import jwks_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER = "oidc"
+SECTION_PREFIX = "oidc:"
+
+# Options of [oidc] that belong to the default provider and are not inherited,
+# admin_users and superuser in particular
+PROVIDER_OPTIONS = frozenset(
+    {
+        "rp_client_id",
+        "rp_client_secret",
+        "op_discovery_endpoint",
+        "op_authorization_endpoint",
+        "op_token_endpoint",
+        "op_user_endpoint",
+        "op_jwks_endpoint",
+        "op_introspection_endpoint",
+        "provider_name",
+        "rp_sign_algo",
+        "rp_scopes",
+        "admin_users",
+        "superuser",
+        "hosts",
+        "organisers",
+        "email_domains",
+    }
+)
+
+# Seconds before a provider whose setup failed is tried again
+RETRY_SECONDS = 30
+
+# Seconds between checks for idle providers
+EVICTION_INTERVAL = 60
+
+# Session entries naming the tenant provider of a login in progress, and of
+# the logged-in user
+LOGIN_PROVIDER_SESSION_KEY = "oidc_login_provider"
+PROVIDER_SESSION_KEY = "oidc_provider"
+
+
+def _names(value):
+    return frozenset(x.strip().lower() for x in value.split(",") if x.strip())
+
+
+class ProviderConfig(NamedTuple):
+    """The options of one [oidc:<name>] section, merged with [oidc]."""
+
+    name: str
+    options: Mapping[str, str]
+    hosts: frozenset
+    organisers: frozenset
+    email_domains: frozenset
+
+    @property
+    def display_name(self):
+        return self.options.get("provider_name") or self.name
+
+    def as_config(self):
+        """Return the options as the [oidc] section build_oidc_settings reads."""
+        config = configparser.RawConfigParser()
+        config.read_dict({"oidc": dict(self.options)})
+        return config
+
+
+class Provider:
+    """A tenant provider after its setup."""
+
+    def __init__(self, name, settings):
+        self.name = name
+        self.settings = settings
+        self.http = pooled_session()
+        self.last_used = time.monotonic()
+
+    def close(self):
+        self.http.close()
+        if self.settings.endpoints is not None:
+            jwks_endpoints = self.settings.endpoints.urls("OIDC_OP_JWKS_ENDPOINT")
+        else:
+            jwks_endpoints = [self.settings.values.get("OIDC_OP_JWKS_ENDPOINT")]
+        for jwks_endpoint in filter(None, jwks_endpoints):
+            jwks_cache.discard(jwks_endpoint)
+
+
+class ProviderRegistry:
+    """
+    Tenant providers by name, with host, organiser and email domain routes.
+
+    The routes are plain dicts swapped as a whole, so lookups take no lock.
+    Providers are set up under a lock per name, so concurrent first logins of
+    a tenant run its discovery once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._setup_locks = {}
+        self._configs = {}
+        self._hosts = {}
+        self._organisers = {}
+        self._email_domains = {}
+        self._providers = {}
+        self._failed = {}
+        self._last_eviction = time.monotonic()
+
+    def configure(self, config):
+        """Read the [oidc:<name>] sections, dropping all providers set up so far."""
+        inherited = {}
+        if config.has_section("oidc"):
+            inherited = {
+                key: value
+                for key, value in config.items("oidc", raw=True)
+                if key not in PROVIDER_OPTIONS
+            }
+
+        configs = {}
+        for section in config.sections():
+            if not section.startswith(SECTION_PREFIX):
+                continue
+            name = section[len(SECTION_PREFIX) :].strip()
+            if not name or name == DEFAULT_PROVIDER:
+                logger.error(f"[OIDC] Invalid provider section name: [{section}]")
+                continue
+            options = {**inherited, **dict(config.items(section, raw=True))}
+            configs[name] = ProviderConfig(
+                name=name,
+                options=MappingProxyType(options),
+                hosts=_names(options.get("hosts", "")),
+                organisers=_names(options.get("organisers", "")),
+                email_domains=_names(options.get("email_domains", "")),
+            )
+
+        with self._lock:
+            previous = self._providers
+            self._configs = configs
+            self._hosts = self._routes(configs, "hosts")
+            self._organisers = self._routes(configs, "organisers")
+            self._email_domains = self._routes(configs, "email_domains")
+            self._providers = {}
+            self._failed = {}
+        for provider in previous.values():
+            provider.close()
+        if configs:
+            logger.info(f"[OIDC] Tenant providers: {', '.join(sorted(configs))}")
+
+    @staticmethod
+    def _routes(configs, field):
+        routes = {}
+        for config in configs.values():
+            for key in getattr(config, field):
+                if key in routes:
+                    logger.warning(
+                        f"[OIDC] {field} entry {key} of [oidc:{config.name}] is "
+                        f"already used by [oidc:{routes[key]}]"
+                    )
+                    continue
+                routes[key] = config.name
+        return routes
+
+    def __contains__(self, name):
+        return name in self._configs
+
+    def get_config(self, name):
+        return self._configs.get(name)
+
+    def names(self):
+        return sorted(self._configs)
+
+    @property
+    def has_organisers(self):
+        return bool(self._organisers)
+
+    @property
+    def has_email_domains(self):
+        return bool(self._email_domains)
+
+    def route(self, host=None, organiser=None, email=None):
+        """Return the name of the provider for a login, by default "oidc"."""
+        if host:
+            name = self._hosts.get(host.lower().rsplit(":", 1)[0])
+            if name:
+                return name
+        if organiser:
+            name = self._organisers.get(organiser.lower())
+            if name:
+                return name
+        if email and "@" in email:
+            name = self._email_domains.get(email.rsplit("@", 1)[1].strip().lower())
+            if name:
+                return name
+        return DEFAULT_PROVIDER
+
+    def get(self, name):
+        """
+        Return the tenant provider ``name``, setting it up on first use.
+
+        Returns None for the default provider, and for unknown providers or
+        ones whose setup failed; ``name in registry`` tells them apart.
+        """
+        provider = self._providers.get(name)
+        if provider is None and name in self._configs:
+            provider = self._setup(name)
+        if provider is not None:
+            provider.last_used = time.monotonic()
+        self._evict_idle()
+        return provider
+
+    def _setup(self, name):
+        with self._lock:
+            lock = self._setup_locks.setdefault(name, threading.Lock())
+        with lock:
+            provider = self._providers.get(name)
+            if provider is not None:
+                return provider
+            failed_at = self._failed.get(name)
+            if failed_at is not None and time.monotonic() - failed_at < RETRY_SECONDS:
+                return None
+
+            config = self._configs[name]
+            started = time.perf_counter()
+            snapshot = build_oidc_settings(config.as_config())
+            if snapshot is None or not snapshot.values.get("OIDC_OP_TOKEN_ENDPOINT"):
+                logger.error(f"[OIDC] Could not set up provider {name}")
+                self._failed[name] = time.monotonic()
+                return None
+
+            provider = Provider(name, snapshot)
+            with self._lock:
+                # Unless the configuration was reloaded in the meantime
+                if self._configs.get(name) is config:
+                    self._providers = {**self._providers, name: provider}
+            logger.info(
+                f"[OIDC] Set up provider {name} in "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+            return provider
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        if now - self._last_eviction < EVICTION_INTERVAL:
+            return
+        self._last_eviction = now
+        idle_seconds = current_settings().get("OIDC_PROVIDER_IDLE_SECONDS", 3600)
+        with self._lock:
+            idle = [
+                provider
+                for provider in self._providers.values()
+                if now - provider.last_used > idle_seconds
+            ]
+            if not idle:
+                return
+            self._providers = {
+                name: provider
+                for name, provider in self._providers.items()
+                if provider not in idle
+            }
+        for provider in idle:
+            provider.close()
+            logger.info(f"[OIDC] Dropped idle provider {provider.name}")
+
+
+registry = ProviderRegistry()
+
+# Connection pool of the [oidc] provider
+_default_http = pooled_session()
+
+
+def provider_name():
+    """Return the name of the provider in use, as stored in OIDC profiles."""
+    provider = current_provider()
+    return provider.name if provider is not None else DEFAULT_PROVIDER
+
+
+def http_session():
+    """Return the pooled HTTP session for requests to the provider in use."""
+    provider = current_provider()
+    return provider.http if provider is not None else _default_http
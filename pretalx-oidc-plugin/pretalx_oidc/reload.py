@@ -0,0 +1,119 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Reload the [oidc] configuration in every pretalx process, without restarts.
+
+``manage.py oidc_reload`` increments a generation counter in Redis and
+publishes it. Each process subscribes from a background thread and reloads
+when it sees a generation it hasn't applied yet. Processes forked later, like
+gunicorn workers replaced after ``max_requests``, compare the counter when
+they subscribe, so they catch up on reloads that happened before they started.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from .admission import get_redis_client
+from .config import reload_oidc_settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "pretalx_oidc:reload"
+GENERATION_KEY = "pretalx_oidc:reload:generation"
+
+# Seconds to wait before subscribing again after losing the connection
+RECONNECT_SECONDS = 5
+
+_lock = threading.Lock()
+_listener_pid = None
+_generation = None
+
+
+def get_generation(client):
+    return int(client.get(GENERATION_KEY) or 0)
+
+
+def mark_loaded():
+    """Record the generation the settings of this process were loaded at."""
+    global _generation
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        _generation = get_generation(client)
+    except Exception as e:
+        logger.warning(f"[OIDC] Could not read the reload generation: {e}")
+
+
+def publish_reload():
+    """
+    Ask every subscribed process to reload its OIDC settings.
+
+    Returns the number of processes that received the message, or None
+    without a Redis cache.
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+    generation = client.incr(GENERATION_KEY)
+    return client.publish(CHANNEL, generation)
+
+
+def _apply(generation):
+    global _generation
+    if _generation is None:
+        # Redis was unavailable when the settings were loaded
+        _generation = generation
+        return
+    if generation == _generation:
+        return
+    # Recorded either way, a broken configuration is not retried until the next
+    # oidc_reload
+    _generation = generation
+    reload_oidc_settings()
+
+
+def _listen(client):
+    while True:
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            # Subscribed first, so no reload can slip in between
+            _apply(get_generation(client))
+            for message in pubsub.listen():
+                _apply(int(message["data"]))
+        except Exception as e:
+            logger.warning(f"[OIDC] Reload listener disconnected from Redis: {e}")
+            time.sleep(RECONNECT_SECONDS)
+
+
+def start_listener(**kwargs):
+    """
+    Subscribe this process to reload broadcasts.
+
+    Connected to ``request_started``, so it runs in the processes that serve
+    requests rather than in a preloading master, and disconnects itself once
+    the listener runs.
+    """
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _lock:
+        if _listener_pid == os.getpid():
+            return
+        _listener_pid = os.getpid()
+
+        from django.core.signals import request_started
+
+        request_started.disconnect(start_listener)
+
+        client = get_redis_client()
+        if client is None:
+            logger.info("[OIDC] No Redis cache, oidc_reload is not available")
+            return
+        threading.Thread(
+            target=_listen, args=(client,), name="pretalx_oidc_reload", daemon=True
+        ).start()
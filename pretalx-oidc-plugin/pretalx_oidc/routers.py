@@ -0,0 +1,90 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Database router that sends the plugin's login lookups to a read replica.
+
+Only reads made inside ``replica_reads()`` go to the ``replica`` database;
+everything else pretalx does stays on the primary. The first write of a
+request, such as creating a user or updating a profile, pins the rest of that
+request to the primary, so it never reads data older than its own writes.
+"""
+
+import contextlib
+import contextvars
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import receiver
+
+REPLICA_ALIAS = "replica"
+
+_replica_reads = contextvars.ContextVar("pretalx_oidc_replica_reads", default=False)
+_pinned = contextvars.ContextVar("pretalx_oidc_pinned", default=False)
+
+
+def has_replica():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextlib.contextmanager
+def replica_reads():
+    """Allow the reads in this block (or decorated function) to use the replica."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary():
+    """Send all further reads of the current request to the primary."""
+    _pinned.set(True)
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@receiver(request_started)
+def unpin(**kwargs):
+    # Worker threads are reused, so every request starts unpinned
+    _pinned.set(False)
+
+
+class ReplicaRouter:
+    """Route reads inside ``replica_reads()`` to the replica until a write."""
+
+    def db_for_read(self, model, **hints):
+        use_replica = (
+            _replica_reads.get()
+            and not _pinned.get()
+            and has_replica()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        )
+        if use_replica:
+            return REPLICA_ALIAS
+
+        # Without this, related objects of an instance loaded from the
+        # replica would be read from the replica as well
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db == REPLICA_ALIAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        # Instances loaded from the replica are saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_ALIAS:
+            return False
+        return None
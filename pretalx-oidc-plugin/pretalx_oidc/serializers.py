@@ -0,0 +1,38 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compact session serializer, enabled with ``session_serializer = msgpack`` in
+the ``[redis]`` section of pretalx.cfg.
+
+Sessions stored as JSON by Django's default serializer can still be read, so
+switching to MessagePack doesn't log anybody out. Switching back does.
+"""
+
+from django.contrib.sessions.serializers import JSONSerializer
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+
+class MsgPackSerializer:
+    """Serialize sessions with MessagePack, reading JSON sessions as well."""
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError(
+                "session_serializer = msgpack needs the msgpack package, "
+                "install pretalx-oidc[msgpack]"
+            )
+        self.json = JSONSerializer()
+
+    def dumps(self, obj):
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, data):
+        # JSON sessions are objects, MessagePack maps never start with "{"
+        if data[:1] == b"{":
+            return self.json.loads(data)
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
@@ -0,0 +1,174 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Index of the sessions created by OIDC logins, and back-channel logout.
+
+The provider's session id (``sid`` claim) is remembered in the session when
+the ID token is verified. Once ``login()`` has rotated the session key, the
+final key is written to ``OIDCSession`` together with the user and the
+``sid``. Logout tokens and privilege demotions look up the affected session
+keys there and delete exactly those sessions, instead of scanning the whole
+session store.
+"""
+
+import hashlib
+import logging
+import time
+from importlib import import_module
+
+import jwt
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core.cache import cache
+from django.dispatch import receiver
+
+from .config import current_settings
+from .jwks import jwks_cache
+from .models import OIDCSession
+from .providers import provider_name
+
+logger = logging.getLogger(__name__)
+
+# Session entry holding the provider's session id until the login completes
+SID_SESSION_KEY = "oidc_sid"
+
+BACKCHANNEL_LOGOUT_EVENT = "http://schemas.openid.net/event/backchannel-logout"
+
+
+def remember_sid(session, payload):
+    """Keep the ``sid`` of a verified ID token for the index entry."""
+    session[SID_SESSION_KEY] = payload.get("sid") or ""
+
+
+@receiver(user_logged_in, dispatch_uid="pretalx_oidc_index_session")
+def index_session(sender, request, user, **kwargs):
+    # Only OIDC logins remember a sid, even if the provider sent none
+    if request is None or SID_SESSION_KEY not in request.session:
+        return
+    OIDCSession.objects.bulk_create(
+        [
+            OIDCSession(
+                session_key=request.session.session_key,
+                user_id=user.pk,
+                sid=request.session[SID_SESSION_KEY],
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+@receiver(user_logged_out, dispatch_uid="pretalx_oidc_unindex_session")
+def unindex_session(sender, request, user, **kwargs):
+    if request is None or SID_SESSION_KEY not in request.session:
+        return
+    OIDCSession.objects.filter(session_key=request.session.session_key).delete()
+
+
+def end_sessions(index):
+    """
+    Delete the sessions of the given ``OIDCSession`` queryset.
+
+    Returns the number of sessions ended. Sessions stored in signed cookies
+    can't be revoked on the server.
+    """
+    session_keys = list(index.values_list("session_key", flat=True))
+    if not session_keys:
+        return 0
+    store = import_module(settings.SESSION_ENGINE).SessionStore()
+    for session_key in session_keys:
+        store.delete(session_key)
+    OIDCSession.objects.filter(session_key__in=session_keys).delete()
+    return len(session_keys)
+
+
+def end_user_sessions(user):
+    """Log the user out of every session started with an OIDC login."""
+    ended = end_sessions(OIDCSession.objects.filter(user_id=user.pk))
+    if ended:
+        logger.warning("[OIDC] Ended %s sessions of user %s", ended, user.pk)
+    return ended
+
+
+def verify_logout_token(token):
+    """
+    Return the claims of a valid back-channel logout token.
+
+    Checks the signature, issuer, audience and the claims required by
+    OpenID Connect Back-Channel Logout 1.0, section 2.6. The ``jti`` of each
+    accepted token is remembered in the cache until the token expires, so a
+    captured token can't be replayed.
+    """
+    snapshot = current_settings()
+    algorithm = snapshot.get("OIDC_RP_SIGN_ALGO", "RS256")
+    if jwt.get_unverified_header(token).get("alg") != algorithm:
+        raise jwt.InvalidTokenError("Unexpected token algorithm")
+
+    if algorithm.startswith(("RS", "ES")):
+        key = snapshot.get("OIDC_RP_IDP_SIGN_KEY", None) or snapshot.call(
+            "OIDC_OP_JWKS_ENDPOINT",
+            lambda url: jwks_cache.get_signing_key(
+                token, url, verify_kid=snapshot.get("OIDC_VERIFY_KID", True)
+            ),
+            failover=True,
+        )
+    else:
+        key = snapshot.get("OIDC_RP_CLIENT_SECRET")
+
+    issuer = snapshot.get("OIDC_OP_ISSUER", None)
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=snapshot.get("OIDC_RP_CLIENT_ID"),
+        issuer=issuer,
+        options={
+            "require": ["iat", "exp", "jti", "aud"],
+            "verify_iss": bool(issuer),
+        },
+    )
+
+    events = claims.get("events")
+    if not isinstance(events, dict) or BACKCHANNEL_LOGOUT_EVENT not in events:
+        raise jwt.InvalidTokenError("Not a logout token")
+    if not claims.get("sid") and not claims.get("sub"):
+        raise jwt.InvalidTokenError("Logout token has neither sid nor sub")
+    if "nonce" in claims:
+        raise jwt.InvalidTokenError("Logout token must not contain a nonce")
+
+    replay_key = (
+        "pretalx_oidc:logout_jti:"
+        + hashlib.sha256(
+            f"{claims.get('iss', '')}:{claims['jti']}".encode()
+        ).hexdigest()
+    )
+    timeout = max(int(claims["exp"] - time.time()), 1)
+    if not cache.add(replay_key, 1, timeout=timeout):
+        raise jwt.InvalidTokenError("Logout token was already used")
+    return claims
+
+
+def backchannel_logout(token):
+    """
+    End the sessions named by a logout token.
+
+    With a ``sid`` only the sessions of that provider session end, with just
+    a ``sub`` all OIDC sessions of the user. Only users of the provider in use
+    are affected. Returns the number of sessions ended; invalid tokens raise
+    ``jwt.InvalidTokenError``, or ``SuspiciousOperation`` if no signing key
+    matches.
+    """
+    claims = verify_logout_token(token)
+    index = OIDCSession.objects.filter(user__oidc_profile__provider=provider_name())
+    if claims.get("sid"):
+        index = index.filter(sid=claims["sid"])
+    if claims.get("sub"):
+        index = index.filter(user__oidc_profile__oidc_id=claims["sub"])
+    ended = end_sessions(index)
+    logger.info(
+        "[OIDC] Back-channel logout ended %s sessions: sid=%s sub=%s",
+        ended,
+        claims.get("sid"),
+        claims.get("sub"),
+    )
+    return ended
@@ -2,34 +2,48 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import logging
+from urllib.parse import urlencode
 
 from django.conf import settings
+from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.urls import reverse
+from django.utils.html import escape
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 from pretalx.cfp.signals import html_above_profile_page
 from pretalx.cfp.signals import html_head as cfp_html_head
-from pretalx.common.signals import auth_html
+from pretalx.common.signals import auth_html, periodic_task
 from pretalx.orga.signals import html_head as orga_html_head
+from pretalx.orga.signals import nav_global
+
+from .audit import roll_up_logins
+from .config import current_settings
+from .models import OIDCUserProfile
+from .providers import DEFAULT_PROVIDER, registry
 
 logger = logging.getLogger(__name__)
 
 
 def should_hide_password_form():
     """Check if password forms should be hidden based on configuration."""
-    try:
-        from pretalx.common.settings.config import build_config
+    return current_settings().hide_password_form
 
-        config, _ = build_config()
-        if config.has_section("oidc"):
-            return config.getboolean("oidc", "hide_password_form", fallback=False)
-    except Exception:
-        pass
-    return False
 
+def needs_password_hide_css():
+    """
+    Check if password forms have to be hidden with CSS.
+
+    Not needed when settings.py selected the OIDC-only template variants, which
+    leave the forms out (see patch_oidc_only_templates.py). The CSS remains for
+    pretalx installations without them.
+    """
+    if getattr(settings, "OIDC_ONLY_TEMPLATES", False):
+        return False
+    return should_hide_password_form()
 
-# CSS to hide password authentication forms
+
+# CSS to hide password authentication forms, see needs_password_hide_css()
 PASSWORD_HIDE_CSS = """
 <style>
     /* Hide password login and registration form elements */
@@ -111,17 +125,25 @@ def add_oidc_login_button(sender, request, next_url=None, **kwargs):
     """Add OIDC login button to the authentication page."""
     logger.info(f"[OIDC] auth_html signal received - sender: {sender}")
     try:
-        login_url = reverse("plugins:pretalx_oidc:oidc_authentication_init")
+        from .views import select_provider
+
+        init_url = reverse("plugins:pretalx_oidc:oidc_authentication_init")
+        params = {"next": next_url} if next_url else {}
 
-        if next_url:
-            login_url = f"{login_url}?next={next_url}"
+        # Straight to the provider of the host or organiser, without asking
+        name = select_provider(request)
+        if name == DEFAULT_PROVIDER:
+            # Get provider name from settings, fallback to "OIDC" if not set
+            provider_name = getattr(settings, "OIDC_PROVIDER_NAME", "OIDC")
+        else:
+            provider_name = registry.get_config(name).display_name
+            params["provider"] = name
 
-        # Get provider name from settings, fallback to "OIDC" if not set
-        provider_name = getattr(settings, "OIDC_PROVIDER_NAME", "OIDC")
+        login_url = f"{init_url}?{urlencode(params)}" if params else init_url
         button_text = _("Sign in with {provider}").format(provider=provider_name)
 
         # Check if we should hide password forms
-        hide_password = should_hide_password_form()
+        hide_password = needs_password_hide_css()
         logger.info(f"[OIDC] hide_password_form config: {hide_password}")
 
         # Build the complete HTML including CSS and button
@@ -141,13 +163,27 @@ def add_oidc_login_button(sender, request, next_url=None, **kwargs):
         html_parts.append(
             f"""
     <div class="auth-form-block w-100" id="oidc-login-only">
-        <a class="btn btn-lg btn-primary btn-block" href="{login_url}">
+        <a class="btn btn-lg btn-primary btn-block" href="{escape(login_url)}">
             <i class="fa fa-sign-in"></i> {button_text}
         </a>
     </div>
     """
         )
 
+        if name == DEFAULT_PROVIDER and registry.has_email_domains:
+            # Organisations with their own provider are found by email domain;
+            # the login view asks for the address, as this is inside a form
+            email_url = f"{init_url}?{urlencode({**params, 'discover': 1})}"
+            html_parts.append(
+                f"""
+    <div class="auth-form-block w-100" id="oidc-login-email">
+        <a class="btn btn-lg btn-outline-primary btn-block" href="{escape(email_url)}">
+            {escape(_("Sign in with your organisation"))}
+        </a>
+    </div>
+    """
+            )
+
         result = "\n".join(html_parts)
         logger.info(
             f"[OIDC] Returning HTML (length: {len(result)}, has <style>: {'<style>' in result})"
@@ -166,7 +202,7 @@ def add_cfp_css(sender, request, **kwargs):
     )
     # This signal is called for both event-specific and global pages
     # sender will be the event or None for global pages
-    if should_hide_password_form():
+    if needs_password_hide_css():
         return mark_safe(PASSWORD_HIDE_CSS)
     return ""
 
@@ -179,7 +215,7 @@ def add_orga_css(sender, request, **kwargs):
     )
     # This signal is called for both event-specific and global pages
     # sender will be the event or None for global pages (like /orga/ login)
-    if should_hide_password_form():
+    if needs_password_hide_css():
         return mark_safe(PASSWORD_HIDE_CSS)
     return ""
 
@@ -195,10 +231,45 @@ def add_profile_css(sender, request, **kwargs):
     logger.info(
         f"[OIDC] html_above_profile_page signal received - sender: {sender}, path: {path}"
     )
-    if should_hide_password_form():
+    if needs_password_hide_css():
         # Add timestamp to prevent caching
         import time
 
         timestamp = int(time.time())
         return mark_safe(f"<!-- OIDC Profile CSS v{timestamp} -->\n{PASSWORD_HIDE_CSS}")
     return ""
+
+
+@receiver(nav_global)
+def add_profile_list_nav(sender, request, **kwargs):
+    """Link the OIDC profile list in the global navigation of administrators."""
+    if not getattr(request.user, "is_administrator", False):
+        return []
+    url_name = getattr(request.resolver_match, "url_name", None)
+    return [
+        {
+            "label": _("OIDC profiles"),
+            "url": reverse("plugins:pretalx_oidc:oidc_profiles"),
+            "icon": "id-card",
+            "active": url_name == "oidc_profiles",
+        }
+    ]
+
+
+@receiver(
+    post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid="pretalx_oidc_copy_email"
+)
+def copy_user_email(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the email address copied to the user's OIDC profile current."""
+    # New users get their profile after this, with the email
+    if created or (update_fields is not None and "email" not in update_fields):
+        return
+    OIDCUserProfile.objects.filter(user_id=instance.pk).exclude(
+        email=instance.email
+    ).update(email=instance.email)
+
+
+@receiver(periodic_task, dispatch_uid="pretalx_oidc_roll_up_logins")
+def roll_up_login_events(sender, **kwargs):
+    """Roll up old login events when pretalx runs its periodic tasks."""
+    roll_up_logins()
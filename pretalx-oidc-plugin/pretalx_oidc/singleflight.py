@@ -0,0 +1,73 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Single-flight coordination of OIDC callbacks.
+
+Browsers sometimes submit the same callback twice (retries, back button,
+double clicks). Only the first request for a ``state`` exchanges the
+authorization code; duplicates wait for its outcome in the Django cache and
+reuse it instead of presenting the already used code to the provider.
+"""
+
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from mozilla_django_oidc.utils import import_from_settings
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+
+# How often duplicates check whether the first request has finished
+POLL_INTERVAL = 0.1
+
+
+def _key(state):
+    digest = hashlib.sha256(state.encode()).hexdigest()
+    return f"pretalx_oidc:callback:{digest}"
+
+
+def session_origin(request, state):
+    """Fingerprint of the session and state cookies the callback arrived with."""
+    from .state import cookie_name
+
+    cookies = (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME, ""),
+        request.COOKIES.get(cookie_name(state), ""),
+    )
+    return hashlib.sha256("|".join(cookies).encode()).hexdigest()
+
+
+def claim(state):
+    """Return True if this request is the first one for ``state``."""
+    timeout = import_from_settings("OIDC_CALLBACK_WAIT_SECONDS", 15) * 2
+    return cache.add(_key(state), PENDING, timeout=timeout)
+
+
+def release(state):
+    """Give up a claim without an outcome, so that a retry can claim it again."""
+    cache.delete(_key(state))
+
+
+def publish(state, outcome):
+    """Store the outcome of the first request for its duplicates."""
+    timeout = import_from_settings("OIDC_CALLBACK_OUTCOME_TTL", 60)
+    cache.set(_key(state), outcome, timeout=timeout)
+
+
+def wait(state):
+    """Wait for the first request to publish its outcome; None on timeout."""
+    deadline = time.monotonic() + import_from_settings("OIDC_CALLBACK_WAIT_SECONDS", 15)
+    while time.monotonic() < deadline:
+        outcome = cache.get(_key(state))
+        if outcome is None:
+            return None
+        if outcome != PENDING:
+            return outcome
+        time.sleep(POLL_INTERVAL)
+    logger.warning("[OIDC] Timed out waiting for a concurrent callback")
+    return None
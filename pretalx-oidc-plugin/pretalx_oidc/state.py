@@ -0,0 +1,104 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Stateless authorization state carried in an encrypted cookie.
+
+Instead of storing state, nonce and PKCE verifier in the session when a login
+starts, they are encrypted and authenticated with a key derived from
+SECRET_KEY (Fernet) and handed to the browser in a short-lived cookie that is
+only sent to the callback URL. Starting a login then needs no session write.
+"""
+
+import base64
+import functools
+import hashlib
+import json
+import logging
+from urllib.parse import urljoin, urlsplit
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.conf import settings
+from django.urls import reverse
+from mozilla_django_oidc.utils import import_from_settings
+
+logger = logging.getLogger(__name__)
+
+COOKIE_PREFIX = "pretalx_oidc_state_"
+
+
+@functools.lru_cache(maxsize=None)
+def get_callback_url():
+    """
+    Return the absolute callback URL, computed once from the site URL.
+
+    The same value is sent to the provider when the login starts and again
+    with the token request, so both sides agree without looking at the request.
+    """
+    callback = reverse(
+        import_from_settings(
+            "OIDC_AUTHENTICATION_CALLBACK_URL", "oidc_authentication_callback"
+        )
+    )
+    url = urljoin(getattr(settings, "SITE_URL", "http://localhost"), callback)
+    force_https = import_from_settings("OIDC_FORCE_HTTPS_REDIRECT", False)
+    if force_https and url.startswith("http://"):
+        url = url.replace("http://", "https://", 1)
+    return url
+
+
+@functools.lru_cache(maxsize=1)
+def _fernet(secret_key):
+    digest = hashlib.sha256(f"pretalx_oidc.state:{secret_key}".encode()).digest()
+    return Fernet(base64.urlsafe_b64encode(digest))
+
+
+def cookie_name(state):
+    return COOKIE_PREFIX + hashlib.sha256(state.encode()).hexdigest()[:12]
+
+
+def set_state_cookie(response, state, payload):
+    """Attach the encrypted authorization state to ``response``."""
+    token = _fernet(settings.SECRET_KEY).encrypt(json.dumps(payload).encode())
+    callback_url = get_callback_url()
+    response.set_cookie(
+        cookie_name(state),
+        token.decode(),
+        max_age=import_from_settings("OIDC_STATE_MAX_AGE", 600),
+        path=urlsplit(callback_url).path,
+        secure=callback_url.startswith("https://"),
+        httponly=True,
+        samesite="Lax",
+    )
+
+
+def read_state_cookie(request, state):
+    """
+    Return the authorization state stored for ``state``.
+
+    Returns None if there is no cookie for this state, or it is expired,
+    tampered with or was issued for a different state.
+    """
+    token = request.COOKIES.get(cookie_name(state))
+    if not token:
+        return None
+
+    try:
+        data = _fernet(settings.SECRET_KEY).decrypt(
+            token.encode(), ttl=import_from_settings("OIDC_STATE_MAX_AGE", 600)
+        )
+        payload = json.loads(data)
+    except (InvalidToken, ValueError):
+        logger.warning("[OIDC] Invalid or expired authorization state cookie")
+        return None
+
+    if payload.get("state") != state:
+        logger.warning("[OIDC] Authorization state cookie does not match state")
+        return None
+    return payload
+
+
+def delete_state_cookie(response, state):
+    response.delete_cookie(
+        cookie_name(state), path=urlsplit(get_callback_url()).path, samesite="Lax"
+    )
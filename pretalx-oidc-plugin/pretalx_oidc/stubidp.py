@@ -0,0 +1,279 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+A minimal OpenID Connect provider for load tests, served from a local thread.
+
+It implements discovery, authorization (which logs in the user named by
+``login_hint`` without asking), token, userinfo and JWKS endpoints. Latency,
+signing key rotation and failing token requests can be configured to see how
+the plugin behaves under a slow or flaky provider. Not for production use.
+"""
+
+import base64
+import contextlib
+import json
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.test import override_settings
+
+from .config import override_oidc_settings
+
+CLIENT_ID = "pretalx-loadtest"
+CLIENT_SECRET = "pretalx-loadtest-secret"
+
+
+class StubIdP:
+    """
+    Stub OIDC provider listening on ``127.0.0.1``.
+
+    Args:
+        latency: Seconds every response is delayed by.
+        error_rate: Fraction of token requests answered with a 500.
+        rotate_every: Issue a new signing key after this many tokens (0: never).
+            The previous key stays in the JWKS, as with real providers.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, rotate_every=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rotate_every = rotate_every
+        self.lock = threading.Lock()
+        self.keys = []  # (kid, private key), newest last
+        self.codes = {}  # code -> (claims, nonce)
+        self.access_tokens = {}  # access token -> claims
+        self.stats = {"authorize": 0, "token": 0, "token_errors": 0, "jwks": 0}
+        self.issued = 0
+        self.rotate_key()
+        self.server = None
+        self.thread = None
+
+    @property
+    def issuer(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def endpoint(self, path):
+        return f"{self.issuer}{path}"
+
+    def start(self):
+        handler = type("Handler", (StubIdPRequestHandler,), {"idp": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def rotate_key(self):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        with self.lock:
+            self.keys = self.keys[-1:] + [(secrets.token_hex(8), key)]
+
+    def discovery(self):
+        return {
+            "issuer": self.issuer,
+            "authorization_endpoint": self.endpoint("/authorize"),
+            "token_endpoint": self.endpoint("/token"),
+            "userinfo_endpoint": self.endpoint("/userinfo"),
+            "jwks_uri": self.endpoint("/jwks"),
+            "id_token_signing_alg_values_supported": ["RS256"],
+        }
+
+    def jwks(self):
+        with self.lock:
+            keys = list(self.keys)
+        result = []
+        for kid, key in keys:
+            numbers = key.public_key().public_numbers()
+            result.append(
+                {
+                    "kty": "RSA",
+                    "use": "sig",
+                    "alg": "RS256",
+                    "kid": kid,
+                    "n": _b64_int(numbers.n),
+                    "e": _b64_int(numbers.e),
+                }
+            )
+        return {"keys": result}
+
+    @staticmethod
+    def claims_for(login_hint):
+        return {
+            "sub": f"loadtest-{login_hint}",
+            "email": f"{login_hint}@loadtest.invalid",
+            "name": f"Load Test {login_hint}",
+            "email_verified": True,
+        }
+
+    def authorize(self, params):
+        code = secrets.token_urlsafe(24)
+        claims = self.claims_for(params.get("login_hint", "user"))
+        with self.lock:
+            self.stats["authorize"] += 1
+            self.codes[code] = (claims, params.get("nonce"))
+        query = {"code": code, "state": params.get("state", "")}
+        return f"{params['redirect_uri']}?{urlencode(query)}"
+
+    def token(self, params):
+        """Return (status, body) for a token request."""
+        with self.lock:
+            self.stats["token"] += 1
+            entry = self.codes.pop(params.get("code"), None)
+            if random.random() < self.error_rate:
+                self.stats["token_errors"] += 1
+                return 500, {"error": "server_error"}
+            if entry is None:
+                return 400, {"error": "invalid_grant"}
+            self.issued += 1
+            rotate = self.rotate_every and self.issued % self.rotate_every == 0
+            kid, key = self.keys[-1]
+
+        if params.get("client_id") != CLIENT_ID:
+            return 401, {"error": "invalid_client"}
+
+        claims, nonce = entry
+        now = int(time.time())
+        id_token = jwt.encode(
+            {
+                **claims,
+                "iss": self.issuer,
+                "aud": CLIENT_ID,
+                "iat": now,
+                "exp": now + 3600,
+                "nonce": nonce,
+            },
+            key,
+            algorithm="RS256",
+            headers={"kid": kid},
+        )
+        access_token = secrets.token_urlsafe(32)
+        with self.lock:
+            self.access_tokens[access_token] = claims
+        if rotate:
+            self.rotate_key()
+
+        return 200, {
+            "access_token": access_token,
+            "id_token": id_token,
+            "token_type": "Bearer",
+            "expires_in": 3600,
+        }
+
+    def userinfo(self, authorization):
+        token = authorization.partition(" ")[2]
+        with self.lock:
+            claims = self.access_tokens.get(token)
+        if claims is None:
+            return 401, {"error": "invalid_token"}
+        return 200, claims
+
+
+def plugin_settings(idp, stateless=False):
+    """Django settings that point the plugin at a running ``StubIdP``."""
+    backend = "pretalx_oidc.auth.PretalxOIDCBackend"
+    backends = list(settings.AUTHENTICATION_BACKENDS)
+    if backend not in backends:
+        backends.append(backend)
+    return {
+        "AUTHENTICATION_BACKENDS": backends,
+        "OIDC_AUTHENTICATION_BACKEND": backend,
+        "OIDC_AUTHENTICATION_CALLBACK_URL": (
+            "plugins:pretalx_oidc:oidc_authentication_callback"
+        ),
+        "OIDC_AUTHENTICATION_REQUEST_URL": (
+            "plugins:pretalx_oidc:oidc_authentication_init"
+        ),
+        "OIDC_RP_CLIENT_ID": CLIENT_ID,
+        "OIDC_RP_CLIENT_SECRET": CLIENT_SECRET,
+        "OIDC_RP_SIGN_ALGO": "RS256",
+        "OIDC_OP_AUTHORIZATION_ENDPOINT": idp.endpoint("/authorize"),
+        "OIDC_OP_TOKEN_ENDPOINT": idp.endpoint("/token"),
+        "OIDC_OP_USER_ENDPOINT": idp.endpoint("/userinfo"),
+        "OIDC_OP_JWKS_ENDPOINT": idp.endpoint("/jwks"),
+        "OIDC_OP_ISSUER": idp.issuer,
+        "OIDC_CREATE_USER": True,
+        "OIDC_FORCE_HTTPS_REDIRECT": False,
+        "OIDC_STATELESS_STATE": stateless,
+        "SITE_URL": "http://testserver",
+    }
+
+
+@contextlib.contextmanager
+def stub_settings(idp, stateless=False):
+    """Point the plugin at a running ``StubIdP`` instead of the configured provider."""
+    values = plugin_settings(idp, stateless)
+    with override_settings(**values), override_oidc_settings(**values):
+        yield
+
+
+class StubIdPRequestHandler(BaseHTTPRequestHandler):
+    idp = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        time.sleep(self.idp.latency)
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/.well-known/openid-configuration":
+            self.send_json(200, self.idp.discovery())
+        elif url.path == "/jwks":
+            with self.idp.lock:
+                self.idp.stats["jwks"] += 1
+            self.send_json(200, self.idp.jwks())
+        elif url.path == "/authorize":
+            self.send_response(302)
+            self.send_header("Location", self.idp.authorize(params))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif url.path == "/userinfo":
+            self.send_json(*self.idp.userinfo(self.headers.get("Authorization", "")))
+        else:
+            self.send_json(404, {"error": "not_found"})
+
+    def do_POST(self):
+        time.sleep(self.idp.latency)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode()
+        params = {key: values[0] for key, values in parse_qs(body).items()}
+
+        if urlsplit(self.path).path == "/token":
+            self.send_json(*self.idp.token(params))
+        else:
+            self.send_json(404, {"error": "not_found"})
+
+
+def _b64_int(value):
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
@@ -3,7 +3,13 @@
 
 from django.urls import path
 
+from . import health
 from .views import (
+    OIDCBackchannelLogoutView,
+    OIDCHealthView,
+    OIDCLoginQueueView,
+    OIDCProfileListView,
+    OIDCUserExportView,
     PretalxOIDCAuthenticationCallbackView,
     PretalxOIDCAuthenticationRequestView,
 )
@@ -21,4 +27,30 @@ urlpatterns = [
         PretalxOIDCAuthenticationCallbackView.as_view(),
         name="oidc_authentication_callback",
     ),
+    path("oidc/queue/", OIDCLoginQueueView.as_view(), name="oidc_login_queue"),
+    path(
+        "oidc/backchannel-logout/",
+        OIDCBackchannelLogoutView.as_view(),
+        name="oidc_backchannel_logout",
+    ),
+    path(
+        "oidc/healthz/",
+        OIDCHealthView.as_view(probe=health.liveness),
+        name="oidc_healthz",
+    ),
+    path(
+        "oidc/readyz/",
+        OIDCHealthView.as_view(probe=health.readiness),
+        name="oidc_readyz",
+    ),
+    path(
+        "orga/admin/oidc/profiles/",
+        OIDCProfileListView.as_view(),
+        name="oidc_profiles",
+    ),
+    path(
+        "orga/admin/oidc/profiles/export/",
+        OIDCUserExportView.as_view(),
+        name="oidc_user_export",
+    ),
 ]
@@ -2,30 +2,156 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import logging
+from urllib.parse import urlencode
 
-from django.conf import settings
-from django.http import HttpResponseRedirect
+import jwt
+import requests
+from django.contrib import auth
+from django.core.exceptions import PermissionDenied, SuspiciousOperation
+from django.db.models import Q
+from django.http import (
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.urls import reverse
+from django.utils.crypto import get_random_string
+from django.utils.decorators import method_decorator
+from django.utils.html import escape
+from django.utils.timezone import now
+from django.utils.translation import gettext as _
+from django.views.decorators.csrf import csrf_exempt
+from django.views.generic import TemplateView, View
+from mozilla_django_oidc.utils import generate_code_challenge
 from mozilla_django_oidc.views import (
     OIDCAuthenticationCallbackView,
     OIDCAuthenticationRequestView,
+    get_next_url,
+)
+
+from . import admission, export, health, singleflight
+from .config import SnapshotSetting, current_settings, use_provider
+from .middleware import get_token_expiration
+from .models import OIDCUserProfile
+from .providers import DEFAULT_PROVIDER, LOGIN_PROVIDER_SESSION_KEY, registry
+from .sessions import backchannel_logout
+from .state import (
+    delete_state_cookie,
+    get_callback_url,
+    read_state_cookie,
+    set_state_cookie,
 )
 
 logger = logging.getLogger(__name__)
 
+EMAIL_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="robots" content="noindex">
+<title>{title}</title>
+</head>
+<body style="font-family: sans-serif; text-align: center; margin-top: 20vh">
+<h1>{title}</h1>
+<form method="get" action="{action}">
+<input type="hidden" name="next" value="{next}">
+<p><input type="email" name="email" required autofocus placeholder="{label}"></p>
+<p><button type="submit">{submit}</button></p>
+</form>
+</body>
+</html>
+"""
+
+
+def select_provider(request):
+    """
+    Pick the provider of a new login.
+
+    An explicit ``provider`` parameter wins, then the host of the request, the
+    organiser of the event and the domain of an ``email`` parameter.
+    """
+    name = request.GET.get("provider")
+    if name == DEFAULT_PROVIDER or name in registry:
+        return name
+
+    organiser = None
+    event = getattr(request, "event", None)
+    if event is not None and registry.has_organisers:
+        organiser = event.organiser.slug
+    return registry.route(
+        host=request.get_host(), organiser=organiser, email=request.GET.get("email")
+    )
+
 
 class PretalxOIDCAuthenticationRequestView(OIDCAuthenticationRequestView):
     """Custom OIDC login initiation view for pretalx."""
 
+    # From the provider of the login rather than from django.conf.settings
+    OIDC_OP_AUTH_ENDPOINT = SnapshotSetting(setting="OIDC_OP_AUTHORIZATION_ENDPOINT")
+    OIDC_RP_CLIENT_ID = SnapshotSetting()
+
+    @staticmethod
+    def get_settings(attr, *args):
+        return current_settings().get(attr, *args)
+
     def get(self, request):
-        """Override get method to enforce HTTPS redirect URIs."""
-        logger.info("[OIDC] Processing authentication request")
+        """Start the login at the provider picked by select_provider()."""
+        logger.debug("[OIDC] Processing authentication request")
+
+        if "discover" in request.GET and not request.GET.get("email"):
+            return self.email_page(request)
+
+        # Pace new login flows so the token endpoint isn't overrun
+        if admission.is_enabled():
+            if not admission.admit_login():
+                logger.info("[OIDC] Login rate exceeded, showing wait page")
+                return admission.wait_response(request)
+            admission.leave_queue(request)
+
+        name = select_provider(request)
+        provider = registry.get(name)
+        if provider is None and name in registry:
+            logger.error(f"[OIDC] Provider {name} is not available")
+            return HttpResponseRedirect(reverse("orga:login") + "?oidc_error=1")
+
+        with use_provider(provider):
+            return self.start(request, name)
+
+    def email_page(self, request):
+        """Ask for the email address whose domain picks the provider."""
+        response = HttpResponse(
+            EMAIL_PAGE.format(
+                action=escape(request.path),
+                next=escape(request.GET.get("next", "")),
+                title=escape(_("Sign in with your organisation")),
+                label=escape(_("Your email address")),
+                submit=escape(_("Continue")),
+            )
+        )
+        response["Cache-Control"] = "no-store"
+        return response
+
+    def get_extra_params(self, request):
+        params = super().get_extra_params(request)
+        email = request.GET.get("email")
+        if email:
+            # Saves the user typing the address again at the provider
+            params = {**params, "login_hint": email}
+        return params
+
+    def start(self, request, name):
+        """Redirect to the provider, enforcing HTTPS redirect URIs if configured."""
+        if self.get_settings("OIDC_STATELESS_STATE", False):
+            return self.get_stateless(request, name)
 
         # Call parent get method to get the response
         response = super().get(request)
+        # The callback continues with the same provider
+        request.session[LOGIN_PROVIDER_SESSION_KEY] = name
 
         # Check if HTTPS redirect enforcement is enabled
-        force_https = getattr(settings, "OIDC_FORCE_HTTPS_REDIRECT", False)
+        force_https = self.get_settings("OIDC_FORCE_HTTPS_REDIRECT", False)
 
         # If it's a redirect response and HTTPS enforcement is enabled
         if force_https and hasattr(response, "url"):
@@ -41,17 +167,160 @@ class PretalxOIDCAuthenticationRequestView(OIDCAuthenticationRequestView):
 
         return response
 
+    def get_stateless(self, request, name):
+        """
+        Start the login without touching the session.
+
+        State, nonce and PKCE verifier travel in an encrypted cookie, and the
+        redirect URI is the precomputed callback URL.
+        """
+        state = get_random_string(self.get_settings("OIDC_STATE_SIZE", 32))
+        params = {
+            "response_type": "code",
+            "scope": self.get_settings("OIDC_RP_SCOPES", "openid email"),
+            "client_id": self.OIDC_RP_CLIENT_ID,
+            "redirect_uri": get_callback_url(),
+            "state": state,
+        }
+        params.update(self.get_extra_params(request))
+
+        payload = {
+            "state": state,
+            "next": get_next_url(
+                request, self.get_settings("OIDC_REDIRECT_FIELD_NAME", "next")
+            ),
+            "provider": name,
+        }
+
+        if self.get_settings("OIDC_USE_NONCE", True):
+            payload["nonce"] = get_random_string(
+                self.get_settings("OIDC_NONCE_SIZE", 32)
+            )
+            params["nonce"] = payload["nonce"]
+
+        if self.get_settings("OIDC_USE_PKCE", False):
+            code_verifier = get_random_string(
+                self.get_settings("OIDC_PKCE_CODE_VERIFIER_SIZE", 64)
+            )
+            method = self.get_settings("OIDC_PKCE_CODE_CHALLENGE_METHOD", "S256")
+            params["code_challenge"] = generate_code_challenge(code_verifier, method)
+            params["code_challenge_method"] = method
+            payload["code_verifier"] = code_verifier
+
+        response = HttpResponseRedirect(
+            f"{self.OIDC_OP_AUTH_ENDPOINT}?{urlencode(params)}"
+        )
+        set_state_cookie(response, state, payload)
+        return response
+
 
 class PretalxOIDCAuthenticationCallbackView(OIDCAuthenticationCallbackView):
     """Custom OIDC callback view for pretalx."""
 
+    @staticmethod
+    def get_settings(attr, *args):
+        return current_settings().get(attr, *args)
+
+    def get(self, request):
+        """
+        Handle the callback once per ``state``.
+
+        Duplicate submissions of the same callback wait for the first one and
+        reuse its outcome. The number of token exchanges running at the same
+        time is capped by the admission control.
+        """
+        state = request.GET.get("state")
+        if "code" not in request.GET or not state:
+            return super().get(request)
+
+        if not singleflight.claim(state):
+            logger.info("[OIDC] Duplicate callback, waiting for the first request")
+            return self.reuse_outcome(request, state, singleflight.wait(state))
+
+        slot = get_random_string(16)
+        if admission.is_enabled():
+            if not admission.acquire_exchange_slot(slot):
+                logger.info(
+                    "[OIDC] Too many concurrent token exchanges, showing wait page"
+                )
+                singleflight.release(state)
+                return admission.wait_response(request)
+            admission.leave_queue(request)
+
+        origin = singleflight.session_origin(request, state)
+        outcome = {}
+        try:
+            response = self.handle_callback(request, state)
+            outcome["location"] = response.url
+            if getattr(self, "user", None) and request.user == self.user:
+                # Persist the new session now, so duplicates can pick it up
+                request.session.save()
+                outcome.update(session_key=request.session.session_key, origin=origin)
+            return response
+        finally:
+            if "location" not in outcome:
+                outcome["location"] = self.failure_url
+            singleflight.publish(state, outcome)
+            if admission.is_enabled():
+                admission.release_exchange_slot(slot)
+
+    def handle_callback(self, request, state):
+        """Complete the login from the state cookie, or from the session."""
+        payload = read_state_cookie(request, state)
+        if payload is not None:
+            name = payload.get("provider")
+        else:
+            name = request.session.get(LOGIN_PROVIDER_SESSION_KEY)
+
+        provider = registry.get(name)
+        if provider is None and name in registry:
+            logger.error(f"[OIDC] Provider {name} of this login is not available")
+            response = self.login_failure()
+        else:
+            with use_provider(provider):
+                response = self.complete_login(request, payload)
+
+        if payload is not None:
+            delete_state_cookie(response, state)
+        return response
+
+    def complete_login(self, request, payload):
+        if payload is None:
+            return super().get(request)
+
+        self.stateless_next = payload.get("next")
+        self.user = auth.authenticate(
+            request=request,
+            nonce=payload.get("nonce"),
+            code_verifier=payload.get("code_verifier"),
+        )
+        if self.user and self.user.is_active:
+            return self.login_success()
+        return self.login_failure()
+
+    def reuse_outcome(self, request, state, outcome):
+        """Answer a duplicate callback with the outcome of the first request."""
+        if not outcome:
+            return self.login_failure()
+
+        session_key = outcome.get("session_key")
+        origin = singleflight.session_origin(request, state)
+        if session_key and outcome.get("origin") == origin:
+            # Same browser: hand over the session the first request logged in
+            request.session = request.session.__class__(session_key)
+            request.session.modified = True
+
+        return HttpResponseRedirect(outcome["location"])
+
     @property
     def success_url(self):
         """Return the URL to redirect to after successful authentication."""
-        logger.info("[OIDC] Authentication successful, determining redirect URL")
+        logger.debug("[OIDC] Authentication successful, determining redirect URL")
 
         # Get the stored next URL
-        next_url = self.request.session.pop("oidc_login_next", None)
+        next_url = getattr(self, "stateless_next", None) or self.request.session.pop(
+            "oidc_login_next", None
+        )
 
         # Default fallback URLs
         if not next_url:
@@ -62,12 +331,220 @@ class PretalxOIDCAuthenticationCallbackView(OIDCAuthenticationCallbackView):
                 # Otherwise go to organizer dashboard or event list
                 next_url = reverse("orga:event.list")
 
-        logger.info(f"[OIDC] Redirecting to: {next_url}")
+        logger.debug("[OIDC] Redirecting to: %s", next_url)
         return next_url
 
+    def login_success(self):
+        """Log the user in and schedule a jittered token renewal."""
+        response = super().login_success()
+        self.request.session["oidc_id_token_expiration"] = get_token_expiration()
+        return response
+
     @property
     def failure_url(self):
         """Return the URL to redirect to after failed authentication."""
-        logger.error("[OIDC] Authentication failed")
+        logger.info("[OIDC] Authentication failed")
         # Redirect to login page with error
         return reverse("orga:login") + "?oidc_error=1"
+
+
+class OIDCLoginQueueView(View):
+    """
+    Report the position of a waiting user, given their ticket.
+
+    Administrators get the queue depth, the running token exchanges and the
+    limits instead.
+    """
+
+    http_method_names = ["get"]
+
+    def get(self, request):
+        if getattr(request.user, "is_administrator", False):
+            data = admission.queue_stats()
+        else:
+            data = admission.queue_position(request.GET.get(admission.TICKET_PARAM))
+        response = JsonResponse(data)
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class OIDCBackchannelLogoutView(View):
+    """
+    OpenID Connect Back-Channel Logout endpoint.
+
+    The provider POSTs a signed logout token here when a user signs out
+    there, and the sessions it names are ended.
+    """
+
+    http_method_names = ["post"]
+
+    def post(self, request):
+        token = request.POST.get("logout_token")
+        if not token:
+            return self.error("Missing logout_token")
+
+        # Providers of [oidc:<name>] sections add ?provider=<name> to the URL
+        name = request.GET.get("provider")
+        provider = registry.get(name)
+        if name and provider is None:
+            return self.error("Unknown or unavailable provider")
+        try:
+            with use_provider(provider):
+                backchannel_logout(token)
+        except (jwt.InvalidTokenError, SuspiciousOperation) as e:
+            logger.warning(f"[OIDC] Rejected logout token: {e}")
+            return self.error("Invalid logout_token")
+        except requests.RequestException as e:
+            logger.error(f"[OIDC] Could not verify logout token: {e}")
+            return self.error("Could not verify logout_token")
+
+        response = HttpResponse()
+        response["Cache-Control"] = "no-store"
+        return response
+
+    @staticmethod
+    def error(description):
+        response = JsonResponse(
+            {"error": "invalid_request", "error_description": description},
+            status=400,
+        )
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+class OIDCHealthView(View):
+    """
+    Liveness (``/oidc/healthz``) and readiness (``/oidc/readyz``) probes.
+
+    Answered from the report of the last background check, see health.py.
+    Administrators also get the error messages and URLs of failed checks.
+    """
+
+    http_method_names = ["get", "head"]
+    probe = staticmethod(health.liveness)
+
+    def get(self, request):
+        status, body = self.probe(
+            detailed=getattr(request.user, "is_administrator", False)
+        )
+        response = HttpResponse(body, status=status, content_type="application/json")
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+class OIDCProfileListView(TemplateView):
+    """
+    List and search OIDC profiles, for administrators.
+
+    Profiles are searched by prefix of the email or the sub and paged by
+    keyset: each page continues after the last row of the previous one,
+    using the index of the column it is ordered by, instead of counting or
+    skipping rows. Pages take the same time on the first and the last page,
+    whatever the number of profiles.
+    """
+
+    template_name = "pretalx_oidc/profile_list.html"
+    page_size = 50
+    # Search and sort columns, each with an index usable for prefix searches
+    fields = {"email": "email", "sub": "oidc_id"}
+
+    def dispatch(self, request, *args, **kwargs):
+        if not getattr(request.user, "is_administrator", False):
+            raise PermissionDenied()
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        params = self.request.GET
+        field = params.get("field") if params.get("field") in self.fields else "email"
+        column = self.fields[field]
+        search = params.get("q", "").strip()
+        provider = params.get("provider", "")
+
+        profiles = OIDCUserProfile.objects.select_related("user").only(
+            "oidc_id",
+            "provider",
+            "email",
+            "created",
+            "updated",
+            "user",
+            "user__name",
+            "user__code",
+        )
+        filters = {}
+        if provider:
+            filters["provider"] = provider
+        if search:
+            # Emails are stored in lowercase, subs are case sensitive
+            filters[f"{column}__startswith"] = (
+                search.lower() if field == "email" else search
+            )
+        profiles = profiles.filter(**filters)
+
+        after, after_id = params.get("after"), params.get("after_id", "")
+        if after is not None and after_id.isdigit():
+            profiles = profiles.filter(
+                Q(**{f"{column}__gt": after}) | Q(**{column: after, "pk__gt": after_id})
+            )
+
+        # One row more than shown tells whether there is a next page
+        page = list(profiles.order_by(column, "pk")[: self.page_size + 1])
+        next_url = None
+        if len(page) > self.page_size:
+            page = page[: self.page_size]
+            last = page[-1]
+            next_params = params.copy()
+            next_params["after"] = getattr(last, column)
+            next_params["after_id"] = last.pk
+            next_url = f"?{next_params.urlencode()}"
+
+        first_params = params.copy()
+        for key in ("after", "after_id"):
+            first_params.pop(key, None)
+
+        context.update(
+            {
+                "profiles": page,
+                "search": search,
+                "field": field,
+                "provider": provider,
+                # From the configuration, not from a DISTINCT over all profiles
+                "providers": [DEFAULT_PROVIDER, *registry.names()],
+                "next_url": next_url,
+                "first_url": (
+                    f"?{first_params.urlencode()}" if after is not None else None
+                ),
+            }
+        )
+        return context
+
+
+class OIDCUserExportView(View):
+    """
+    Stream the export of all OIDC-linked users, for superusers.
+
+    ``?format=jsonl`` selects JSON lines instead of CSV and ``?provider=``
+    limits the export to one provider. Rows are sent while they are read, so
+    neither memory nor the time to the first byte grow with the number of
+    users.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_superuser:
+            raise PermissionDenied()
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request):
+        format = request.GET.get("format", "csv")
+        if format not in export.FORMATS:
+            format = "csv"
+        response = StreamingHttpResponse(
+            export.export(format=format, provider=request.GET.get("provider")),
+            content_type=export.CONTENT_TYPES[format],
+        )
+        filename = f"oidc-users-{now():%Y%m%d-%H%M%S}.{format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        response["Cache-Control"] = "no-store"
+        logger.warning(f"[OIDC] User export ({format}) by user {request.user.pk}")
+        return response
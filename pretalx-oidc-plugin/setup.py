@@ -14,6 +14,10 @@ setup(
         "mozilla-django-oidc>=3.0.0",
         "requests>=2.25.0",
     ],
+    extras_require={
+        "msgpack": ["msgpack>=1.0"],
+        "test": ["pytest", "pytest-django"],
+    },
     packages=find_packages(exclude=["tests", "tests.*"]),
     include_package_data=True,
     entry_points={
@@ -0,0 +1,27 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Settings for the plugin's tests: pretalx's own, with a read replica.
+
+The replica is a test mirror of the default database, like the one
+patch_database_replica.py adds, so both aliases reach the same data.
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("PRETALX_DATA_DIR", tempfile.mkdtemp())
+
+from pretalx.settings import *  # noqa: E402, F401, F403
+
+DATABASES["replica"] = {  # noqa: F405
+    **DATABASES["default"],  # noqa: F405
+    "TEST": {"MIRROR": "default"},
+}
+DATABASE_ROUTERS = ["pretalx_oidc.routers.ReplicaRouter"]
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+SESSION_ENGINE = "django.contrib.sessions.backends.db"
+HAS_REDIS = False
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
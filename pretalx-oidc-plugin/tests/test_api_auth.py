@@ -0,0 +1,118 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import time
+from unittest import mock
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from pretalx_oidc.api_auth import token_cache, validate_access_token
+from pretalx_oidc.config import override_oidc_settings
+from rest_framework.exceptions import AuthenticationFailed
+
+ISSUER = "https://idp.example.org"
+KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture(autouse=True)
+def api_settings():
+    with override_oidc_settings(
+        OIDC_RP_SIGN_ALGO="RS256",
+        OIDC_RP_CLIENT_ID="pretalx",
+        OIDC_RP_CLIENT_SECRET="secret",
+        OIDC_OP_ISSUER=ISSUER,
+        OIDC_OP_JWKS_ENDPOINT=f"{ISSUER}/jwks",
+        OIDC_OP_INTROSPECTION_ENDPOINT=f"{ISSUER}/introspect",
+    ), mock.patch(
+        "pretalx_oidc.api_auth.jwks_cache.get_signing_key",
+        return_value=KEY.public_key(),
+    ):
+        token_cache.clear()
+        yield
+    token_cache.clear()
+
+
+def make_token(headers=None, **claims):
+    claims = {
+        "iss": ISSUER,
+        "sub": "user-1",
+        "aud": "pretalx",
+        "exp": int(time.time()) + 300,
+        **claims,
+    }
+    return jwt.encode(claims, KEY, algorithm="RS256", headers=headers)
+
+
+def test_access_token_for_client_id_accepted():
+    assert validate_access_token(make_token())["sub"] == "user-1"
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [
+        {"aud": "other-client"},
+        {"iss": "https://evil.example.org"},
+        {"exp": int(time.time()) - 60},
+    ],
+    ids=["wrong-audience", "wrong-issuer", "expired"],
+)
+def test_invalid_token_rejected(claims):
+    with pytest.raises(AuthenticationFailed):
+        validate_access_token(make_token(**claims))
+
+
+def test_token_without_audience_rejected():
+    token = make_token()
+    claims = jwt.decode(token, options={"verify_signature": False})
+    del claims["aud"]
+    with pytest.raises(AuthenticationFailed):
+        validate_access_token(jwt.encode(claims, KEY, algorithm="RS256"))
+
+
+def test_configured_audience_replaces_client_id():
+    with override_oidc_settings(OIDC_API_AUDIENCE="pretalx-api"):
+        assert validate_access_token(make_token(aud="pretalx-api"))
+        token_cache.clear()
+        with pytest.raises(AuthenticationFailed):
+            validate_access_token(make_token())
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [{"nonce": "abc"}, {"typ": "ID"}, {"token_use": "id"}],
+    ids=["nonce", "keycloak", "cognito"],
+)
+def test_id_token_rejected(claims):
+    with pytest.raises(AuthenticationFailed):
+        validate_access_token(make_token(**claims))
+
+
+def test_access_token_type_accepted():
+    token = make_token(headers={"typ": "at+jwt"}, nonce="abc")
+    assert validate_access_token(token)["sub"] == "user-1"
+
+
+@pytest.mark.parametrize(
+    "claims",
+    [
+        {"active": True, "sub": "user-1", "aud": "other-client"},
+        {"active": True, "sub": "user-1"},
+        {"active": True, "sub": "user-1", "aud": "pretalx", "token_use": "id"},
+    ],
+    ids=["wrong-audience", "no-audience", "id-token"],
+)
+def test_introspection_rejects_foreign_tokens(claims):
+    response = mock.Mock(json=mock.Mock(return_value=claims))
+    with mock.patch("pretalx_oidc.api_auth.http_session") as session:
+        session.return_value.post.return_value = response
+        with pytest.raises(AuthenticationFailed):
+            validate_access_token("opaque-token")
+
+
+def test_introspection_accepts_token_for_client_id():
+    claims = {"active": True, "sub": "user-1", "aud": ["pretalx", "account"]}
+    response = mock.Mock(json=mock.Mock(return_value=claims))
+    with mock.patch("pretalx_oidc.api_auth.http_session") as session:
+        session.return_value.post.return_value = response
+        assert validate_access_token("opaque-token")["sub"] == "user-1"
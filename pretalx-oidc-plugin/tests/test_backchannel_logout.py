@@ -0,0 +1,84 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import time
+import uuid
+from unittest import mock
+
+import jwt
+import pytest
+import requests
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+from pretalx_oidc.config import override_oidc_settings
+from pretalx_oidc.sessions import BACKCHANNEL_LOGOUT_EVENT, verify_logout_token
+from pretalx_oidc.views import OIDCBackchannelLogoutView
+
+ISSUER = "https://idp.example.org"
+KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+GET_SIGNING_KEY = "pretalx_oidc.sessions.jwks_cache.get_signing_key"
+
+
+@pytest.fixture(autouse=True)
+def logout_settings():
+    locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    with override_settings(CACHES=locmem), override_oidc_settings(
+        OIDC_RP_SIGN_ALGO="RS256",
+        OIDC_RP_CLIENT_ID="pretalx",
+        OIDC_OP_ISSUER=ISSUER,
+        OIDC_OP_JWKS_ENDPOINT=f"{ISSUER}/jwks",
+    ), mock.patch(GET_SIGNING_KEY, return_value=KEY.public_key()):
+        cache.clear()
+        yield
+
+
+def make_token(**claims):
+    now = int(time.time())
+    claims = {
+        "iss": ISSUER,
+        "aud": "pretalx",
+        "iat": now,
+        "exp": now + 120,
+        "jti": uuid.uuid4().hex,
+        "sid": "session-1",
+        "events": {BACKCHANNEL_LOGOUT_EVENT: {}},
+        **claims,
+    }
+    return jwt.encode(
+        {name: value for name, value in claims.items() if value is not None},
+        KEY,
+        algorithm="RS256",
+    )
+
+
+def test_logout_token_accepted():
+    assert verify_logout_token(make_token())["sid"] == "session-1"
+
+
+@pytest.mark.parametrize("claim", ["iat", "exp", "jti", "aud"])
+def test_logout_token_missing_claim_rejected(claim):
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_logout_token(make_token(**{claim: None}))
+
+
+def test_expired_logout_token_rejected():
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_logout_token(make_token(exp=int(time.time()) - 60))
+
+
+def test_logout_token_replay_rejected():
+    token = make_token()
+    verify_logout_token(token)
+    with pytest.raises(jwt.InvalidTokenError):
+        verify_logout_token(token)
+
+
+def test_jwks_failure_returns_error_response():
+    request = RequestFactory().post(
+        "/oidc/backchannel-logout/", {"logout_token": make_token()}
+    )
+    with mock.patch(GET_SIGNING_KEY, side_effect=requests.ConnectionError("down")):
+        response = OIDCBackchannelLogoutView.as_view()(request)
+    assert response.status_code == 400
+    assert response["Cache-Control"] == "no-store"
@@ -0,0 +1,129 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import time
+from unittest import mock
+
+import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+from pretalx.person.models import User
+from pretalx_oidc.auth import PretalxOIDCBackend
+from pretalx_oidc.config import OIDCSettings, override_oidc_settings, use_provider
+from pretalx_oidc.middleware import (
+    OIDCSessionRefreshMiddleware,
+    get_token_expiration,
+)
+
+pytestmark = pytest.mark.django_db
+
+RENEWED = {"access_token": "access-2", "id_token": "id-2", "refresh_token": "refresh-2"}
+
+
+@pytest.fixture(autouse=True)
+def refresh_settings():
+    locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    with override_settings(CACHES=locmem), override_oidc_settings(
+        OIDC_STORE_ID_TOKEN=True, OIDC_STORE_REFRESH_TOKEN=True
+    ):
+        cache.clear()
+        yield
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(email="jane@example.org", name="Jane")
+
+
+@pytest.fixture
+def session_key():
+    session = SessionStore()
+    session["oidc_id_token"] = "id-1"
+    session["oidc_refresh_token"] = "refresh-1"
+    session["oidc_id_token_expiration"] = time.time() - 1
+    session.create()
+    return session.session_key
+
+
+def request_for(user, session_key):
+    """A request that loaded the session as it is in the store now."""
+    request = RequestFactory().get("/orga/")
+    request.user = user
+    request.session = SessionStore(session_key)
+    return request
+
+
+def test_concurrent_requests_refresh_once(user, session_key):
+    middleware = OIDCSessionRefreshMiddleware(lambda request: None)
+    first = request_for(user, session_key)
+    second = request_for(user, session_key)
+
+    with mock.patch.object(
+        PretalxOIDCBackend, "renew_tokens", return_value=RENEWED
+    ) as renew_tokens:
+        assert middleware.renew_session(first, "refresh-1") is True
+        # Still running with the expired tokens it loaded before
+        assert middleware.renew_session(second, "refresh-1") is None
+
+    renew_tokens.assert_called_once()
+    assert "oidc_refresh_token" in second.session
+    stored = SessionStore(session_key)
+    assert stored["oidc_refresh_token"] == "refresh-2"
+    assert stored["oidc_id_token_expiration"] > time.time()
+
+
+def test_refresh_after_the_lock_reads_the_renewed_session(user, session_key):
+    middleware = OIDCSessionRefreshMiddleware(lambda request: None)
+    first = request_for(user, session_key)
+    late = request_for(user, session_key)
+
+    with mock.patch.object(
+        PretalxOIDCBackend, "renew_tokens", return_value=RENEWED
+    ) as renew_tokens:
+        assert middleware.renew_session(first, "refresh-1") is True
+        cache.clear()
+        assert middleware.renew_session(late, "refresh-1") is True
+
+    renew_tokens.assert_called_once()
+    assert late.session["oidc_refresh_token"] == "refresh-2"
+
+
+def test_failed_refresh_releases_the_lock(user, session_key):
+    middleware = OIDCSessionRefreshMiddleware(lambda request: None)
+
+    with mock.patch.object(PretalxOIDCBackend, "renew_tokens", return_value=None):
+        assert middleware.renew_session(request_for(user, session_key), "x") is False
+    with mock.patch.object(
+        PretalxOIDCBackend, "renew_tokens", return_value=RENEWED
+    ) as renew_tokens:
+        assert middleware.renew_session(request_for(user, session_key), "x") is True
+    renew_tokens.assert_called_once()
+
+
+def test_token_expiration_follows_the_provider_in_use():
+    tenant = mock.Mock(
+        settings=OIDCSettings(
+            values={
+                "OIDC_RENEW_ID_TOKEN_EXPIRY_SECONDS": 60,
+                "OIDC_RENEW_ID_TOKEN_JITTER_SECONDS": 0,
+            }
+        )
+    )
+    with override_oidc_settings(OIDC_RENEW_ID_TOKEN_EXPIRY_SECONDS=3600):
+        assert get_token_expiration(now=0) == 3600
+        with use_provider(tenant):
+            assert get_token_expiration(now=0) == 60
+
+
+def test_exempt_urls_follow_reloads():
+    middleware = OIDCSessionRefreshMiddleware(lambda request: None)
+    urls = {
+        "OIDC_AUTHENTICATION_REQUEST_URL": "/oidc/authenticate/",
+        "OIDC_AUTHENTICATION_CALLBACK_URL": "/oidc/callback/",
+    }
+    with override_oidc_settings(OIDC_EXEMPT_URLS=["/before/"], **urls):
+        assert "/before/" in middleware.exempt_urls
+    with override_oidc_settings(OIDC_EXEMPT_URLS=["/after/"], **urls):
+        assert "/after/" in middleware.exempt_urls
+        assert "/before/" not in middleware.exempt_urls
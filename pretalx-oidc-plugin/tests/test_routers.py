@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: 2025-present Harry Kodden
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+from django.core.signals import request_started
+from django.db import connections
+from pretalx.person.models import User
+from pretalx_oidc.auth import PretalxOIDCBackend
+from pretalx_oidc.models import OIDCUserProfile
+from pretalx_oidc.routers import is_pinned, pin_to_primary, replica_reads, unpin
+
+# Without a transaction around every test: the router keeps reads inside
+# atomic blocks on the primary
+pytestmark = pytest.mark.django_db(databases=["default", "replica"], transaction=True)
+
+
+@pytest.fixture(autouse=True)
+def unpinned():
+    unpin()
+    yield
+    unpin()
+
+
+@pytest.fixture
+def oidc_user():
+    user = User.objects.create_user(email="jane@example.org", name="Jane")
+    OIDCUserProfile.objects.create(
+        user=user, oidc_id="jane-sub", provider="oidc", email=user.email
+    )
+    return user
+
+
+@pytest.fixture
+def lagging_replica():
+    """Make the replica miss every row, like one that hasn't caught up yet."""
+    queries = []
+
+    def lag(execute, sql, params, many, context):
+        queries.append(sql)
+        if sql.lstrip().upper().startswith("SELECT"):
+            sql = f"SELECT * FROM ({sql}) AS lagging WHERE 1 = 0"
+        return execute(sql, params, many, context)
+
+    with connections["replica"].execute_wrapper(lag):
+        yield queries
+
+
+def test_reads_in_replica_reads_go_to_the_replica():
+    with replica_reads():
+        assert User.objects.all().db == "replica"
+    assert User.objects.all().db == "default"
+
+
+def test_first_write_pins_to_the_primary():
+    with replica_reads():
+        assert User.objects.all().db == "replica"
+        User.objects.create_user(email="john@example.org", name="John")
+        assert is_pinned()
+        assert User.objects.all().db == "default"
+
+
+def test_request_started_unpins():
+    pin_to_primary()
+    request_started.send(sender=None)
+    assert not is_pinned()
+    with replica_reads():
+        assert User.objects.all().db == "replica"
+
+
+def test_replica_miss_is_checked_on_the_primary(oidc_user, lagging_replica):
+    # Creating the user pinned this thread to the primary
+    unpin()
+    claims = {"sub": "jane-sub", "email": "jane@example.org"}
+
+    users = PretalxOIDCBackend().filter_users_by_claims(claims)
+
+    assert lagging_replica, "the lookup didn't try the replica first"
+    assert list(users) == [oidc_user]
+    assert is_pinned()
+    assert User.objects.count() == 1
+    assert OIDCUserProfile.objects.count() == 1
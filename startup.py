@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Container startup: run `migrate` and `rebuild` only when something changed.
+
+`rebuild` compiles translations and collects and builds static files, which
+takes minutes. Its inputs - the pretalx version, the installed plugins, every
+static and translation source file and the static settings - are fingerprinted
+and compared with the stamp left next to the static files by the last rebuild,
+which for the container image already happened at build time. The comparison
+only looks at the size and modification time of the files; their contents are
+hashed only if those differ, e.g. when copying between image build stages
+changed the times, and the stamp is then updated so the next start is quick
+again. Migrations are
+checked in this process against the database, so an up to date database costs
+a single query instead of a `migrate` run.
+
+Usage: python startup.py [--force | --build]
+
+--force runs both steps regardless, --build only rebuilds and stamps the result
+without touching the database, as the image build does.
+
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from importlib.metadata import entry_points
+from pathlib import Path
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pretalx.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import pretalx  # noqa: E402
+from django.apps import apps  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles.finders import get_finders  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import DEFAULT_DB_ALIAS, connections  # noqa: E402
+from django.db.migrations.executor import MigrationExecutor  # noqa: E402
+
+# Kept next to the files it describes, which may be in the image or a volume
+STAMP_PATH = Path(settings.STATIC_ROOT).parent / ".rebuild-stamp.json"
+FRONTEND_DIR = Path(pretalx.__file__).parent.parent / "frontend" / "schedule-editor"
+
+
+def fingerprint(contents=False):
+    """
+    Hash everything `rebuild` reads.
+
+    Files count with their size and modification time, which costs one stat
+    call each, or with ``contents`` with everything in them.
+    """
+    digest = hashlib.sha256()
+
+    def add(*parts):
+        digest.update(("\0".join(str(part) for part in parts) + "\n").encode())
+
+    def add_file(*parts, path):
+        add(*parts)
+        if contents:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        else:
+            stat = os.stat(path)
+            add(stat.st_size, stat.st_mtime_ns)
+
+    add("pretalx", pretalx.__version__)
+    plugins = entry_points(group="pretalx.plugin")
+    for plugin in sorted(plugins, key=lambda entry_point: entry_point.name):
+        add("plugin", plugin.name, plugin.dist.version if plugin.dist else "")
+    add("settings", settings.STATIC_URL, settings.STATIC_ROOT)
+
+    # Static files, as found by collectstatic
+    for finder in get_finders():
+        for path, storage in sorted(finder.list([]), key=lambda item: item[0]):
+            add_file("static", path, path=storage.path(path))
+
+    # Translations and the schedule editor sources
+    sources = [Path(path) for path in settings.LOCALE_PATHS]
+    sources += [Path(app.path) / "locale" for app in apps.get_app_configs()]
+    sources.append(FRONTEND_DIR)
+    for source in sources:
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if d not in ("node_modules", "dist"))
+            for name in sorted(files):
+                if name.endswith(".mo"):
+                    continue
+                add_file("source", root, name, path=os.path.join(root, name))
+
+    return digest.hexdigest()
+
+
+def static_files_built():
+    static_root = Path(settings.STATIC_ROOT)
+    return static_root.is_dir() and next(static_root.iterdir(), None) is not None
+
+
+def translations_compiled():
+    # Compiled into the source tree, so they are gone in a recreated container
+    translations = Path(settings.LOCALE_PATHS[0]).glob("*/LC_MESSAGES/django.mo")
+    return next(translations, None) is not None
+
+
+def read_stamp():
+    try:
+        with open(STAMP_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_stamp(stamp):
+    with open(STAMP_PATH, "w") as f:
+        json.dump(stamp, f, indent=2)
+
+
+def rebuild():
+    if shutil.which("npm"):
+        call_command("rebuild", silent=True)
+        return
+
+    # The slim image has no npm and ships the schedule editor prebuilt, for the
+    # STATIC_URL the image was built with
+    print(
+        "[Startup] npm is not installed, keeping the prebuilt schedule editor. "
+        f"If STATIC_URL ({settings.STATIC_URL}) changed, rebuild the image with "
+        "--build-arg PRETALX_SITE_STATIC=..."
+    )
+    if shutil.which("msgfmt"):
+        call_command("compilemessages", verbosity=0)
+    call_command("collectstatic", verbosity=0, interactive=False)
+
+
+def pending_migrations():
+    executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+def main(force=False, build=False):
+    started = time.monotonic()
+    stamp = read_stamp()
+
+    if build:
+        force = True
+    else:
+        plan = pending_migrations()
+        if plan or force:
+            print(f"[Startup] Applying {len(plan)} migrations")
+            call_command("migrate", interactive=False)
+        else:
+            print("✓ Database is up to date, skipping migrate")
+
+    files = fingerprint()
+    up_to_date = stamp.get("files") == files
+    if not up_to_date and not force and stamp.get("fingerprint"):
+        # Sizes or times changed, which copying files does as well
+        up_to_date = stamp["fingerprint"] == fingerprint(contents=True)
+        if up_to_date:
+            stamp["files"] = files
+            write_stamp(stamp)
+
+    if force or not up_to_date or not static_files_built():
+        print("[Startup] Static files or translations changed, running rebuild")
+        rebuild_started = time.monotonic()
+        rebuild()
+        # Computed afterwards in case the build touched any of its inputs
+        stamp["fingerprint"] = fingerprint(contents=True)
+        stamp["files"] = fingerprint()
+        stamp["rebuild_seconds"] = round(time.monotonic() - rebuild_started, 1)
+        write_stamp(stamp)
+    else:
+        if not translations_compiled() and shutil.which("msgfmt"):
+            print("[Startup] Compiling translations")
+            call_command("compilemessages", verbosity=0)
+        # The last rebuild took this long, so that is roughly what skipping saves
+        saved = stamp.get("rebuild_seconds", 0)
+        print("✓ Static files are up to date, skipping rebuild")
+        print(f"✓ Skipping rebuild saved about {saved:.0f}s")
+
+    # Workers open their own connections
+    connections.close_all()
+    print(f"✓ Startup checks took {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    force = "--force" in sys.argv[1:] or bool(os.environ.get("PRETALX_FORCE_REBUILD"))
+    main(force=force, build="--build" in sys.argv[1:])